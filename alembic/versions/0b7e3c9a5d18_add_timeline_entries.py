@@ -0,0 +1,52 @@
+"""Add timeline_entries and users.follower_count for fan-out timelines
+
+Revision ID: 0b7e3c9a5d18
+Revises: f61b8d2c4e97
+Create Date: 2026-10-16 17:03:48.226051
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b7e3c9a5d18'
+down_revision: Union[str, Sequence[str], None] = 'f61b8d2c4e97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('follower_count', sa.Integer(), server_default='0', nullable=False))
+    # Backfill the counter from the existing follows.
+    op.execute(
+        "UPDATE users SET follower_count = "
+        "(SELECT COUNT(*) FROM follows WHERE follows.followee = users.username)"
+    )
+    op.create_table('timeline_entries',
+    sa.Column('username', sa.String(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['username'], ['users.username'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('username', 'post_id')
+    )
+    op.create_index(op.f('ix_timeline_entries_post_id'), 'timeline_entries', ['post_id'], unique=False)
+    op.create_index(
+        'ix_timeline_entries_username_created_at_post_id',
+        'timeline_entries',
+        ['username', 'created_at', 'post_id'],
+        unique=False,
+    )
+    # Timelines start empty; fill them with `python -m app.cli rebuild-timelines`.
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_timeline_entries_username_created_at_post_id', table_name='timeline_entries')
+    op.drop_index(op.f('ix_timeline_entries_post_id'), table_name='timeline_entries')
+    op.drop_table('timeline_entries')
+    op.drop_column('users', 'follower_count')
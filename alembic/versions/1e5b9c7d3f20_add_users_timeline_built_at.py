@@ -0,0 +1,36 @@
+"""Add users timeline_built_at and celebrity_since
+
+Revision ID: 1e5b9c7d3f20
+Revises: 6b2d8e4f1a97
+Create Date: 2026-10-16 19:12:40.208315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1e5b9c7d3f20'
+down_revision: Union[str, Sequence[str], None] = '6b2d8e4f1a97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('celebrity_since', sa.DateTime(), nullable=True))
+    op.add_column('users', sa.Column('timeline_built_at', sa.DateTime(), nullable=True))
+    # Timelines that already have entries were built; the rest are rebuilt
+    # once on first read.
+    op.execute(
+        "UPDATE users SET timeline_built_at = CURRENT_TIMESTAMP "
+        "WHERE EXISTS (SELECT 1 FROM timeline_entries WHERE timeline_entries.username = users.username)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'timeline_built_at')
+    op.drop_column('users', 'celebrity_since')
@@ -0,0 +1,66 @@
+"""Add post_tags, the hashtag index of posts
+
+Revision ID: 2d6e9f0b8c53
+Revises: 9c2f7b4e1a06
+Create Date: 2026-10-16 20:41:19.305718
+
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d6e9f0b8c53'
+down_revision: Union[str, Sequence[str], None] = '9c2f7b4e1a06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match app.models.TAG_MAX_LENGTH and app.services.tags.
+TAG_MAX_LENGTH = 100
+TAGS_PER_POST = 30
+HASHTAG = re.compile(rf"(?<![\w#&])#(?=\w*[^\W\d_])(\w{{1,{TAG_MAX_LENGTH}}})(?!\w)")
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    post_tags = op.create_table('post_tags',
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('tag', sa.String(length=TAG_MAX_LENGTH), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('post_id', 'tag')
+    )
+    # Backfill from the existing posts the same way app.services.tags parses new ones.
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        posts = bind.execute(
+            sa.text(
+                "SELECT id, created_at, content FROM posts "
+                "WHERE id > :last_id AND content LIKE '%#%' AND created_at IS NOT NULL "
+                "ORDER BY id LIMIT :batch"
+            ).columns(created_at=sa.DateTime()),
+            {"last_id": last_id, "batch": BATCH_SIZE},
+        ).all()
+        if not posts:
+            break
+        rows = []
+        for post_id, created_at, content in posts:
+            tags = list(dict.fromkeys(tag.lower() for tag in HASHTAG.findall(content)))[:TAGS_PER_POST]
+            rows.extend({"post_id": post_id, "tag": tag, "created_at": created_at} for tag in tags)
+        if rows:
+            op.bulk_insert(post_tags, rows)
+        last_id = posts[-1][0]
+    op.create_index(
+        'ix_post_tags_tag_created_at_post_id', 'post_tags', ['tag', 'created_at', 'post_id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_post_tags_tag_created_at_post_id', table_name='post_tags')
+    op.drop_table('post_tags')
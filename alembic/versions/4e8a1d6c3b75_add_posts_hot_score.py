@@ -0,0 +1,60 @@
+"""Add posts.hot_score for the hot feed
+
+Revision ID: 4e8a1d6c3b75
+Revises: 0b7e3c9a5d18
+Create Date: 2026-10-16 18:12:41.530917
+
+"""
+import math
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e8a1d6c3b75'
+down_revision: Union[str, Sequence[str], None] = '0b7e3c9a5d18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match app.models.HOT_DECAY_SECONDS (default) and HOT_EPOCH.
+HOT_DECAY_SECONDS = 45000
+HOT_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _hot_score(like_count, created_at):
+    if isinstance(created_at, str):
+        # SQLite returns DateTime columns of a textual query as strings.
+        created_at = datetime.fromisoformat(created_at)
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    age_bonus = (created_at - HOT_EPOCH).total_seconds() / HOT_DECAY_SECONDS
+    return math.log10(max(like_count or 0, 1)) + age_bonus
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('posts', sa.Column('hot_score', sa.Float(), server_default='0', nullable=False))
+    # Backfill the same way app.models.hot_score scores posts. Not every
+    # database has LOG10, so the scores are computed here.
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT id, created_at, like_count + COALESCE("
+        "(SELECT SUM(count) FROM post_like_shards WHERE post_like_shards.post_id = posts.id), 0) "
+        "FROM posts WHERE created_at IS NOT NULL"
+    )).all()
+    params = [
+        {"b_id": post_id, "b_score": _hot_score(like_count, created_at)}
+        for post_id, created_at, like_count in rows
+    ]
+    if params:
+        bind.execute(sa.text("UPDATE posts SET hot_score = :b_score WHERE id = :b_id"), params)
+    op.create_index('ix_posts_hot_score_id', 'posts', ['hot_score', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_posts_hot_score_id', table_name='posts')
+    op.drop_column('posts', 'hot_score')
@@ -0,0 +1,28 @@
+"""Add likes.post_id index for per-post like aggregates
+
+Revision ID: 5c1e9a2b7f36
+Revises: e2c48b6f0d19
+Create Date: 2026-10-16 13:02:17.551903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e9a2b7f36'
+down_revision: Union[str, Sequence[str], None] = 'e2c48b6f0d19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_likes_post_id'), 'likes', ['post_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_likes_post_id'), table_name='likes')
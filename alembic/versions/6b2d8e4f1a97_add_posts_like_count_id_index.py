@@ -0,0 +1,28 @@
+"""Add posts (like_count, id) index for the most and least liked rankings
+
+Revision ID: 6b2d8e4f1a97
+Revises: 2d6e9f0b8c53
+Create Date: 2026-10-16 18:04:12.551930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b2d8e4f1a97'
+down_revision: Union[str, Sequence[str], None] = '2d6e9f0b8c53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_posts_like_count_id', 'posts', ['like_count', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_posts_like_count_id', table_name='posts')
@@ -0,0 +1,29 @@
+"""Add likes.created_at for trending windows
+
+Revision ID: 8d3b6e1f4a52
+Revises: 5c1e9a2b7f36
+Create Date: 2026-10-16 14:26:09.337145
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3b6e1f4a52'
+down_revision: Union[str, Sequence[str], None] = '5c1e9a2b7f36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing likes have no timestamp and simply never count as trending.
+    op.add_column('likes', sa.Column('created_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('likes', 'created_at')
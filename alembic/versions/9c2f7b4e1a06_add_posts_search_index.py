@@ -0,0 +1,70 @@
+"""Add a full-text search index over posts
+
+Revision ID: 9c2f7b4e1a06
+Revises: 4e8a1d6c3b75
+Create Date: 2026-10-16 19:27:05.861342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c2f7b4e1a06'
+down_revision: Union[str, Sequence[str], None] = '4e8a1d6c3b75'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match app.models.SEARCH_DDL.
+SEARCH_DDL = {
+    "sqlite": [
+        "CREATE VIRTUAL TABLE posts_fts USING fts5("
+        "title, content, content='posts', content_rowid='id', "
+        "prefix='2 3', tokenize='unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER posts_fts_insert AFTER INSERT ON posts BEGIN "
+        "INSERT INTO posts_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+        "CREATE TRIGGER posts_fts_delete AFTER DELETE ON posts BEGIN "
+        "INSERT INTO posts_fts(posts_fts, rowid, title, content) "
+        "VALUES ('delete', old.id, old.title, old.content); END",
+        "CREATE TRIGGER posts_fts_update AFTER UPDATE OF title, content ON posts BEGIN "
+        "INSERT INTO posts_fts(posts_fts, rowid, title, content) "
+        "VALUES ('delete', old.id, old.title, old.content); "
+        "INSERT INTO posts_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+        # Index the posts that already exist.
+        "INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')",
+    ],
+    "postgresql": [
+        # The generated column is computed for existing rows as it is added.
+        "ALTER TABLE posts ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(content, '')), 'B')) STORED",
+        "CREATE INDEX ix_posts_search_vector ON posts USING gin (search_vector)",
+    ],
+}
+
+DROP_SEARCH_DDL = {
+    "sqlite": [
+        "DROP TRIGGER posts_fts_update",
+        "DROP TRIGGER posts_fts_delete",
+        "DROP TRIGGER posts_fts_insert",
+        "DROP TABLE posts_fts",
+    ],
+    "postgresql": [
+        "DROP INDEX ix_posts_search_vector",
+        "ALTER TABLE posts DROP COLUMN search_vector",
+    ],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for statement in SEARCH_DDL.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for statement in DROP_SEARCH_DDL.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
@@ -0,0 +1,30 @@
+"""Add posts.updated_at for feed ETags
+
+Revision ID: a47c2e9d1b63
+Revises: 8d3b6e1f4a52
+Create Date: 2026-10-16 15:02:41.583926
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a47c2e9d1b63'
+down_revision: Union[str, Sequence[str], None] = '8d3b6e1f4a52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('posts', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    # Existing posts count as last changed when they were created.
+    op.execute("UPDATE posts SET updated_at = created_at")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('posts', 'updated_at')
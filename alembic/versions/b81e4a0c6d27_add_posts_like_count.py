@@ -0,0 +1,33 @@
+"""Add denormalized posts.like_count
+
+Revision ID: b81e4a0c6d27
+Revises: 3f9c2d7e8a41
+Create Date: 2026-10-16 10:04:52.918344
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81e4a0c6d27'
+down_revision: Union[str, Sequence[str], None] = '3f9c2d7e8a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('posts', sa.Column('like_count', sa.Integer(), server_default='0', nullable=False))
+    # Backfill the counter from the existing likes.
+    op.execute(
+        "UPDATE posts SET like_count = "
+        "(SELECT COUNT(likes.id) FROM likes WHERE likes.post_id = posts.id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('posts', 'like_count')
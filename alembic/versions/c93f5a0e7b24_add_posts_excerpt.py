@@ -0,0 +1,38 @@
+"""Add posts.excerpt for feed cards
+
+Revision ID: c93f5a0e7b24
+Revises: a47c2e9d1b63
+Create Date: 2026-10-16 15:40:17.204583
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c93f5a0e7b24'
+down_revision: Union[str, Sequence[str], None] = 'a47c2e9d1b63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match app.models.EXCERPT_LENGTH.
+EXCERPT_LENGTH = 280
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('posts', sa.Column('excerpt', sa.String(length=EXCERPT_LENGTH), nullable=True))
+    # Backfill the same way app.models.make_excerpt cuts new posts.
+    op.execute(
+        "UPDATE posts SET excerpt = CASE "
+        f"WHEN LENGTH(content) > {EXCERPT_LENGTH} "
+        f"THEN SUBSTR(content, 1, {EXCERPT_LENGTH - 1}) || '…' "
+        "ELSE content END"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('posts', 'excerpt')
@@ -0,0 +1,42 @@
+"""Add sharded like counters
+
+Revision ID: d5a7f3b91c08
+Revises: b81e4a0c6d27
+Create Date: 2026-10-16 11:37:05.220761
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a7f3b91c08'
+down_revision: Union[str, Sequence[str], None] = 'b81e4a0c6d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('posts', sa.Column('like_shards', sa.Integer(), server_default='0', nullable=False))
+    op.create_table('post_like_shards',
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('post_id', 'shard')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Fold any outstanding shard totals back into the single counter first.
+    op.execute(
+        "UPDATE posts SET like_count = like_count + COALESCE("
+        "(SELECT SUM(post_like_shards.count) FROM post_like_shards "
+        "WHERE post_like_shards.post_id = posts.id), 0)"
+    )
+    op.drop_table('post_like_shards')
+    op.drop_column('posts', 'like_shards')
@@ -0,0 +1,39 @@
+"""Add unique likes (username, post_id) index
+
+Revision ID: e2c48b6f0d19
+Revises: d5a7f3b91c08
+Create Date: 2026-10-16 12:20:44.873520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c48b6f0d19'
+down_revision: Union[str, Sequence[str], None] = 'd5a7f3b91c08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Drop duplicate likes left by the old check-then-insert race, keeping the
+    # oldest row of each (username, post_id) pair, then fix up the counters.
+    op.execute(
+        "DELETE FROM likes WHERE id NOT IN "
+        "(SELECT MIN(id) FROM likes GROUP BY username, post_id)"
+    )
+    op.execute("DELETE FROM post_like_shards")
+    op.execute(
+        "UPDATE posts SET like_shards = 0, like_count = "
+        "(SELECT COUNT(likes.id) FROM likes WHERE likes.post_id = posts.id)"
+    )
+    op.create_index('ux_likes_username_post_id', 'likes', ['username', 'post_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ux_likes_username_post_id', table_name='likes')
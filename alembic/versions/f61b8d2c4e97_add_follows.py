@@ -0,0 +1,39 @@
+"""Add follows and the per-author posts index for home timelines
+
+Revision ID: f61b8d2c4e97
+Revises: c93f5a0e7b24
+Create Date: 2026-10-16 16:21:05.719384
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f61b8d2c4e97'
+down_revision: Union[str, Sequence[str], None] = 'c93f5a0e7b24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('follows',
+    sa.Column('follower', sa.String(), nullable=False),
+    sa.Column('followee', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['followee'], ['users.username'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['follower'], ['users.username'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('follower', 'followee')
+    )
+    op.create_index(op.f('ix_follows_followee'), 'follows', ['followee'], unique=False)
+    op.create_index('ix_posts_username_created_at_id', 'posts', ['username', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_posts_username_created_at_id', table_name='posts')
+    op.drop_index(op.f('ix_follows_followee'), table_name='follows')
+    op.drop_table('follows')
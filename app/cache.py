@@ -0,0 +1,205 @@
+# app/cache.py
+"""
+Small caches: an in-process LRU with expiry, and a Redis-backed equivalent.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    A thread-safe LRU cache whose entries also expire after `ttl` seconds.
+
+    Once `maxsize` entries are stored, the least recently used entry is
+    evicted to make room for a new one.
+    """
+
+    # Every operation is a dict lookup, cheap enough to call from the event loop.
+    blocking = False
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """
+        Returns the cached value for `key`, or `default` if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Stores `value` under `key` for `ttl` seconds (the cache's TTL by
+        default), evicting the least recently used entry if full.
+        """
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def add(self, key: Hashable, value: Any) -> bool:
+        """
+        Stores `value` under `key` only if no live entry is there, and returns
+        whether it was stored.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return False
+            self._store(key, value, None)
+            return True
+
+    def compare_and_set(self, key: Hashable, expected: Any, value: Any) -> bool:
+        """
+        Stores `value` under `key` only if the live entry there is `expected`
+        (None: no live entry), and returns whether it was stored.
+        """
+        return self.compare_and_set_many({key: (expected, value)}) == 1
+
+    def compare_and_set_many(self, entries: Dict[Hashable, Tuple[Any, Any]]) -> int:
+        """
+        Applies `compare_and_set` to each `key: (expected, value)` pair, and
+        returns the number of values stored.
+        """
+        stored = 0
+        now = time.monotonic()
+        with self._lock:
+            for key, (expected, value) in entries.items():
+                entry = self._data.get(key)
+                current = entry[1] if entry is not None and entry[0] > now else None
+                if current == expected:
+                    self._store(key, value, None)
+                    stored += 1
+        return stored
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """
+        Returns the cached values for those of `keys` that are present.
+        """
+        found = {}
+        for key in keys:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                found[key] = value
+        return found
+
+    def delete(self, key: Hashable) -> None:
+        """
+        Removes `key` from the cache if present.
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Removes every entry from the cache.
+        """
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _store(self, key: Hashable, value: Any, ttl: Optional[float]) -> None:
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+# Sets KEYS[i] to ARGV[2i + 1] for ARGV[1] seconds where its value is ARGV[2i]
+# ("" for a missing key), and returns how many keys were set.
+_COMPARE_AND_SET_SCRIPT = """
+local stored = 0
+for i, key in ipairs(KEYS) do
+    if (redis.call('GET', key) or '') == ARGV[2 * i] then
+        redis.call('SET', key, ARGV[2 * i + 1], 'EX', ARGV[1])
+        stored = stored + 1
+    end
+end
+return stored
+"""
+
+
+class RedisCache:
+    """
+    The same interface as `TTLCache`, backed by a Redis server so every worker
+    shares one cache.
+
+    `client` is anything speaking the redis-py API (`get`, `mget`, `set` with
+    `ex` and `nx`, `eval`, `delete`); values must be non-empty `bytes` or
+    `str`. Keys are namespaced with `prefix`, and Redis handles expiry and
+    eviction.
+    """
+
+    # Calls go over the network, so async callers should not make them on the event loop.
+    blocking = True
+
+    def __init__(self, client, ttl: float = 60.0, prefix: str = "cache:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisCache":
+        """
+        Connects to the Redis server at `url`. Requires the `redis` package.
+        """
+        import redis
+
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        value = self.client.get(self._key(key))
+        return default if value is None else value
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        # One MGET round trip for the whole batch.
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self.client.mget([self._key(key) for key in keys])
+        return {key: value for key, value in zip(keys, values) if value is not None}
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self.client.set(self._key(key), value, ex=self._expiry(ttl))
+
+    def add(self, key: Hashable, value: Any) -> bool:
+        # SET NX, so the check and the write are one atomic command.
+        return bool(self.client.set(self._key(key), value, ex=self._expiry(None), nx=True))
+
+    def compare_and_set(self, key: Hashable, expected: Any, value: Any) -> bool:
+        return self.compare_and_set_many({key: (expected, value)}) == 1
+
+    def compare_and_set_many(self, entries: Dict[Hashable, Tuple[Any, Any]]) -> int:
+        # One script run for the whole batch; Redis runs scripts atomically.
+        if not entries:
+            return 0
+        keys, args = [], [self._expiry(None)]
+        for key, (expected, value) in entries.items():
+            keys.append(self._key(key))
+            args += [b"" if expected is None else expected, value]
+        return int(self.client.eval(_COMPARE_AND_SET_SCRIPT, len(keys), *keys, *args))
+
+    def delete(self, key: Hashable) -> None:
+        self.client.delete(self._key(key))
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self.prefix}{key}"
+
+    def _expiry(self, ttl: Optional[float]) -> int:
+        # Redis expiries are whole seconds.
+        return max(1, int(self.ttl if ttl is None else ttl))
@@ -0,0 +1,148 @@
+# app/cli.py
+"""
+Maintenance commands for the social media feed.
+
+Run from the project root, for example:
+
+    python -m app.cli reconcile-like-counts
+    python -m app.cli export-posts --gzip -o posts.ndjson.gz
+    python -m app.cli rebuild-timelines
+    python -m app.cli rescore-hot
+"""
+import argparse
+import datetime
+import sys
+
+from app.database import SessionLocal, open_read_session
+from app.services import export, hot, like_counts, timeline
+
+
+def reconcile_like_counts(args):
+    """
+    Backfills or repairs the denormalized `posts.like_count` column.
+    """
+    db = SessionLocal()
+    try:
+        fixed = like_counts.reconcile_like_counts(db)
+    finally:
+        db.close()
+    print(f"Reconciled like counts for {fixed} post(s).")
+
+
+def fold_like_shards(args):
+    """
+    Moves sharded like increments back into `posts.like_count`.
+    """
+    db = SessionLocal()
+    try:
+        folded = like_counts.fold_like_shards(db)
+    finally:
+        db.close()
+    print(f"Folded like shards for {folded} post(s).")
+
+
+def export_posts(args):
+    """
+    Writes posts as NDJSON (optionally gzipped) to a file or stdout.
+    """
+    db = open_read_session()
+    try:
+        chunks = export.export_posts(db, args.username, args.since, args.until)
+        if args.gzip:
+            chunks = export.gzip_chunks(chunks)
+        if args.output == "-":
+            out = sys.stdout.buffer
+            for chunk in chunks:
+                out.write(chunk)
+            out.flush()
+        else:
+            with open(args.output, "wb") as out:
+                for chunk in chunks:
+                    out.write(chunk)
+    finally:
+        db.close()
+
+
+def rebuild_timelines(args):
+    """
+    Rebuilds the materialized home timelines of the given users, or of every
+    user whose timeline was never built.
+    """
+    db = SessionLocal()
+    try:
+        usernames = args.username or timeline.cold_usernames(db)
+        entries = sum(timeline.rebuild_timeline(db, username) for username in usernames)
+    finally:
+        db.close()
+    print(f"Rebuilt {len(usernames)} timeline(s) with {entries} entries.")
+
+
+def rescore_hot(args):
+    """
+    Recomputes the hot scores of recent posts, or of all posts with --all.
+    """
+    db = SessionLocal()
+    try:
+        changed = hot.rescore_recent(db, None if args.all else args.hours)
+    finally:
+        db.close()
+    print(f"Rescored {changed} post(s).")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mini Social Media Feed maintenance commands.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    reconcile = subparsers.add_parser(
+        "reconcile-like-counts",
+        help="Recompute posts.like_count from the likes table.",
+    )
+    reconcile.set_defaults(func=reconcile_like_counts)
+
+    fold = subparsers.add_parser(
+        "fold-like-shards",
+        help="Fold sharded like counters back into posts.like_count.",
+    )
+    fold.set_defaults(func=fold_like_shards)
+
+    export_parser = subparsers.add_parser(
+        "export-posts",
+        help="Stream posts as NDJSON to a file or stdout.",
+    )
+    export_parser.add_argument("--username", help="Only export this user's posts.")
+    export_parser.add_argument(
+        "--since", type=datetime.datetime.fromisoformat, help="Only posts created at or after this ISO time."
+    )
+    export_parser.add_argument(
+        "--until", type=datetime.datetime.fromisoformat, help="Only posts created before this ISO time."
+    )
+    export_parser.add_argument("--gzip", action="store_true", help="Gzip the output.")
+    export_parser.add_argument("--output", "-o", default="-", help="Output file (default: stdout).")
+    export_parser.set_defaults(func=export_posts)
+
+    rebuild = subparsers.add_parser(
+        "rebuild-timelines",
+        help="Rebuild materialized home timelines (by default, those never built).",
+    )
+    rebuild.add_argument(
+        "--username", action="append", help="Rebuild this user's timeline; may be repeated."
+    )
+    rebuild.set_defaults(func=rebuild_timelines)
+
+    rescore = subparsers.add_parser(
+        "rescore-hot",
+        help="Recompute posts.hot_score for recent posts.",
+    )
+    rescore.add_argument(
+        "--hours", type=float, default=hot.HOT_RESCORE_WINDOW_HOURS,
+        help="Rescore posts created within this many hours (default: HOT_RESCORE_WINDOW_HOURS).",
+    )
+    rescore.add_argument("--all", action="store_true", help="Rescore every post, e.g. after upgrading.")
+    rescore.set_defaults(func=rescore_hot)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
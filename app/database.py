@@ -1,11 +1,19 @@
 # app/database.py
 # app/database.py
 
+import functools
+import itertools
 import os
+import time
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from .cache import TTLCache
 
 # Load environment variables from the .env file
 load_dotenv()
@@ -18,22 +26,304 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is not set.")
 
-# Create the SQLAlchemy engine. Ensure you are not passing connect_args here.
-# The `connect_args` parameter is used for SQLite, not PostgreSQL.
-engine = create_engine(DATABASE_URL)
+# Connection pool settings, so pools can be sized per worker. They apply to
+# every pooled engine; SQLite in-memory databases use a single shared
+# connection and ignore them.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# SQLite settings applied to every new connection. WAL lets readers proceed
+# while a writer is active, and synchronous=NORMAL is safe in WAL mode.
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+
+# A utility function to build the create_engine() options for a database URL.
+def engine_options(url):
+    url = make_url(url)
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if url.get_backend_name() == "sqlite":
+        # Sessions move between threadpool threads between requests.
+        options["connect_args"] = {"check_same_thread": False}
+        if url.database in (None, "", ":memory:"):
+            # Each connection would otherwise open its own empty database.
+            options["poolclass"] = StaticPool
+            return options
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    return options
+
+
+# A utility function to apply the SQLite pragmas to each new connection of an engine.
+def configure_sqlite(sync_engine):
+    if sync_engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.close()
+
+
+# Create the SQLAlchemy engine.
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+configure_sqlite(engine)
 
 # Create a SessionLocal class to handle database sessions.
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Set DB_ASYNC=true to serve requests through an asyncio engine (asyncpg for
+# PostgreSQL, aiosqlite for SQLite) instead of blocking sessions on FastAPI's
+# threadpool. The sync engine above is still used by startup hooks and the CLI.
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+
+# Async drivers to use for each database when DB_ASYNC is enabled.
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+# A utility function to turn a sync database URL into its asyncio equivalent.
+def async_database_url(url):
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend} databases.")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(async_database_url(DATABASE_URL), **engine_options(DATABASE_URL))
+    configure_sqlite(async_engine.sync_engine)
+    # Objects stay usable after commit, since lazy refreshes aren't possible
+    # once a handler's session work has finished.
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+else:
+    AsyncSession = None
+    async_engine = None
+    AsyncSessionLocal = None
+
+# Comma-separated read replica URLs. GET endpoints read from these in turn
+# through `get_read_db`; with none configured they read from the primary.
+REPLICA_DATABASE_URLS = [url.strip() for url in os.getenv("REPLICA_DATABASE_URLS", "").split(",") if url.strip()]
+# For this many seconds after a user's last write, their reads go to the
+# primary and skip shared results, so they see their own changes.
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+replica_engines = []
+ReplicaSessionLocals = []
+async_replica_engines = []
+AsyncReplicaSessionLocals = []
+for replica_url in REPLICA_DATABASE_URLS:
+    replica_engine = create_engine(replica_url, **engine_options(replica_url))
+    configure_sqlite(replica_engine)
+    replica_engines.append(replica_engine)
+    ReplicaSessionLocals.append(sessionmaker(autocommit=False, autoflush=False, bind=replica_engine))
+    if DB_ASYNC:
+        async_replica_engine = create_async_engine(async_database_url(replica_url), **engine_options(replica_url))
+        configure_sqlite(async_replica_engine.sync_engine)
+        async_replica_engines.append(async_replica_engine)
+        AsyncReplicaSessionLocals.append(
+            async_sessionmaker(async_replica_engine, autoflush=False, expire_on_commit=False)
+        )
+
+_replica_turn = itertools.count()
+# Usernames that wrote recently; entries expire after READ_YOUR_WRITES_SECONDS.
+# They are kept per worker, so with several workers a user's next read may
+# land on a worker that hasn't seen their write and go to a replica.
+_recent_writers = TTLCache(maxsize=100_000, ttl=READ_YOUR_WRITES_SECONDS)
+# When anyone last wrote, so reads skip the lookup while nobody has.
+_last_write_at = float("-inf")
+
+
+# A utility function to pin a user's reads to fresh data after they write.
+def mark_recent_write(username):
+    global _last_write_at
+    if username and READ_YOUR_WRITES_SECONDS > 0:
+        _recent_writers.set(username, True)
+        _last_write_at = time.monotonic()
+
 # This is the base class for your models.
 Base = declarative_base()
 
+# A utility function to report live connection pool statistics for an engine.
+def pool_stats(sync_engine):
+    pool = sync_engine.pool
+    stats = {"pool": type(pool).__name__, "status": pool.status()}
+    # Only queue pools track these counters.
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        value = getattr(pool, name, None)
+        if callable(value):
+            stats[name] = value()
+    return stats
+
+# A utility function to get the dialect-specific INSERT construct for the session's
+# database, which supports ON CONFLICT clauses on both PostgreSQL and SQLite.
+def dialect_insert(db, table):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"ON CONFLICT inserts are not supported on {dialect}")
+    return insert(table)
+
 # A utility function to get a database session and close it automatically.
-def get_db():
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
-def posts_db():
-    pass
+
+# The async equivalent, used when DB_ASYNC is enabled.
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# The session dependency used by the routers, selected by DB_ASYNC.
+get_db = get_async_db if DB_ASYNC else get_sync_db
+
+
+# A utility function to pick the next replica's session factory in round-robin
+# order, or the primary's when there are no replicas.
+def _next_sessionmaker(primary, replicas):
+    if not replicas:
+        return primary
+    return replicas[next(_replica_turn) % len(replicas)]
+
+# A utility function to check whether the user making a request wrote recently.
+# The request's token is only decoded if someone wrote in the last
+# READ_YOUR_WRITES_SECONDS, and then shared with the auth dependencies.
+def _wrote_recently(request):
+    if time.monotonic() - _last_write_at > READ_YOUR_WRITES_SECONDS:
+        return False
+    from .security import request_username
+
+    username = request_username(request)
+    return bool(username) and _recent_writers.get(username) is not None
+
+# A utility function to open a read-only session outside of a request, e.g.
+# for work that must outlive the request's own session. Close it when done.
+def open_read_session():
+    return _next_sessionmaker(SessionLocal, ReplicaSessionLocals)()
+
+# A utility function to get a read-only database session for GET endpoints.
+# Users who wrote recently read from the primary, and their sessions are
+# flagged so coalesced reads don't hand them results shared with others.
+def get_sync_read_db(request: Request):
+    read_your_writes = _wrote_recently(request)
+    factory = SessionLocal if read_your_writes else _next_sessionmaker(SessionLocal, ReplicaSessionLocals)
+    db = factory()
+    db.info["read_your_writes"] = read_your_writes
+    try:
+        yield db
+    finally:
+        db.close()
+
+# The async equivalent, used when DB_ASYNC is enabled.
+async def get_async_read_db(request: Request):
+    read_your_writes = _wrote_recently(request)
+    if read_your_writes:
+        factory = AsyncSessionLocal
+    else:
+        factory = _next_sessionmaker(AsyncSessionLocal, AsyncReplicaSessionLocals)
+    async with factory() as db:
+        db.info["read_your_writes"] = read_your_writes
+        yield db
+
+# The read session dependency used by the GET endpoints, selected by DB_ASYNC.
+get_read_db = get_async_read_db if DB_ASYNC else get_sync_read_db
+
+
+# A utility function to run blocking ORM code against a session from `get_db`.
+# With an AsyncSession the code runs via `run_sync`, so its database I/O is
+# awaited on the event loop, and any work it hands to `after_db` then runs on
+# the threadpool; with a regular Session it all runs on the threadpool.
+async def run_db(db, fn, *args, **kwargs):
+    if DB_ASYNC and isinstance(db, AsyncSession):
+        deferred = db.info.setdefault("deferred", [])
+        try:
+            return await db.run_sync(fn, *args, **kwargs)
+        finally:
+            if deferred:
+                calls = deferred[:]
+                deferred.clear()
+                await run_in_threadpool(_run_calls, calls)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
+# A utility function for code run through `run_db` to make a blocking call
+# that isn't database I/O, e.g. to a network cache. In DB_ASYNC mode that code
+# runs on the event loop, so the call waits until the session work returns and
+# then runs on the threadpool; everywhere else it runs right away.
+def after_db(db, fn, *args):
+    deferred = db.info.get("deferred")
+    if deferred is None:
+        fn(*args)
+    else:
+        deferred.append((fn, args))
+
+
+def _run_calls(calls):
+    for fn, args in calls:
+        fn(*args)
+
+
+# A utility function to run blocking ORM code in a read session of its own,
+# for work that may outlive the request that started it.
+async def run_read(fn, *args, **kwargs):
+    if DB_ASYNC:
+        async with _next_sessionmaker(AsyncSessionLocal, AsyncReplicaSessionLocals)() as db:
+            return await db.run_sync(fn, *args, **kwargs)
+
+    def read():
+        with open_read_session() as db:
+            return fn(db, *args, **kwargs)
+    return await run_in_threadpool(read)
+
+
+# A utility function to run blocking ORM code in a session of its own on the
+# primary, for reads that must not see a lagging replica, e.g. to fill a cache
+# that invalidations have just cleared.
+async def run_primary(fn, *args, **kwargs):
+    if DB_ASYNC:
+        async with AsyncSessionLocal() as db:
+            return await db.run_sync(fn, *args, **kwargs)
+
+    def read():
+        with SessionLocal() as db:
+            return fn(db, *args, **kwargs)
+    return await run_in_threadpool(read)
+
+
+# A utility function to run a read through a SingleFlight, so concurrent
+# requests for the same key share one query. `fn` gets a session of its own
+# and must return plain data, not ORM objects. Requests pinned to the primary
+# for read-your-writes run the query themselves on their own session `db`.
+async def coalesced_read(flight, key, db, fn, *args):
+    if db.info.get("read_your_writes"):
+        return await run_db(db, fn, *args)
+    return await flight.do(key, lambda: run_read(fn, *args))
+
+
+# A decorator that turns a handler written against a blocking Session into an
+# `async def` endpoint. The handler must take its session as the `db` argument;
+# it is called through `run_db`, so the same code serves both modes.
+def async_endpoint(func):
+    @functools.wraps(func)
+    async def endpoint(*args, db, **kwargs):
+        return await run_db(db, lambda session: func(*args, db=session, **kwargs))
+    return endpoint
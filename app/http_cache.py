@@ -0,0 +1,58 @@
+# app/http_cache.py
+"""
+Helpers for conditional GET responses.
+
+Endpoints that clients poll compute a cheap version of what they would return
+(e.g. a digest of the id, `updated_at` and like count of every row of a page,
+read with one narrow query) and turn it into an ETag. When the client's
+`If-None-Match` header already names that ETag, they answer
+`304 Not Modified` without loading or serializing any rows.
+"""
+import hashlib
+import os
+from typing import Optional
+
+from fastapi import Response, status
+
+# How long clients may reuse a response before revalidating it, in seconds.
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "0"))
+
+
+def make_etag(*parts) -> str:
+    """
+    Builds a weak ETag from the values that identify a response's version.
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Checks an `If-None-Match` header against an ETag, using weak comparison.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def cache_headers(etag: str, private: bool = False) -> dict:
+    """
+    Returns the ETag and Cache-Control headers for a response. Responses
+    personalized for a signed-in viewer are marked private.
+    """
+    scope = "private" if private else "public"
+    return {
+        "ETag": etag,
+        "Cache-Control": f"{scope}, max-age={HTTP_CACHE_MAX_AGE}, must-revalidate",
+        "Vary": "Authorization",
+    }
+
+
+def not_modified(headers: dict) -> Response:
+    """
+    Returns an empty `304 Not Modified` response carrying the given headers.
+    """
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
@@ -1,14 +1,19 @@
 # app/main.py
 
+import asyncio
+
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 
 # Import routers and models
 from app import models
-from app.router import user, posts, likes
+from app.router import user, posts, likes, follows, timeline, tags
 
 # Import database session
-from app.database import engine
+from app import database
+from app.database import SessionLocal, engine
+from app.services import hot, leaderboard, like_counts, trending
+from app.services.post_cache import post_cache
 
 # Create the database tables
 models.Base.metadata.create_all(bind=engine)
@@ -24,6 +29,56 @@ app = FastAPI(
 app.include_router(user.router)
 app.include_router(posts.router)
 app.include_router(likes.router)
+app.include_router(follows.router)
+app.include_router(timeline.router)
+app.include_router(tags.router)
+
+# Remember who has just written, so GET endpoints can give them fresh data
+# from the primary instead of a lagging replica or a shared, briefly cached
+# result. The username is the one the auth dependency already decoded.
+async def track_recent_writes(request: Request, call_next):
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        database.mark_recent_write(getattr(request.state, "username", None))
+    return response
+
+if database.READ_YOUR_WRITES_SECONDS > 0:
+    app.middleware("http")(track_recent_writes)
+
+# Load the in-memory leaderboards and trending tags from the database when
+# the worker starts
+@app.on_event("startup")
+def load_leaderboards():
+    db = SessionLocal()
+    try:
+        leaderboard.rebuild(db)
+        trending.rebuild(db)
+    finally:
+        db.close()
+
+# Keep the hot scores of recent posts current in the background
+@app.on_event("startup")
+async def start_hot_rescoring():
+    if hot.HOT_RESCORE_INTERVAL > 0:
+        app.state.hot_rescoring = asyncio.create_task(hot.rescore_periodically())
+
+@app.on_event("shutdown")
+async def stop_hot_rescoring():
+    task = getattr(app.state, "hot_rescoring", None)
+    if task is not None:
+        task.cancel()
+
+# Fold sharded like increments back into the posts' like counts in the background
+@app.on_event("startup")
+async def start_like_shard_folding():
+    if like_counts.LIKE_SHARD_FOLD_INTERVAL > 0:
+        app.state.like_shard_folding = asyncio.create_task(like_counts.fold_periodically())
+
+@app.on_event("shutdown")
+async def stop_like_shard_folding():
+    task = getattr(app.state, "like_shard_folding", None)
+    if task is not None:
+        task.cancel()
 
 # A simple "health check" endpoint
 @app.get("/")
@@ -32,4 +87,26 @@ def read_root():
     Root endpoint for the social media feed.
     """
     return {"message": "Welcome to the mini social media feed API!"}
-   
+
+# Live connection pool statistics, for sizing pools per worker
+@app.get("/health/db")
+def read_db_pool_stats():
+    """
+    Reports the state of each database connection pool in this worker.
+    """
+    pools = {"primary": database.pool_stats(engine)}
+    if database.async_engine is not None:
+        pools["primary_async"] = database.pool_stats(database.async_engine.sync_engine)
+    for index, replica_engine in enumerate(database.replica_engines):
+        pools[f"replica_{index}"] = database.pool_stats(replica_engine)
+    for index, replica_engine in enumerate(database.async_replica_engines):
+        pools[f"replica_{index}_async"] = database.pool_stats(replica_engine.sync_engine)
+    return {"pools": pools}
+
+# Hit and miss counters for the post cache
+@app.get("/health/cache")
+def read_cache_stats():
+    """
+    Reports how often this worker served single posts from the post cache.
+    """
+    return {"posts": post_cache.stats()}
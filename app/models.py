@@ -1,10 +1,52 @@
 # app/models.py
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
-from sqlalchemy.orm import relationship
+import math
+import os
+
+from sqlalchemy import DDL, Column, Integer, Float, String, Text, DateTime, ForeignKey, Boolean, Index, event
+from sqlalchemy.orm import relationship, validates
 from datetime import datetime, timezone
 
 from app.database import Base
 
+# Length of the excerpt stored with each post for feed cards.
+EXCERPT_LENGTH = 280
+# Longest hashtag indexed from a post's content, without the '#'.
+TAG_MAX_LENGTH = 100
+
+
+def make_excerpt(content):
+    """
+    Returns the start of a post's content for feed cards, cut to EXCERPT_LENGTH
+    characters with an ellipsis when it is longer.
+    """
+    if content is None or len(content) <= EXCERPT_LENGTH:
+        return content
+    return content[:EXCERPT_LENGTH - 1] + "\u2026"
+
+
+# Seconds of recency worth a tenfold increase in likes in the hot ranking.
+HOT_DECAY_SECONDS = float(os.getenv("HOT_DECAY_SECONDS", "45000"))
+HOT_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def hot_score(like_count, created_at):
+    """
+    Returns a post's score in the hot ranking: log10 of its likes plus its
+    age bonus, Reddit-style. The bonus grows with creation time rather than
+    shrinking with age, so a score only changes when the post's likes do,
+    yet newer posts still need fewer likes to rank as high.
+    """
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    age_bonus = (created_at - HOT_EPOCH).total_seconds() / HOT_DECAY_SECONDS
+    return math.log10(max(like_count or 0, 1)) + age_bonus
+
+
+def _initial_hot_score(context):
+    # Column default for new posts: no likes yet, created now unless given.
+    created_at = context.get_current_parameters().get("created_at") or datetime.now(timezone.utc)
+    return hot_score(0, created_at)
+
 class User(Base):
     __tablename__ = "users"
 
@@ -14,6 +56,17 @@ class User(Base):
     password_hash = Column(String)
     joined_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     email = Column(String, unique=True, index=True)
+    # Denormalized count of rows in `follows` naming this user as followee,
+    # kept in step by the follow/unfollow handlers. Decides whether the
+    # user's posts are fanned out to followers' timelines.
+    follower_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # When the user last reached the celebrity threshold; their posts since
+    # then were not fanned out and are delivered if they drop below it.
+    celebrity_since = Column(DateTime, nullable=True)
+    # When the user's materialized timeline was last built. New users start
+    # built, as their timelines fill as they follow and post; NULL marks a
+    # timeline from before fan-out, which is rebuilt once on first read.
+    timeline_built_at = Column(DateTime, nullable=True, default=lambda: datetime.now(timezone.utc))
     posts = relationship("Post", back_populates="author")
 
 
@@ -23,22 +76,144 @@ class Post(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
     content = Column(Text, nullable=False)
+    # Precomputed from `content` so feed listings never load the full text.
+    excerpt = Column(String(EXCERPT_LENGTH), nullable=True)
     image_path = Column(String, nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    # Set when the post is created and whenever its author edits it; likes
+    # don't touch it. Part of the ETags of the feed endpoints.
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     username = Column(String, ForeignKey("users.username"))
     published = Column(Boolean, default=True)
+    # Denormalized count of rows in `likes` for this post, kept in step by the
+    # like/unlike handlers so feeds never have to count likes per post.
+    like_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Number of counter slots in `post_like_shards` for a hot post (0 = none).
+    like_shards = Column(Integer, nullable=False, default=0, server_default="0")
+    # Position in the hot ranking, see `hot_score`. Updated on each like and
+    # recomputed for recent posts by `python -m app.cli rescore-hot`.
+    hot_score = Column(Float, nullable=False, default=_initial_hot_score, server_default="0")
 
     author = relationship("User", back_populates="posts")
     likes = relationship("Like", back_populates="post")
 
+    @validates("content")
+    def _update_excerpt(self, key, content):
+        # Keeps the excerpt in step whenever the content is set or edited.
+        self.excerpt = make_excerpt(content)
+        return content
+
+    # Composite indexes backing the keyset pagination of the feed, of each
+    # author's posts (read per followed author by timelines) and of the hot
+    # feed, and the most/least liked rankings.
+    __table_args__ = (
+        Index("ix_posts_created_at_id", "created_at", "id"),
+        Index("ix_posts_username_created_at_id", "username", "created_at", "id"),
+        Index("ix_posts_hot_score_id", "hot_score", "id"),
+        Index("ix_posts_like_count_id", "like_count", "id"),
+    )
+
+
+# Full-text index over post titles and content, kept in sync by the database
+# itself so every write path (single, bulk, edits, deletes) is covered. On
+# SQLite it is an external-content FTS5 table (the text is only stored once, in
+# `posts`) maintained by triggers, with prefix indexes for two- and
+# three-letter prefixes. On PostgreSQL it is a generated, weighted tsvector
+# column with a GIN index. Queried by app/services/search.py.
+SEARCH_DDL = {
+    "sqlite": [
+        "CREATE VIRTUAL TABLE posts_fts USING fts5("
+        "title, content, content='posts', content_rowid='id', "
+        "prefix='2 3', tokenize='unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER posts_fts_insert AFTER INSERT ON posts BEGIN "
+        "INSERT INTO posts_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+        "CREATE TRIGGER posts_fts_delete AFTER DELETE ON posts BEGIN "
+        "INSERT INTO posts_fts(posts_fts, rowid, title, content) "
+        "VALUES ('delete', old.id, old.title, old.content); END",
+        # Only edits of the text touch the index, not like or score updates.
+        "CREATE TRIGGER posts_fts_update AFTER UPDATE OF title, content ON posts BEGIN "
+        "INSERT INTO posts_fts(posts_fts, rowid, title, content) "
+        "VALUES ('delete', old.id, old.title, old.content); "
+        "INSERT INTO posts_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+    ],
+    "postgresql": [
+        "ALTER TABLE posts ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(content, '')), 'B')) STORED",
+        "CREATE INDEX ix_posts_search_vector ON posts USING gin (search_vector)",
+    ],
+}
+for _dialect, _statements in SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(Post.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
+
 
 class Like(Base):
     __tablename__ = "likes"
 
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, ForeignKey("users.username"))
-    post_id = Column(Integer, ForeignKey("posts.id"))
+    post_id = Column(Integer, ForeignKey("posts.id"), index=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
     post = relationship("Post", back_populates="likes")
     user = relationship("User")
+
+    # A user can like a post only once; the like handler relies on this index
+    # for its single-statement INSERT ... ON CONFLICT DO NOTHING.
+    __table_args__ = (
+        Index("ux_likes_username_post_id", "username", "post_id", unique=True),
+    )
+
+
+class PostLikeShard(Base):
+    __tablename__ = "post_like_shards"
+
+    # A viral post spreads its like increments over several counter rows so
+    # concurrent likes don't all queue on the lock for the single posts row.
+    # The post's total is `posts.like_count` plus the sum of its shards.
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0, server_default="0")
+class Follow(Base):
+    __tablename__ = "follows"
+
+    # One row per "follower follows followee". The primary key answers "who
+    # does this user follow?" for home timelines; the followee index answers
+    # "who follows this user?".
+    follower = Column(String, ForeignKey("users.username", ondelete="CASCADE"), primary_key=True)
+    followee = Column(String, ForeignKey("users.username", ondelete="CASCADE"), primary_key=True, index=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class TimelineEntry(Base):
+    __tablename__ = "timeline_entries"
+
+    # Materialized home timelines: one row per post delivered to a user's
+    # timeline when it was created. `created_at` copies the post's, so entries
+    # page with the same (created_at, id) cursor as the other listings.
+    username = Column(String, ForeignKey("users.username", ondelete="CASCADE"), primary_key=True)
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True, index=True)
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_timeline_entries_username_created_at_post_id", "username", "created_at", "post_id"),
+    )
+
+
+class PostTag(Base):
+    __tablename__ = "post_tags"
+
+    # Hashtags parsed from each post's content, one row per post and tag.
+    # `created_at` copies the post's, so a tag's posts page newest first from
+    # one index.
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    tag = Column(String(TAG_MAX_LENGTH), primary_key=True)
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_post_tags_tag_created_at_post_id", "tag", "created_at", "post_id"),
+    )
+
+
 # Note: In a real application, ensure to handle password hashing and security properly.
@@ -0,0 +1,97 @@
+# app/pagination.py
+"""
+Helpers for keyset (cursor) pagination.
+
+A cursor is an opaque, URL-safe token that encodes the sort key of the last
+row a client has seen. The next page is fetched with a `WHERE key < cursor`
+condition, so every page is an index range scan no matter how deep the
+client has paged. Search results, ranked by a score that changes with the
+corpus, are the exception and are paged by offset (see `encode_search_cursor`).
+"""
+import base64
+import datetime
+import json
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+# Page size limits for the paginated endpoints.
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(created_at: datetime.datetime, post_id: int) -> str:
+    """
+    Encodes a `(created_at, id)` sort key into an opaque cursor.
+    """
+    raw = json.dumps([created_at.isoformat(), post_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime, int]:
+    """
+    Decodes a cursor produced by `encode_cursor` back into its sort key.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, post_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.datetime.fromisoformat(created_at), int(post_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def encode_score_cursor(score: float, post_id: int) -> str:
+    """
+    Encodes a `(score, id)` sort key, for rankings by score, into an opaque cursor.
+    """
+    raw = json.dumps([score, post_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_score_cursor(cursor: str) -> tuple[float, int]:
+    """
+    Decodes a cursor produced by `encode_score_cursor` back into its sort key.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, post_id = json.loads(base64.urlsafe_b64decode(padded))
+        return float(score), int(post_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def encode_search_cursor(offset: int, oldest: Optional[int], newest: Optional[int]) -> str:
+    """
+    Encodes the position in a search's results and the range of post IDs it
+    ranks into an opaque cursor.
+    """
+    raw = json.dumps([offset, oldest, newest], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> tuple[int, Optional[int], Optional[int]]:
+    """
+    Decodes a cursor produced by `encode_search_cursor`.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset, oldest, newest = json.loads(base64.urlsafe_b64decode(padded))
+        offset = int(offset)
+        if offset < 0:
+            raise ValueError(offset)
+        return (
+            offset,
+            None if oldest is None else int(oldest),
+            None if newest is None else int(newest),
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
@@ -0,0 +1,88 @@
+# app/passwords.py
+"""
+Password hashing on a dedicated, bounded worker pool.
+
+bcrypt is deliberately slow, so a burst of logins or sign-ups can occupy every
+thread FastAPI uses for request handlers and stall unrelated endpoints. All
+password work runs here instead, on at most PASSWORD_HASH_WORKERS threads
+(bcrypt releases the GIL while hashing). At most PASSWORD_HASH_QUEUE_LIMIT
+operations may wait for a worker; beyond that callers get a 503 straight away
+instead of queueing without bound.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+# bcrypt cost factor. When it changes, existing hashes are transparently
+# rehashed at the new cost the next time their owner logs in.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", str(PASSWORD_HASH_WORKERS * 4)))
+
+# Pinning min/max rounds to the configured cost makes passlib flag any hash
+# made at a different cost as needing an update.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+# One slot per running or queued operation.
+_slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_LIMIT)
+
+
+def _submit(func, *args):
+    # Takes a slot and starts `func` on the pool. The slot is given back when
+    # the job finishes, not when its caller stops waiting, so a cancelled
+    # request can't free a slot while its bcrypt job still runs.
+    if not _slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many password operations in progress, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        future = _executor.submit(func, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    return future
+
+
+def _run(func, *args):
+    return _submit(func, *args).result()
+
+
+async def _run_async(func, *args):
+    # Awaits the worker without holding a thread, for `async def` handlers.
+    return await asyncio.wrap_future(_submit(func, *args))
+
+
+# A utility function to hash a password.
+def get_password_hash(password: str) -> str:
+    return _run(pwd_context.hash, password)
+
+
+# A utility function to verify a password.
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return _run(pwd_context.verify, plain_password, hashed_password)
+
+
+# Awaitable versions of the helpers above.
+async def get_password_hash_async(password: str) -> str:
+    return await _run_async(pwd_context.hash, password)
+
+
+# Verifies a password and, if its hash was made with an outdated cost,
+# returns a new hash to store in its place.
+async def verify_and_update_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return await _run_async(pwd_context.verify_and_update, plain_password, hashed_password)
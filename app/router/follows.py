@@ -0,0 +1,116 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from .. import models
+from ..database import async_endpoint, dialect_insert, get_db, get_read_db
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from ..schemas.follows import FollowList
+from ..security import get_current_user
+from ..services import timeline
+
+router = APIRouter(prefix="/follows", tags=["follows"])
+
+
+@router.post("/{username}", status_code=status.HTTP_201_CREATED)
+@async_endpoint
+def follow_user(
+    username: str,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Makes the authenticated user follow 'username'.
+    """
+    if username == current_user.username:
+        raise HTTPException(status_code=400, detail="You cannot follow yourself")
+    if not db.query(models.User.id).filter(models.User.username == username).first():
+        raise HTTPException(status_code=404, detail="User not found")
+
+    followed = db.execute(
+        dialect_insert(db, models.Follow)
+        .values(follower=current_user.username, followee=username)
+        .on_conflict_do_nothing(index_elements=["follower", "followee"])
+        .returning(models.Follow.followee)
+    ).scalar()
+    if followed is None:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="You already follow this user")
+    follower_count = timeline.adjust_follower_count(db, username, 1)
+    if follower_count == timeline.CELEBRITY_FOLLOWER_THRESHOLD:
+        timeline.start_celebrity(db, username)
+    db.commit()
+    background_tasks.add_task(timeline.backfill_author, current_user.username, username)
+    return {"message": f"You are now following {username}"}
+
+
+@router.delete("/{username}", status_code=status.HTTP_204_NO_CONTENT)
+@async_endpoint
+def unfollow_user(
+    username: str,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Makes the authenticated user stop following 'username'.
+    """
+    unfollowed = db.execute(
+        delete(models.Follow)
+        .where(models.Follow.follower == current_user.username, models.Follow.followee == username)
+        .returning(models.Follow.followee)
+    ).scalar()
+    if unfollowed is None:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="You don't follow this user")
+    follower_count = timeline.adjust_follower_count(db, username, -1)
+    timeline.remove_author(db, current_user.username, username)
+    if follower_count == timeline.CELEBRITY_FOLLOWER_THRESHOLD - 1:
+        # Posts made while 'username' was a celebrity were never fanned out;
+        # only those are, so toggling around the threshold stays cheap.
+        since = timeline.celebrity_since(db, username)
+        background_tasks.add_task(timeline.fan_out_author, username, since)
+    db.commit()
+    return None
+
+
+@router.get("/{username}/following", response_model=FollowList)
+@async_endpoint
+def get_following(
+    username: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Lists the accounts 'username' follows, in alphabetical order.
+    """
+    usernames = db.scalars(
+        select(models.Follow.followee)
+        .where(models.Follow.follower == username)
+        .order_by(models.Follow.followee)
+        .limit(limit)
+        .offset(offset)
+    ).all()
+    return {"username": username, "usernames": usernames}
+
+
+@router.get("/{username}/followers", response_model=FollowList)
+@async_endpoint
+def get_followers(
+    username: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Lists the accounts following 'username', in alphabetical order.
+    """
+    usernames = db.scalars(
+        select(models.Follow.follower)
+        .where(models.Follow.followee == username)
+        .order_by(models.Follow.follower)
+        .limit(limit)
+        .offset(offset)
+    ).all()
+    return {"username": username, "usernames": usernames}
@@ -1,162 +1,359 @@
-from fastapi import APIRouter, HTTPException,status, Depends
-from app.database import posts_db
+from typing import Any, Literal
+from fastapi import APIRouter, Body, HTTPException,status, Depends, Query, Request
+from sqlalchemy import delete, func, literal, select, true, update
 from sqlalchemy.orm import Session
 from .. import models
-from ..database import get_db
+from ..database import after_db, async_endpoint, coalesced_read, dialect_insert, get_db, get_read_db, run_db
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from ..schemas import likes as likes_schema
+from ..schemas.bulk import BulkResult
 from ..security import get_current_user
+from ..services import bulk, hot, leaderboard, like_counts, viewer_likes
+from ..services.post_cache import post_cache
+from ..singleflight import COALESCED_READ_STALE_TTL, COALESCED_READ_TTL, SingleFlight
 
 router = APIRouter(prefix="/likes", tags=["Likes"])
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
+@async_endpoint
 def like_post(
     like: likes_schema.LikeCreate,
     db: Session = Depends(get_db),
-    current_user_username: str = Depends(get_current_user),
+    current_user: models.User = Depends(get_current_user),
 ):
-    # Check if the post exists
-    post = db.query(models.Post).filter(models.Post.id == like.post_id).first()
-    if not post:
-        raise HTTPException(status_code=404, detail="Post not found")
-
-    # Check if the user has already liked the post
-    existing_like = db.query(models.Like).filter(
-        models.Like.post_id == like.post_id,
-        models.Like.username == current_user_username,
-    ).first()
+    # Insert the like in a single statement. The SELECT only yields a row when
+    # the post exists, and the unique (username, post_id) index turns a repeated
+    # like into a no-op, so concurrent double-taps can never create duplicates.
+    new_like_id = db.execute(
+        dialect_insert(db, models.Like)
+        .from_select(
+            ["username", "post_id"],
+            select(literal(current_user.username), models.Post.id).where(models.Post.id == like.post_id),
+        )
+        .on_conflict_do_nothing(index_elements=["username", "post_id"])
+        .returning(models.Like.id)
+    ).scalar()
 
-    if existing_like:
+    if new_like_id is None:
+        db.rollback()
+        # Nothing was inserted: either the post doesn't exist or it's already liked.
+        if not db.query(models.Post.id).filter(models.Post.id == like.post_id).first():
+            raise HTTPException(status_code=404, detail="Post not found")
         raise HTTPException(status_code=409, detail="User has already liked this post")
 
-    # Create the like
-    new_like = models.Like(
-        post_id=like.post_id,
-        username=current_user_username,
-    )
-    db.add(new_like)
+    like_counts.increment_like_count(db, like.post_id, 1)
     db.commit()
+    after_db(db, post_cache.invalidate, like.post_id)
+    leaderboard.record_like(like.post_id, 1)
     return {"message": "Post liked successfully"}
 
 @router.delete("/", status_code=status.HTTP_204_NO_CONTENT)
+@async_endpoint
 def unlike_post(
     like: likes_schema.LikeCreate,
     db: Session = Depends(get_db),
-    current_user_username: str = Depends(get_current_user),
+    current_user: models.User = Depends(get_current_user),
 ):
-    # Find the like
-    like_to_delete = db.query(models.Like).filter(
-        models.Like.post_id == like.post_id,
-        models.Like.username == current_user_username,
+    # Delete the like in a single statement and learn whether it existed.
+    deleted_like = db.execute(
+        delete(models.Like)
+        .where(
+            models.Like.post_id == like.post_id,
+            models.Like.username == current_user.username,
+        )
+        .returning(models.Like.id, models.Like.created_at)
     ).first()
 
-    if not like_to_delete:
+    if deleted_like is None:
+        db.rollback()
         raise HTTPException(status_code=404, detail="Like not found")
 
-    db.delete(like_to_delete)
+    like_counts.increment_like_count(db, like.post_id, -1)
     db.commit()
+    after_db(db, post_cache.invalidate, like.post_id)
+    leaderboard.record_like(like.post_id, -1, deleted_like.created_at)
     return
 
 
-@router.get("/posts/{post_id}/likes")
-def get_post_likes(post_id: int):
-    for post in posts_db:
-        if post.post_id == post_id:
-            return {"post_id": post_id, "likes": post.likes}
+# A utility function to apply committed bulk likes to the hot scores, the post
+# cache and the leaderboards.
+def _record_bulk_likes(db: Session, report: bulk.BulkReport):
+    post_ids = list(report.liked_posts)
+    for start in range(0, len(post_ids), bulk.BULK_CHUNK_SIZE):
+        hot.rescore_posts(db, models.Post.id.in_(post_ids[start:start + bulk.BULK_CHUNK_SIZE]))
+    db.commit()
+    for post_id, likes in report.liked_posts.items():
+        after_db(db, post_cache.invalidate, post_id)
+        leaderboard.record_like(post_id, likes)
+
+@router.post("/bulk", response_model=BulkResult, status_code=status.HTTP_201_CREATED)
+@async_endpoint
+def like_posts_bulk(
+    likes: list[Any] = Body(..., max_length=bulk.BULK_MAX_ITEMS),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    # Likes many posts for the current user from a JSON array of {"post_id": ...}
+    # items. Missing posts and repeated likes are reported by index.
+    report = bulk.BulkReport()
+    items = bulk.validate_items(likes_schema.LikeCreate, enumerate(likes), report)
+    bulk.insert_likes(db, current_user.username, items, report)
+    db.commit()
+    _record_bulk_likes(db, report)
+    return report.result()
+
+@router.post("/bulk/ndjson", response_model=BulkResult, status_code=status.HTTP_201_CREATED)
+async def like_posts_ndjson(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    # The NDJSON variant, one {"post_id": ...} per line, committed in batches
+    # as the body arrives; each batch's counters and caches are updated as it commits.
+    async def record_batch(report: bulk.BulkReport):
+        await run_db(db, _record_bulk_likes, report)
 
-    raise HTTPException(status_code=404, detail="Post not found")
+    report = await bulk.ingest_ndjson(
+        request.stream(), db, likes_schema.LikeCreate, bulk.insert_likes, current_user.username, record_batch
+    )
+    return report.result(include_ids=False)
+
+
+@router.get("/posts/{post_id}/likes")
+@async_endpoint
+def get_post_likes(post_id: int, db: Session = Depends(get_read_db)):
+    likes = like_counts.get_like_count(db, post_id)
+    if likes is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    return {"post_id": post_id, "likes": likes}
+# A utility function to list a user's posts that have likes, with their counts.
+# 'user_id' is the username, which is what posts are keyed on.
+def _user_liked_posts(db: Session, user_id: str, limit: int, offset: int) -> list:
+    rows = db.execute(
+        select(models.Post.id, models.Post.like_count)
+        .where(models.Post.username == user_id, models.Post.like_count > 0)
+        .order_by(models.Post.id)
+        .limit(limit)
+        .offset(offset)
+    )
+    return [{"post_id": post_id, "likes": count} for post_id, count in rows]
 @router.get("/users/{user_id}/likes")
-def get_user_likes(user_id: str):
-    liked_posts = [post for post in posts_db if post.owner_id == int(user_id) and post.likes > 0]
-    return {"user_id": user_id, "liked_posts": liked_posts}
+@async_endpoint
+def get_user_likes(
+    user_id: str,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db),
+):
+    return {"user_id": user_id, "liked_posts": _user_liked_posts(db, user_id, limit, offset)}
 @router.get("/likes/")
-def get_all_likes():
-    all_likes = {post.post_id: post.likes for post in posts_db}
-    return {"all_likes": all_likes}
+@async_endpoint
+def get_all_likes(
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db),
+):
+    # Like counts of every post, liked or not, paged in post ID order.
+    rows = db.execute(
+        select(models.Post.id, models.Post.like_count).order_by(models.Post.id).limit(limit).offset(offset)
+    )
+    return {"all_likes": {post_id: count for post_id, count in rows}}
+# A utility function to delete the likes of the posts matching 'condition' and
+# zero their counters, then refresh the caches and leaderboards that count them.
+def _reset_likes(db: Session, condition) -> list:
+    post_ids = list(db.scalars(
+        update(models.Post)
+        .where(condition)
+        .values(like_count=0, like_shards=0)
+        .returning(models.Post.id)
+        .execution_options(synchronize_session=False)
+    ))
+    for start in range(0, len(post_ids), bulk.BULK_CHUNK_SIZE):
+        chunk = post_ids[start:start + bulk.BULK_CHUNK_SIZE]
+        db.execute(delete(models.Like).where(models.Like.post_id.in_(chunk)))
+        db.execute(delete(models.PostLikeShard).where(models.PostLikeShard.post_id.in_(chunk)))
+        hot.rescore_posts(db, models.Post.id.in_(chunk))
+    db.commit()
+    for post_id in post_ids:
+        after_db(db, post_cache.invalidate, post_id)
+    leaderboard.rebuild(db)
+    return post_ids
 @router.delete("/posts/{post_id}/likes", status_code=204)
-def reset_post_likes(post_id: int):
-    for post in posts_db:
-        if post.post_id == post_id:
-            post.likes = 0
-            return
-
-    raise HTTPException(status_code=404, detail="Post not found")
+@async_endpoint
+def reset_post_likes(post_id: int, db: Session = Depends(get_db)):
+    if not _reset_likes(db, models.Post.id == post_id):
+        raise HTTPException(status_code=404, detail="Post not found")
+    return
 @router.delete("/users/{user_id}/likes", status_code=204)
-def reset_user_likes(user_id: str):
-    user_found = False
-    for post in posts_db:
-        if post.owner_id == int(user_id):
-            post.likes = 0
-            user_found = True
-
-    if not user_found:
+@async_endpoint
+def reset_user_likes(user_id: str, db: Session = Depends(get_db)):
+    if not db.query(models.User.id).filter(models.User.username == user_id).first():
         raise HTTPException(status_code=404, detail="User not found")
+    _reset_likes(db, models.Post.username == user_id)
     return
 @router.delete("/likes/", status_code=204)
-def reset_all_likes():
-    for post in posts_db:
-        post.likes = 0
+@async_endpoint
+def reset_all_likes(db: Session = Depends(get_db)):
+    _reset_likes(db, true())
     return
+def _like_status(db: Session, post_id: int, user_id: str):
+    # 'user_id' is the username, which is what likes are keyed on.
+    is_liked = post_id in viewer_likes.get_liked_post_ids(db, user_id, [post_id])
+    if not is_liked and not db.query(models.Post.id).filter(models.Post.id == post_id).first():
+        raise HTTPException(status_code=404, detail="Post not found")
+    return {"post_id": post_id, "user_id": user_id, "is_liked": is_liked}
 @router.get("/posts/{post_id}/is_liked_by/{user_id}")
-def is_post_liked_by_user(post_id: int, user_id: str):
-    for post in posts_db:
-        if post.post_id == post_id:
-            is_liked = post.owner_id == int(user_id) and post.likes > 0
-            return {"post_id": post_id, "user_id": user_id, "is_liked": is_liked}
-
-    raise HTTPException(status_code=404, detail="Post not found")
+@async_endpoint
+def is_post_liked_by_user(post_id: int, user_id: str, db: Session = Depends(get_read_db)):
+    return _like_status(db, post_id, user_id)
 @router.get("/posts/{post_id}/like_status/{user_id}")
-def get_post_like_status(post_id: int, user_id: str):
-    for post in posts_db:
-        if post.post_id == post_id:
-            is_liked = post.owner_id == int(user_id) and post.likes > 0
-            return {"post_id": post_id, "user_id": user_id, "is_liked": is_liked}
-
-    raise HTTPException(status_code=404, detail="Post not found")
+@async_endpoint
+def get_post_like_status(post_id: int, user_id: str, db: Session = Depends(get_read_db)):
+    return _like_status(db, post_id, user_id)
+@router.get("/me/liked", response_model=likes_schema.LikedPostIds)
+@async_endpoint
+def get_my_liked_post_ids(
+    post_ids: list[int] = Query(..., max_length=viewer_likes.MAX_LOOKUP_IDS),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Returns which of the given posts the current user has liked, in one query.
+    """
+    liked = viewer_likes.get_liked_post_ids(db, current_user.username, post_ids)
+    return {"liked_post_ids": [post_id for post_id in dict.fromkeys(post_ids) if post_id in liked]}
 @router.get("/users/{user_id}/liked_posts")
-def get_liked_posts_by_user(user_id: str):
-    liked_posts = [post for post in posts_db if post.owner_id == int(user_id) and post.likes > 0]
-    return {"user_id": user_id, "liked_posts": liked_posts}
+@async_endpoint
+def get_liked_posts_by_user(
+    user_id: str,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db),
+):
+    return {"user_id": user_id, "liked_posts": _user_liked_posts(db, user_id, limit, offset)}
 @router.get("/posts/{post_id}/like_count")
-def get_post_likes_count(post_id: int):
-    for post in posts_db:
-        if post.post_id == post_id:
-            return {"post_id": post_id, "likes_count": post.likes}
+@async_endpoint
+def get_post_likes_count(post_id: int, db: Session = Depends(get_read_db)):
+    likes_count = like_counts.get_like_count(db, post_id)
+    if likes_count is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    return {"post_id": post_id, "likes_count": likes_count}
+# The analytics below are computed in the database: the rankings read the
+# denormalized posts.like_count (increments still in like shards count
+# once folded, as in the feed), the rest aggregate the likes table. Concurrent
+# requests for the same figures share one query, and results are briefly reused.
+_analytics_flight = SingleFlight(COALESCED_READ_TTL, COALESCED_READ_STALE_TTL)
 
-    raise HTTPException(status_code=404, detail="Post not found")
+def _user_total_likes(db: Session, username: str) -> int:
+    return db.execute(
+        select(func.count(models.Like.id))
+        .join(models.Post, models.Post.id == models.Like.post_id)
+        .where(models.Post.username == username)
+    ).scalar_one()
 @router.get("/users/{user_id}/total_likes")
-def get_user_total_likes(user_id: str):
-    total_likes = sum(post.likes for post in posts_db if post.owner_id == int(user_id))
+async def get_user_total_likes(user_id: str, db: Session = Depends(get_read_db)):
+    # Likes received across all posts written by the user ('user_id' is the username).
+    total_likes = await coalesced_read(_analytics_flight, ("total_likes", user_id), db, _user_total_likes, user_id)
     return {"user_id": user_id, "total_likes": total_likes}
+def _likes_summary(db: Session, limit: int, offset: int) -> dict:
+    rows = db.execute(
+        select(models.Like.post_id, func.count(models.Like.id))
+        .group_by(models.Like.post_id)
+        .order_by(models.Like.post_id)
+        .limit(limit)
+        .offset(offset)
+    )
+    return {post_id: likes for post_id, likes in rows}
 @router.get("/likes/summary")
-def get_likes_summary():
-    summary = {post.post_id: post.likes for post in posts_db}
+async def get_likes_summary(
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db),
+):
+    # Like counts per liked post, paged in post ID order.
+    summary = await coalesced_read(_analytics_flight, ("summary", limit, offset), db, _likes_summary, limit, offset)
     return {"likes_summary": summary}
+def _most_liked_posts(db: Session, limit: int, offset: int) -> list:
+    # A backward scan of the (like_count, id) index; ties rank the newer post first.
+    rows = db.execute(
+        select(models.Post.id, models.Post.like_count)
+        .where(models.Post.like_count > 0)
+        .order_by(models.Post.like_count.desc(), models.Post.id.desc())
+        .limit(limit)
+        .offset(offset)
+    )
+    return [{"post_id": post_id, "likes": count} for post_id, count in rows]
 @router.get("/posts/most_liked")
-def get_most_liked_posts():
-    if not posts_db:
-        return {"most_liked_posts": []}
-
-    max_likes = max(post.likes for post in posts_db)
-    most_liked_posts = [post for post in posts_db if post.likes == max_likes]
-
+async def get_most_liked_posts(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db),
+):
+    most_liked_posts = await coalesced_read(
+        _analytics_flight, ("most_liked", limit, offset), db, _most_liked_posts, limit, offset
+    )
     return {"most_liked_posts": most_liked_posts}
 
+def _least_liked_posts(db: Session, limit: int, offset: int) -> list:
+    # A forward scan of the (like_count, id) index, so posts nobody has liked
+    # yet come first without joining the likes table.
+    rows = db.execute(
+        select(models.Post.id, models.Post.like_count)
+        .order_by(models.Post.like_count.asc(), models.Post.id.asc())
+        .limit(limit)
+        .offset(offset)
+    )
+    return [{"post_id": post_id, "likes": count} for post_id, count in rows]
 @router.get("/posts/least_liked")
-def get_least_liked_posts():
-    if not posts_db:
-        return {"least_liked_posts": []}
-
-    min_likes = min(post.likes for post in posts_db)
-    least_liked_posts = [post for post in posts_db if post.likes == min_likes]
-
+async def get_least_liked_posts(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db),
+):
+    least_liked_posts = await coalesced_read(
+        _analytics_flight, ("least_liked", limit, offset), db, _least_liked_posts, limit, offset
+    )
     return {"least_liked_posts": least_liked_posts}
+def _average_likes(db: Session) -> float:
+    # Average likes per post, counting posts with no likes: total likes / total posts.
+    total_likes = select(func.count(models.Like.id)).scalar_subquery()
+    total_posts = select(func.count(models.Post.id)).scalar_subquery()
+    return db.execute(
+        select(func.coalesce(total_likes * 1.0 / func.nullif(total_posts, 0), 0))
+    ).scalar_one()
 @router.get("/posts/average_likes")
-def get_average_likes():
-    if not posts_db:
-        return {"average_likes": 0}
-
-    total_likes = sum(post.likes for post in posts_db)
-    average_likes = total_likes / len(posts_db)
-
+async def get_average_likes(db: Session = Depends(get_read_db)):
+    average_likes = await coalesced_read(_analytics_flight, "average_likes", db, _average_likes)
     return {"average_likes": average_likes}
+@router.get("/posts/trending")
+async def get_trending_posts(
+    window: Literal["hour", "day"] = "hour",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+):
+    # Posts ranked by likes received within the last hour or day.
+    ranked = leaderboard.trending_posts[window].top(limit)
+    return {"window": window, "trending_posts": [{"post_id": post_id, "likes": count} for post_id, count in ranked]}
+def _most_liked_users(db: Session, limit: int, offset: int) -> list:
+    # Sums posts.like_count per author; ties rank by username.
+    likes = func.sum(models.Post.like_count)
+    rows = db.execute(
+        select(models.Post.username, likes)
+        .where(models.Post.like_count > 0)
+        .group_by(models.Post.username)
+        .order_by(likes.desc(), models.Post.username)
+        .limit(limit)
+        .offset(offset)
+    )
+    return [{"username": username, "likes": count} for username, count in rows]
+@router.get("/users/most_liked")
+async def get_most_liked_users(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db),
+):
+    # Authors ranked by the total likes received across their posts.
+    most_liked_users = await coalesced_read(
+        _analytics_flight, ("most_liked_users", limit, offset), db, _most_liked_users, limit, offset
+    )
+    return {"most_liked_users": most_liked_users}
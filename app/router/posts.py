@@ -1,15 +1,41 @@
 import datetime
-from fastapi import APIRouter, Depends, HTTPException, status
+import hashlib
+from typing import Any, Optional
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select, tuple_
 from sqlalchemy.orm import Session
 from .. import models, security
-from ..database import get_db
-from ..schemas.posts import PostCreate, PostBase as PostSchema
+from ..database import after_db, async_endpoint, coalesced_read, get_db, get_read_db, open_read_session, run_db, run_primary
+from ..http_cache import cache_headers, etag_matches, make_etag, not_modified
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, decode_score_cursor, decode_search_cursor
+from ..services import bulk, export, hot, leaderboard, search, tags, timeline, trending, viewer_likes
+from ..services.feed import CARD_COLUMNS, page_of
+from ..services.post_cache import post_cache
+from ..serialization import FAST_JSON, dumps, json_response, rows_to_dicts
+from ..singleflight import COALESCED_READ_STALE_TTL, COALESCED_READ_TTL, SingleFlight
+from ..schemas.bulk import BulkResult
+from ..schemas.posts import PostBatch, PostCard, PostCreate, PostPage, SearchPage, PostOut as PostSchema
 
 router = APIRouter(prefix="/posts", tags=["posts"])
 
+# Upper bound on the number of IDs accepted by GET /posts/batch.
+MAX_BATCH_IDS = MAX_PAGE_SIZE
+
+# Concurrent cache misses for one post share a query; feed pages are also
+# briefly shared between viewers.
+_post_flight = SingleFlight()
+_feed_flight = SingleFlight(COALESCED_READ_TTL, COALESCED_READ_STALE_TTL)
+_hot_flight = SingleFlight(COALESCED_READ_TTL, COALESCED_READ_STALE_TTL)
+# ETag versions are always computed fresh, but concurrent requests share them.
+_version_flight = SingleFlight()
+
 @router.post("/", response_model=PostSchema, status_code=status.HTTP_201_CREATED)
+@async_endpoint
 def create_post(
     post: PostCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(security.get_current_user)
 ):
@@ -26,32 +52,293 @@ def create_post(
     )
 
     db.add(db_post)
+    db.flush()
+    post_tags = tags.extract_hashtags(db_post.content)
+    tags.add_post_tags(db, [(db_post.id, db_post.created_at, post_tags)])
     db.commit()
     db.refresh(db_post)
+    trending.record_post(post_tags)
+    # Followers' timelines are filled in once the response is sent.
+    background_tasks.add_task(timeline.fan_out_posts, [db_post.id])
     return db_post
 
-@router.get("/{post_id}", response_model=PostSchema)
-def get_post(post_id: int, db: Session = Depends(get_db)):
+# A utility function to count the tags of committed bulk posts as trending.
+def _record_bulk_tags(report: bulk.BulkReport):
+    for created_at, post_tags in report.tagged_posts:
+        trending.record_post(post_tags, created_at)
+
+@router.post("/bulk", response_model=BulkResult, status_code=status.HTTP_201_CREATED)
+@async_endpoint
+def create_posts_bulk(
+    background_tasks: BackgroundTasks,
+    posts: list[Any] = Body(..., max_length=bulk.BULK_MAX_ITEMS),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(security.get_current_user)
+):
     """
-    Retrieves a single post by its ID.
+    Creates many posts by the authenticated user from a JSON array.
+
+    Each item is validated on its own; invalid items are reported by index
+    while the valid ones are inserted together in one transaction.
+    """
+    report = bulk.BulkReport()
+    items = bulk.validate_items(PostCreate, enumerate(posts), report)
+    bulk.insert_posts(db, current_user.username, items, report)
+    db.commit()
+    _record_bulk_tags(report)
+    background_tasks.add_task(timeline.fan_out_posts, report.ids)
+    return report.result()
+
+# A utility function to apply one committed batch of NDJSON posts. The batch
+# is fanned out right away, so the upload never holds more than one batch.
+async def _record_ndjson_posts(report: bulk.BulkReport):
+    _record_bulk_tags(report)
+    await run_in_threadpool(timeline.fan_out_posts, report.ids)
+
+@router.post("/bulk/ndjson", response_model=BulkResult, status_code=status.HTTP_201_CREATED)
+async def create_posts_ndjson(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(security.get_current_user)
+):
+    """
+    Creates posts by the authenticated user from an NDJSON request body, one
+    post per line, for uploads too large for a JSON array.
+
+    The body is read, inserted and committed in batches of lines as it
+    arrives; if the upload fails, the batches committed before the failure
+    are kept. Errors are reported by line number, and created
+    posts are counted rather than listed.
+    """
+    report = await bulk.ingest_ndjson(
+        request.stream(), db, PostCreate, bulk.insert_posts, current_user.username, _record_ndjson_posts
+    )
+    return report.result(include_ids=False)
+
+@router.get("/export")
+async def export_posts(
+    username: Optional[str] = None,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+    gzip: bool = False,
+):
+    """
+    Streams posts as NDJSON, one post per line in ID order, optionally gzipped.
+
+    Filter by author with 'username' and by creation time with 'since'
+    (inclusive) and 'until' (exclusive). Rows are fetched and sent in batches,
+    so exports of any size use constant memory.
+    """
+    def stream():
+        # The export outlives this handler, so it reads through its own session.
+        db = open_read_session()
+        try:
+            yield from export.export_posts(db, username, since, until)
+        finally:
+            db.close()
+
+    if gzip:
+        return StreamingResponse(
+            export.gzip_chunks(stream()),
+            media_type="application/gzip",
+            headers={"Content-Disposition": 'attachment; filename="posts.ndjson.gz"'},
+        )
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="posts.ndjson"'},
+    )
+
+# A utility function to load several posts with one IN query and serialize
+# each as its cached JSON payload.
+def _load_posts_json(db: Session, post_ids: list[int]) -> dict:
+    posts = db.query(models.Post).filter(models.Post.id.in_(post_ids)).all()
+    return {
+        post.id: PostSchema.model_validate(post, from_attributes=True).model_dump_json().encode()
+        for post in posts
+    }
+
+@router.get("/batch", response_model=PostBatch)
+async def get_posts_batch(ids: list[int] = Query(..., max_length=MAX_BATCH_IDS)):
+    """
+    Retrieves several posts by ID in one request, e.g. /posts/batch?ids=3&ids=1.
+
+    Posts are returned in the order requested, served from the post cache
+    where possible and otherwise loaded together in a single query. IDs with
+    no post are listed under 'missing'.
+    """
+    post_ids = list(dict.fromkeys(ids))
+    payloads, seen = await post_cache.lookup_many_async(post_ids)
+    misses = [post_id for post_id in post_ids if post_id not in payloads]
+    if misses:
+        # Loaded from the primary, since the results are cached.
+        loaded = await run_primary(_load_posts_json, misses)
+        await post_cache.set_many_async(loaded, seen)
+        payloads.update(loaded)
+
+    # Splice the cached JSON together rather than decoding and re-encoding it.
+    items = b",".join(payloads[post_id] for post_id in post_ids if post_id in payloads)
+    missing = [post_id for post_id in post_ids if post_id not in payloads]
+    return Response(
+        content=b'{"items":[' + items + b'],"missing":' + dumps(missing) + b"}",
+        media_type="application/json",
+    )
+
+@router.get("/hot", response_model=PostPage)
+async def get_hot_posts(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    viewer: Optional[models.User] = Depends(security.get_optional_current_user)
+):
     """
+    Retrieves one page of the hot feed as feed cards: posts ranked by their
+    likes with a time decay, so recent engaging posts come first.
+
+    Pass the returned 'next_cursor' as 'cursor' to fetch the following page.
+    When called with a bearer token, each post also says whether the viewer
+    has liked it.
+    """
+    after = decode_score_cursor(cursor) if cursor else None
+    items, next_cursor = await coalesced_read(_hot_flight, (limit, after), db, hot.load_hot_page, limit, after)
+
+    if viewer:
+        liked = await run_db(db, viewer_likes.get_liked_post_ids, viewer.username, [item["id"] for item in items])
+        items = [{**item, "liked_by_me": item["id"] in liked} for item in items]
+    if FAST_JSON:
+        return json_response({"items": items, "next_cursor": next_cursor})
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/search", response_model=SearchPage)
+@async_endpoint
+def search_posts(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    viewer: Optional[models.User] = Depends(security.get_optional_current_user)
+):
+    """
+    Searches post titles and content, best matches first, as feed cards with
+    a snippet of the matching text (matched words in <b> tags).
+
+    All words in 'q' must match; end a word with '*' to match it as a prefix,
+    e.g. 'pyth*'. Pass the returned 'next_cursor' as 'cursor' to fetch the
+    following page. Posts created after the first page was fetched are not
+    included, and ordering across pages is best-effort: a post whose score
+    changes may move between pages.
+    """
+    position = decode_search_cursor(cursor) if cursor else None
+    items, next_cursor = search.search_posts(db, q, limit, position)
+
+    if viewer:
+        liked = viewer_likes.get_liked_post_ids(db, viewer.username, [item["id"] for item in items])
+        for item in items:
+            item["liked_by_me"] = item["id"] in liked
+    if FAST_JSON:
+        return json_response({"items": items, "next_cursor": next_cursor})
+    return {"items": items, "next_cursor": next_cursor}
+
+# A utility function to load a post and serialize it as its cached JSON payload.
+def _load_post_json(db: Session, post_id: int) -> Optional[bytes]:
     db_post = db.query(models.Post).filter(models.Post.id == post_id).first()
     if not db_post:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Post not found"
-        )
-    return db_post
+        return None
+    return PostSchema.model_validate(db_post, from_attributes=True).model_dump_json().encode()
+
+@router.get("/{post_id}", response_model=PostSchema)
+async def get_post(post_id: int):
+    """
+    Retrieves a single post by its ID.
 
-@router.get("/", response_model=list[PostSchema])
-def get_all_posts(db: Session = Depends(get_db)):
+    Posts are served from the post cache when possible; the cached JSON is
+    sent as-is, without touching the database or re-serializing it. On a miss,
+    concurrent requests for the same post share a single query on the
+    primary, so a lagging replica never refills the cache with an old version.
     """
-    Retrieves all posts from the database.
+    payload, seen = await post_cache.lookup_async(post_id)
+    if payload is None:
+        payload = await _post_flight.do(post_id, lambda: run_primary(_load_post_json, post_id))
+        if payload is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Post not found"
+            )
+        await post_cache.set_async(post_id, payload, seen)
+    return Response(content=payload, media_type="application/json")
+
+# A utility function to load one page of the feed, as viewer-independent
+# feed card dicts that concurrent requests can share.
+def _load_feed_page(db: Session, limit: int, after: Optional[tuple]):
+    query = select(*CARD_COLUMNS)
+    if after:
+        query = query.where(tuple_(models.Post.created_at, models.Post.id) < tuple_(*after))
+
+    # Fetch one extra row to find out whether there is a next page.
+    rows, next_cursor = page_of(db.execute(
+        query.order_by(models.Post.created_at.desc(), models.Post.id.desc())
+        .limit(limit + 1)
+    ), limit)
+    return rows_to_dicts(rows), next_cursor
+
+# A utility function to summarize the posts selected by `window` (an ordered
+# query of post id, updated_at and like_count) as a version: their count and a
+# digest of every row. An ETag then costs one narrow query instead of loading
+# and serializing posts, and a change to any single row changes it.
+def _posts_version(db: Session, window) -> tuple:
+    rows = db.execute(window).all()
+    digest = hashlib.blake2b(repr([tuple(row) for row in rows]).encode(), digest_size=16).hexdigest()
+    return len(rows), digest
+
+# A utility function to get the version of one feed page, including the extra
+# row that decides whether the page has a next cursor.
+def _feed_version(db: Session, limit: int, after: Optional[tuple]) -> tuple:
+    window = select(models.Post.id, models.Post.updated_at, models.Post.like_count)
+    if after:
+        window = window.where(tuple_(models.Post.created_at, models.Post.id) < tuple_(*after))
+    window = window.order_by(models.Post.created_at.desc(), models.Post.id.desc()).limit(limit + 1)
+    return _posts_version(db, window)
+
+@router.get("/", response_model=PostPage)
+async def get_all_posts(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
+    viewer: Optional[models.User] = Depends(security.get_optional_current_user)
+):
     """
-    posts = db.query(models.Post).all()
-    return posts
+    Retrieves one page of the feed as feed cards, newest posts first.
+
+    Pass the returned 'next_cursor' as 'cursor' to fetch the following page.
+    When called with a bearer token, each post also says whether the viewer
+    has liked it. Send the returned ETag back in 'If-None-Match' to get an
+    empty 304 response while the page hasn't changed.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    version = await coalesced_read(_version_flight, ("feed", limit, after), db, _feed_version, limit, after)
+    viewer_name = viewer.username if viewer else None
+    headers = cache_headers(make_etag(limit, after, version, viewer_name), private=viewer is not None)
+    if etag_matches(if_none_match, headers["ETag"]):
+        return not_modified(headers)
+    response.headers.update(headers)
+
+    # Keying on the version means a shared page is only reused while it is current.
+    items, next_cursor = await coalesced_read(
+        _feed_flight, (limit, after, version), db, _load_feed_page, limit, after
+    )
+
+    if viewer:
+        # One indexed IN query for the whole page instead of one per post.
+        liked = await run_db(db, viewer_likes.get_liked_post_ids, viewer.username, [item["id"] for item in items])
+        items = [{**item, "liked_by_me": item["id"] in liked} for item in items]
+    if FAST_JSON:
+        return json_response({"items": items, "next_cursor": next_cursor}, headers=headers)
+    return {"items": items, "next_cursor": next_cursor}
 
 @router.delete("/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
+@async_endpoint
 def delete_post(
     post_id: int,
     db: Session = Depends(get_db),
@@ -75,11 +362,18 @@ def delete_post(
             detail="You do not have permission to delete this post"
         )
 
+    timeline.remove_post(db, post_id)
+    removed_tags = tags.remove_post_tags(db, post_id)
+    created_at = db_post.created_at
     db.delete(db_post)
     db.commit()
+    after_db(db, post_cache.invalidate, post_id)
+    leaderboard.remove_post(post_id)
+    trending.record_post(removed_tags, created_at, -1)
     return None
 
 @router.put("/{post_id}", response_model=PostSchema)
+@async_endpoint
 def update_post(
     post_id: int,
     post: PostCreate,
@@ -108,18 +402,58 @@ def update_post(
     db_post.content = post.content
     db_post.image_path = post.image_path
     db_post.published = post.published
+    db_post.updated_at = datetime.datetime.now(datetime.timezone.utc)
+    # Re-index the hashtags; an edit counts as new uses only of tags it adds.
+    created_at = db_post.created_at
+    old_tags = tags.remove_post_tags(db, post_id)
+    new_tags = tags.extract_hashtags(post.content)
+    tags.add_post_tags(db, [(post_id, created_at, new_tags)])
     db.commit()
+    after_db(db, post_cache.invalidate, post_id)
+    trending.record_post([tag for tag in old_tags if tag not in new_tags], created_at, -1)
+    trending.record_post([tag for tag in new_tags if tag not in old_tags], created_at)
     db.refresh(db_post)
     return db_post
-@router.get("/user/{username}", response_model=list[PostSchema])
-def get_posts_by_user(username: str, db: Session = Depends(get_db)):
+# A utility function to get the version of the list of a user's posts.
+def _user_posts_version(db: Session, username: str) -> tuple:
+    window = (
+        select(models.Post.id, models.Post.updated_at, models.Post.like_count)
+        .where(models.Post.username == username)
+        .order_by(models.Post.id)
+    )
+    return _posts_version(db, window)
+
+def _user_posts(db: Session, username: str):
+    return rows_to_dicts(db.execute(
+        select(*CARD_COLUMNS)
+        .where(models.Post.username == username)
+        .order_by(models.Post.created_at.desc(), models.Post.id.desc())
+    ))
+
+@router.get("/user/{username}", response_model=list[PostCard])
+async def get_posts_by_user(
+    username: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
+):
     """
-    Retrieves all posts made by a specific user.
+    Retrieves all posts made by a specific user as feed cards, newest first.
+
+    Send the returned ETag back in 'If-None-Match' to get an empty 304
+    response while the user's posts haven't changed.
     """
-    posts = db.query(models.Post).filter(models.Post.username == username).all()
-    if not posts:
+    version = await coalesced_read(_version_flight, ("user", username), db, _user_posts_version, username)
+    if not version[0]:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No posts found for this user"
         )
+    headers = cache_headers(make_etag(username, version))
+    if etag_matches(if_none_match, headers["ETag"]):
+        return not_modified(headers)
+    response.headers.update(headers)
+    posts = await run_db(db, _user_posts, username)
+    if FAST_JSON:
+        return json_response(posts, headers=headers)
     return posts
@@ -0,0 +1,54 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from .. import models
+from ..database import async_endpoint, get_read_db
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor
+from ..schemas.posts import PostPage
+from ..schemas.tags import TrendingTags
+from ..security import get_optional_current_user
+from ..serialization import rows_to_dicts
+from ..services import tags, trending, viewer_likes
+
+router = APIRouter(prefix="/tags", tags=["tags"])
+
+
+@router.get("/trending", response_model=TrendingTags)
+async def get_trending_tags(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    """
+    Lists the hashtags used most within the trending window, most used first.
+
+    Counts are estimates from a fixed-size sketch kept by this worker: they
+    are never below the true number of uses, and rarely much above it.
+    """
+    ranked = trending.trending_tags.top(limit)
+    return {
+        "window_seconds": trending.trending_tags.window,
+        "tags": [{"tag": tag, "uses": uses} for tag, uses in ranked],
+    }
+
+
+@router.get("/{tag}", response_model=PostPage)
+@async_endpoint
+def get_tagged_posts(
+    tag: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    viewer: Optional[models.User] = Depends(get_optional_current_user),
+):
+    """
+    Retrieves one page of the posts tagged '#tag' as feed cards, newest
+    first. The tag is matched without the '#' and case-insensitively.
+
+    Pass the returned 'next_cursor' as 'cursor' to fetch the following page.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    rows, next_cursor = tags.load_tag_page(db, tag.lstrip("#"), limit, after)
+
+    items = rows_to_dicts(rows)
+    if viewer:
+        liked = viewer_likes.get_liked_post_ids(db, viewer.username, [item["id"] for item in items])
+        for item in items:
+            item["liked_by_me"] = item["id"] in liked
+    return {"items": items, "next_cursor": next_cursor}
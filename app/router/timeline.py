@@ -0,0 +1,39 @@
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, Query
+from sqlalchemy.orm import Session
+from .. import models
+from ..database import async_endpoint, get_read_db
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor
+from ..schemas.posts import PostPage
+from ..security import get_current_user
+from ..serialization import rows_to_dicts
+from ..services import timeline, viewer_likes
+
+router = APIRouter(prefix="/timeline", tags=["timeline"])
+
+
+@router.get("/", response_model=PostPage)
+@async_endpoint
+def get_home_timeline(
+    background_tasks: BackgroundTasks,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Retrieves one page of the authenticated user's home timeline: posts by
+    the accounts they follow and by themselves, newest first, as feed cards.
+
+    Pass the returned 'next_cursor' as 'cursor' to fetch the following page.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    (rows, next_cursor), cold = timeline.load_home_page(db, current_user.username, limit, after)
+    if cold:
+        background_tasks.add_task(timeline.rebuild_timeline_task, current_user.username)
+
+    items = rows_to_dicts(rows)
+    liked = viewer_likes.get_liked_post_ids(db, current_user.username, [item["id"] for item in items])
+    for item in items:
+        item["liked_by_me"] = item["id"] in liked
+    return {"items": items, "next_cursor": next_cursor}
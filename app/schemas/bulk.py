@@ -0,0 +1,18 @@
+from typing import Optional
+from pydantic import BaseModel
+
+# This is the model for one rejected item of a bulk request. 'index' is the
+# item's position in the request (its line number, from 0, for NDJSON).
+class BulkError(BaseModel):
+    index: int
+    error: str
+
+# This is the model for the outcome of a bulk request. Valid items are stored
+# even when others are rejected. 'ids' lists the new rows' IDs and is
+# omitted for NDJSON uploads; 'errors' is capped, while
+# 'error_count' counts every rejected item.
+class BulkResult(BaseModel):
+    created: int
+    ids: Optional[list[int]] = None
+    errors: list[BulkError] = []
+    error_count: int = 0
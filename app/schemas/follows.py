@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+# This is the model for a page of a user's follow graph: the accounts they
+# follow, or the accounts that follow them.
+class FollowList(BaseModel):
+    username: str
+    usernames: list[str]
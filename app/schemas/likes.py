@@ -12,3 +12,6 @@ class Like(LikeBase):
 
     class Config:
         orm_mode = True
+
+class LikedPostIds(BaseModel):
+    liked_post_ids: list[int]
@@ -4,6 +4,7 @@ from datetime import datetime
 
 # app/schemas.py
 import datetime
+from typing import Optional
 from pydantic import BaseModel
 
 # This is the base Pydantic model for a post.
@@ -17,7 +18,7 @@ class PostBase(BaseModel):
 # This is the model for a post when a user creates it.
 # It inherits from PostBase and is what FastAPI uses to validate incoming data.
 class PostCreate(PostBase):
-    pass
+    image_path: Optional[str] = None
 
 # This is the model for a post when it's sent back as a response.
 # It inherits from PostBase but also includes the 'id' and 'created_at' fields.
@@ -25,7 +26,50 @@ class PostCreate(PostBase):
 class PostOut(PostBase):
     id: int
     created_at: datetime.datetime
+    like_count: int = 0
+    # Only filled in on feed pages requested with a bearer token.
+    liked_by_me: Optional[bool] = None
 
 
     class Config:
         orm_mode = True
+
+# This is the compact model for a post in list endpoints. It carries the
+# precomputed 'excerpt' instead of the full 'content', which is fetched with
+# GET /posts/{post_id} when the post is opened.
+class PostCard(BaseModel):
+    id: int
+    username: Optional[str] = None
+    title: str
+    excerpt: Optional[str] = None
+    image_path: Optional[str] = None
+    created_at: datetime.datetime
+    like_count: int = 0
+    # Only filled in on feed pages requested with a bearer token.
+    liked_by_me: Optional[bool] = None
+
+    class Config:
+        orm_mode = True
+
+# This is the model for one page of the paginated feed.
+# 'next_cursor' is passed back as the 'cursor' query parameter to fetch the
+# next page, and is None once the client has reached the end of the feed.
+class PostPage(BaseModel):
+    items: list[PostCard]
+    next_cursor: Optional[str] = None
+
+# This is the model for a batch fetch of posts by ID. 'items' follows the
+# order the IDs were requested in, and 'missing' lists the IDs that don't exist.
+class PostBatch(BaseModel):
+    items: list[PostOut]
+    missing: list[int] = []
+
+# This is the model for one search result: a feed card plus a snippet of the
+# matching text, with the matched words wrapped in <b> tags.
+class SearchHit(PostCard):
+    snippet: Optional[str] = None
+
+# This is the model for one page of search results, best matches first.
+class SearchPage(BaseModel):
+    items: list[SearchHit]
+    next_cursor: Optional[str] = None
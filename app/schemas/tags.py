@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+
+# This is the model for one trending hashtag with its estimated number of
+# uses within the trending window.
+class TrendingTag(BaseModel):
+    tag: str
+    uses: int
+
+# This is the model for the trending hashtags, most used first.
+class TrendingTags(BaseModel):
+    window_seconds: int
+    tags: list[TrendingTag]
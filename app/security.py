@@ -1,25 +1,117 @@
-from fastapi import Depends, HTTPException, status
+import datetime
+import os
+from typing import Optional
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
+from jose import JWTError, jwt
 from sqlalchemy.orm import Session
-from .database import get_db
+from .cache import TTLCache
+from .database import get_db, run_db
 from . import models
 
+# JWT settings
+SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key")  # Change this in a real app
+ALGORITHM = "HS256"
+ACCESS_TOKEN_EXPIRE_MINUTES = 30
+
+# Authenticated users are cached by username so verifying a token normally
+# costs no database round trip. Entries are dropped when the user is updated
+# or deleted, and expire after USER_CACHE_TTL seconds regardless.
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+_user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/login")
+# Same scheme, but yields None instead of failing when no token is sent.
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/login", auto_error=False)
+
+
+def credentials_exception():
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid authentication credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def create_access_token(data: dict, expires_delta: Optional[datetime.timedelta] = None):
+    to_encode = data.copy()
+    if expires_delta:
+        expire = datetime.datetime.now(datetime.timezone.utc) + expires_delta
+    else:
+        expire = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"exp": expire})
+    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return encoded_jwt
+
+
+def decode_access_token(token: str) -> str:
+    # Verifies the token's signature and expiry locally and returns its subject.
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise credentials_exception()
+    username = payload.get("sub")
+    if not username:
+        raise credentials_exception()
+    return username
+
+
+def token_subject(authorization: Optional[str]) -> Optional[str]:
+    # Returns the username of a valid "Bearer" Authorization header, or None.
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return decode_access_token(token)
+    except HTTPException:
+        return None
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    # This is a placeholder. In a real application, you would decode the token
-    # to get the user's information.
-    # For now, we'll just check if a user exists with the username provided.
-    db_user = db.query(models.User).filter(models.User.username == token).first()
-    if not db_user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+
+def request_username(request: Request) -> Optional[str]:
+    # Returns the username of the request's bearer token, or None, decoding
+    # the token at most once per request however many callers ask.
+    if not hasattr(request.state, "username"):
+        request.state.username = token_subject(request.headers.get("Authorization"))
+    return request.state.username
+
+
+def invalidate_cached_user(username: str):
+    # Call after changing or deleting a user so stale details aren't served.
+    _user_cache.delete(username)
+
+
+def _load_user(db: Session, username: str):
+    db_user = db.query(models.User).filter(models.User.username == username).first()
+    if db_user:
+        # Detach the user so later commits in this session don't expire the
+        # cached copy that other requests will share.
+        db.expunge(db_user)
     return db_user
 
 
+async def get_current_user(request: Request, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    # An invalid token decodes again here, to be rejected with the reason.
+    username = request_username(request) or decode_access_token(token)
+    db_user = _user_cache.get(username)
+    if db_user is None:
+        db_user = await run_db(db, _load_user, username)
+        if not db_user:
+            raise credentials_exception()
+        _user_cache.set(username, db_user)
+    return db_user
+
+
+async def get_optional_current_user(
+    request: Request, token: Optional[str] = Depends(optional_oauth2_scheme), db: Session = Depends(get_db)
+):
+    # For endpoints that work anonymously but personalize the response for a
+    # signed-in viewer. An invalid token is still rejected.
+    if not token:
+        return None
+    return await get_current_user(request, token, db)
+
+
 def get_current_active_user(current_user: models.User = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -0,0 +1,52 @@
+# app/serialization.py
+"""
+Fast JSON responses for list endpoints.
+
+By default list endpoints return data through their `response_model`, so
+FastAPI validates every item with Pydantic, converts it with
+`jsonable_encoder` and encodes the result with the stdlib json module. With
+FAST_JSON=true they instead select plain rows, turn them into dicts and
+encode them in one call with orjson (or, when orjson isn't installed, with a
+prebuilt Pydantic v2 serializer), skipping the per-item model work.
+
+The fast path does not validate its output, so it must only be fed rows
+whose columns already match the response model.
+"""
+import os
+from typing import Any, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+FAST_JSON = os.getenv("FAST_JSON", "false").lower() in ("1", "true", "yes")
+
+# Fallback encoder, built once; handles datetimes the same way as Pydantic models.
+_any_adapter = TypeAdapter(Any)
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encodes dicts, lists and scalars (including datetimes) as JSON bytes.
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return _any_adapter.dump_json(content)
+
+
+def json_response(content: Any, status_code: int = 200, headers: Optional[dict] = None) -> Response:
+    """
+    Returns `content` encoded with `dumps`, bypassing the response model.
+    """
+    return Response(content=dumps(content), status_code=status_code, headers=headers, media_type="application/json")
+
+
+def rows_to_dicts(rows) -> list:
+    """
+    Converts SQLAlchemy result rows into plain dicts keyed by column name.
+    """
+    return [dict(row._mapping) for row in rows]
@@ -0,0 +1,267 @@
+# File: app/services/bulk.py
+"""
+Service layer for bulk ingestion of posts and likes.
+
+Importers send thousands of items at once, either as a JSON array or as an
+NDJSON stream. Each item is validated on its own so one bad item is reported
+by position instead of failing the whole upload; the valid ones are written
+with one multi-row statement per chunk. A JSON array is written in the
+caller's transaction. An NDJSON stream is committed every BULK_CHUNK_SIZE
+lines, so a long upload never holds the write lock for long, and only the
+counts and reported errors are kept across batches, so memory stays bounded
+however much is sent.
+"""
+import json
+import os
+from collections import Counter
+from typing import AsyncIterator, Awaitable, Callable, Iterable, List, Tuple
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..database import dialect_insert, run_db
+from . import tags as post_tags
+
+# Most items accepted in one JSON array upload; larger loads should use NDJSON.
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "10000"))
+# Items written per INSERT statement.
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+# Most errors listed in a response; the rest are only counted.
+BULK_MAX_REPORTED_ERRORS = 1000
+# Longest NDJSON line accepted, in bytes; longer lines are skipped and reported.
+BULK_MAX_LINE_BYTES = int(os.getenv("BULK_MAX_LINE_BYTES", str(1024 * 1024)))
+
+
+class LineTooLong(ValueError):
+    """
+    Stands in for an NDJSON line longer than BULK_MAX_LINE_BYTES.
+    """
+
+
+class BulkReport:
+    """
+    Collects the outcome of a bulk upload.
+    """
+
+    def __init__(self):
+        self.created = 0
+        self.errors: List[dict] = []
+        self.error_count = 0
+        self.next_batch()
+
+    def next_batch(self) -> None:
+        """
+        Forgets the IDs, likes and tags of a committed batch once they are applied.
+        """
+        # IDs of the rows created in the current batch.
+        self.ids: List[int] = []
+        # Likes stored per post, for the counters updated after commit.
+        self.liked_posts: Counter = Counter()
+        # (created_at, tags) of the tagged posts, for trending tags after commit.
+        self.tagged_posts: List[Tuple[object, List[str]]] = []
+
+    def reject(self, index: int, error: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < BULK_MAX_REPORTED_ERRORS:
+            self.errors.append({"index": index, "error": error})
+
+    def result(self, include_ids: bool = True) -> dict:
+        return {
+            "created": self.created,
+            "ids": self.ids if include_ids else None,
+            "errors": self.errors,
+            "error_count": self.error_count,
+        }
+
+
+def validate_items(schema, items: Iterable[Tuple[int, object]], report: BulkReport) -> List[Tuple[int, BaseModel]]:
+    """
+    Validates `(index, raw item)` pairs against `schema`, recording failures in
+    `report`, and returns the valid ones as `(index, model)` pairs.
+    """
+    valid = []
+    for index, item in items:
+        if isinstance(item, ValueError):
+            report.reject(index, str(item) if isinstance(item, LineTooLong) else "Invalid JSON")
+            continue
+        try:
+            valid.append((index, schema.model_validate(item)))
+        except ValidationError as exc:
+            error = exc.errors()[0]
+            location = ".".join(str(part) for part in error["loc"])
+            report.reject(index, f"{location}: {error['msg']}" if location else error["msg"])
+    return valid
+
+
+async def iter_ndjson(
+    stream: AsyncIterator[bytes], max_line_bytes: int = BULK_MAX_LINE_BYTES
+) -> AsyncIterator[Tuple[int, object]]:
+    """
+    Yields `(line number, decoded value)` for each non-blank line of an NDJSON
+    byte stream. Lines that aren't valid JSON yield the `ValueError`, and lines
+    longer than `max_line_bytes` a `LineTooLong`, which `validate_items` reports.
+
+    The pieces of a line are only joined once it is complete, and a line is
+    no longer kept once it is too long, so memory stays bounded by
+    `max_line_bytes` however the body is sent.
+    """
+    pieces: List[bytes] = []
+    size = 0
+    index = 0
+    async for chunk in stream:
+        start = 0
+        end = chunk.find(b"\n")
+        while end >= 0:
+            size += end - start
+            if size > max_line_bytes:
+                yield index, LineTooLong(f"Line longer than {max_line_bytes} bytes")
+            else:
+                pieces.append(chunk[start:end])
+                line = b"".join(pieces)
+                if line.strip():
+                    yield index, _decode_line(line)
+            pieces, size = [], 0
+            index += 1
+            start = end + 1
+            end = chunk.find(b"\n", start)
+        size += len(chunk) - start
+        if size <= max_line_bytes:
+            pieces.append(chunk[start:])
+        else:
+            pieces = []
+    if size > max_line_bytes:
+        yield index, LineTooLong(f"Line longer than {max_line_bytes} bytes")
+    else:
+        line = b"".join(pieces)
+        if line.strip():
+            yield index, _decode_line(line)
+
+
+async def ingest_ndjson(
+    stream: AsyncIterator[bytes],
+    db,
+    schema,
+    insert_items,
+    username: str,
+    on_commit: Callable[[BulkReport], Awaitable[None]],
+) -> BulkReport:
+    """
+    Validates and inserts the items of an NDJSON upload with `insert_items`
+    (`insert_posts` or `insert_likes`), committing every BULK_CHUNK_SIZE lines.
+    After each commit `on_commit(report)` applies the batch's side effects,
+    after which its IDs, likes and tags are dropped from the report. Batches
+    committed before an upload fails stay committed. `db` is a session from
+    `get_db`.
+    """
+    report = BulkReport()
+    pending = []
+    async for item in iter_ndjson(stream):
+        pending.append(item)
+        if len(pending) == BULK_CHUNK_SIZE:
+            await _ingest_batch(db, schema, insert_items, username, pending, report, on_commit)
+            pending = []
+    await _ingest_batch(db, schema, insert_items, username, pending, report, on_commit)
+    return report
+
+
+async def _ingest_batch(db, schema, insert_items, username, items, report: BulkReport, on_commit) -> None:
+    valid = validate_items(schema, items, report)
+    if not valid:
+        return
+    await run_db(db, _insert_and_commit, insert_items, username, valid, report)
+    await on_commit(report)
+    report.next_batch()
+
+
+def _insert_and_commit(db: Session, insert_items, username: str, items, report: BulkReport) -> None:
+    insert_items(db, username, items, report)
+    db.commit()
+
+
+def _decode_line(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError as exc:
+        return exc
+
+
+def insert_posts(db: Session, username: str, items: List[Tuple[int, BaseModel]], report: BulkReport) -> None:
+    """
+    Inserts validated PostCreate items by `username` without committing.
+    """
+    for start in range(0, len(items), BULK_CHUNK_SIZE):
+        chunk = items[start:start + BULK_CHUNK_SIZE]
+        rows = [
+            {
+                "title": post.title,
+                "content": post.content,
+                "excerpt": models.make_excerpt(post.content),
+                "image_path": post.image_path,
+                "published": post.published,
+                "username": username,
+            }
+            for _, post in chunk
+        ]
+        # One executemany; RETURNING in parameter order lines the IDs up with the items.
+        created = db.execute(
+            insert(models.Post).returning(models.Post.id, models.Post.created_at, sort_by_parameter_order=True),
+            rows,
+        ).all()
+        tagged = []
+        for (_, post), (post_id, created_at) in zip(chunk, created):
+            tags = post_tags.extract_hashtags(post.content)
+            if tags:
+                tagged.append((post_id, created_at, tags))
+                report.tagged_posts.append((created_at, tags))
+        post_tags.add_post_tags(db, tagged)
+        report.ids.extend(post_id for post_id, _ in created)
+        report.created += len(created)
+
+
+def insert_likes(db: Session, username: str, items: List[Tuple[int, BaseModel]], report: BulkReport) -> None:
+    """
+    Inserts validated LikeCreate items by `username` without committing.
+    Likes of missing posts and repeated likes are rejected per item, and each
+    post's like counter is raised by the number of likes it received.
+    """
+    for start in range(0, len(items), BULK_CHUNK_SIZE):
+        chunk = items[start:start + BULK_CHUNK_SIZE]
+        post_ids = {like.post_id for _, like in chunk}
+        existing_posts = set(db.scalars(select(models.Post.id).where(models.Post.id.in_(post_ids))))
+        already_liked = set(db.scalars(
+            select(models.Like.post_id).where(models.Like.username == username, models.Like.post_id.in_(post_ids))
+        ))
+
+        rows = []
+        for index, like in chunk:
+            if like.post_id not in existing_posts:
+                report.reject(index, "Post not found")
+            elif like.post_id in already_liked:
+                report.reject(index, "User has already liked this post")
+            else:
+                already_liked.add(like.post_id)
+                rows.append({"username": username, "post_id": like.post_id})
+        if not rows:
+            continue
+
+        # ON CONFLICT guards against likes committed concurrently since the check above.
+        inserted = db.execute(
+            dialect_insert(db, models.Like)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["username", "post_id"])
+            .returning(models.Like.id, models.Like.post_id)
+        ).all()
+        report.ids.extend(like_id for like_id, _ in inserted)
+        report.created += len(inserted)
+        counts = Counter(post_id for _, post_id in inserted)
+        report.liked_posts.update(counts)
+        if counts:
+            posts = models.Post.__table__
+            db.execute(
+                update(posts)
+                .where(posts.c.id == bindparam("b_post_id"))
+                .values(like_count=posts.c.like_count + bindparam("b_likes")),
+                [{"b_post_id": post_id, "b_likes": likes} for post_id, likes in counts.items()],
+            )
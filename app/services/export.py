@@ -0,0 +1,83 @@
+# File: app/services/export.py
+"""
+Service layer for streaming exports of the posts table.
+
+Posts are read with `yield_per`, which fetches EXPORT_BATCH_SIZE rows at a
+time through a server-side cursor where the database supports one, and each
+batch is encoded as NDJSON (optionally gzipped) and handed on before the next
+is fetched. Memory use stays constant however many posts are exported.
+"""
+import datetime
+import os
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..serialization import dumps
+
+# Rows fetched from the database and encoded per chunk.
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# The exported columns, one JSON object per post.
+_EXPORT_COLUMNS = (
+    models.Post.id,
+    models.Post.username,
+    models.Post.title,
+    models.Post.content,
+    models.Post.image_path,
+    models.Post.published,
+    models.Post.like_count,
+    models.Post.created_at,
+    models.Post.updated_at,
+)
+
+
+def export_posts(
+    db: Session,
+    username: Optional[str] = None,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+) -> Iterator[bytes]:
+    """
+    Yields the matching posts in ID order as NDJSON, one chunk per batch.
+
+    Args:
+        db (Session): A session dedicated to the export; it must stay open
+            until the iterator is exhausted.
+        username (Optional[str]): Only export this user's posts.
+        since (Optional[datetime.datetime]): Only posts created at or after this time.
+        until (Optional[datetime.datetime]): Only posts created before this time.
+    """
+    query = select(*_EXPORT_COLUMNS).order_by(models.Post.id)
+    if username:
+        query = query.where(models.Post.username == username)
+    if since:
+        query = query.where(models.Post.created_at >= _as_utc(since))
+    if until:
+        query = query.where(models.Post.created_at < _as_utc(until))
+
+    result = db.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    for rows in result.partitions():
+        yield b"".join(dumps(dict(row._mapping)) + b"\n" for row in rows)
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Compresses a stream of chunks into a single gzip stream as it goes.
+    """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _as_utc(value: datetime.datetime) -> datetime.datetime:
+    # Timestamps are stored as naive UTC.
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value
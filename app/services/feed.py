@@ -0,0 +1,36 @@
+# File: app/services/feed.py
+"""
+Shared pieces of the post listings (global feed, per-author lists, home
+timelines), which all return compact feed cards newest first.
+"""
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import null
+
+from .. import models
+from ..pagination import encode_cursor
+
+# The columns a feed card is built from; the full content is never loaded.
+# They match PostCard field for field, so rows can be encoded as they are.
+CARD_COLUMNS = (
+    models.Post.id,
+    models.Post.username,
+    models.Post.title,
+    models.Post.excerpt,
+    models.Post.image_path,
+    models.Post.created_at,
+    models.Post.like_count,
+    null().label("liked_by_me"),
+)
+
+
+def page_of(rows: Sequence, limit: int) -> Tuple[List, Optional[str]]:
+    """
+    Cuts rows fetched with `limit + 1` down to one page and returns it with the
+    cursor for the next page, or None when the extra row wasn't there.
+    """
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
@@ -0,0 +1,127 @@
+# File: app/services/hot.py
+"""
+Service layer for the "hot" feed, which ranks posts by likes with a time decay.
+
+Each post stores its score in the indexed `posts.hot_score` column (see
+`models.hot_score`), so a page of the hot feed is an index range scan on
+`(hot_score, id)` instead of a score computed over every post per request.
+The like/unlike and bulk like handlers update the score together with the
+like counter. Increments that go to like shards leave it behind until the
+shards are folded (see `services.like_counts`) or `rescore_recent`
+recomputes the scores of recent posts, which the app does every
+HOT_RESCORE_INTERVAL seconds and `python -m app.cli rescore-hot` does on
+demand. Older posts hardly receive likes, so they are left alone.
+"""
+import asyncio
+import datetime
+import logging
+import os
+from typing import List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import bindparam, func, select, true, tuple_, update
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..database import SessionLocal
+from ..pagination import encode_score_cursor
+from .feed import CARD_COLUMNS
+
+# How far back the periodic job recomputes scores, in hours.
+HOT_RESCORE_WINDOW_HOURS = float(os.getenv("HOT_RESCORE_WINDOW_HOURS", "48"))
+# Seconds between runs of the periodic job in each worker; 0 disables it.
+HOT_RESCORE_INTERVAL = float(os.getenv("HOT_RESCORE_INTERVAL", "300"))
+HOT_RESCORE_BATCH_SIZE = int(os.getenv("HOT_RESCORE_BATCH_SIZE", "1000"))
+
+logger = logging.getLogger(__name__)
+
+_posts = models.Post.__table__
+
+
+def load_hot_page(db: Session, limit: int, after: Optional[tuple] = None) -> Tuple[List[dict], Optional[str]]:
+    """
+    Returns one page of the hot feed as card dicts, highest score first, and
+    the cursor for the next page.
+    """
+    query = select(*CARD_COLUMNS, models.Post.hot_score)
+    if after:
+        query = query.where(tuple_(models.Post.hot_score, models.Post.id) < tuple_(*after))
+    rows = db.execute(
+        query.order_by(models.Post.hot_score.desc(), models.Post.id.desc()).limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_score_cursor(rows[-1].hot_score, rows[-1].id)
+    items = []
+    for row in rows:
+        item = dict(row._mapping)
+        del item["hot_score"]
+        items.append(item)
+    return items, next_cursor
+
+
+def rescore_posts(db: Session, condition) -> int:
+    """
+    Recomputes the hot score of the posts matching `condition` from their
+    full like totals, including shards, without committing. Returns the
+    number of scores that changed.
+    """
+    shard_total = (
+        select(func.coalesce(func.sum(models.PostLikeShard.count), 0))
+        .where(models.PostLikeShard.post_id == models.Post.id)
+        .scalar_subquery()
+    )
+    rows = db.execute(
+        select(models.Post.id, models.Post.created_at, models.Post.like_count + shard_total, models.Post.hot_score)
+        .where(condition)
+        .execution_options(yield_per=HOT_RESCORE_BATCH_SIZE)
+    )
+    # Scores are all read before any is written, so no update runs while the
+    # streaming cursor is still open.
+    params = []
+    for batch in rows.partitions():
+        for post_id, created_at, like_count, current in batch:
+            score = models.hot_score(like_count, created_at)
+            if score != current:
+                params.append({"b_id": post_id, "b_score": score})
+
+    statement = update(_posts).where(_posts.c.id == bindparam("b_id")).values(hot_score=bindparam("b_score"))
+    for start in range(0, len(params), HOT_RESCORE_BATCH_SIZE):
+        db.execute(statement, params[start:start + HOT_RESCORE_BATCH_SIZE])
+    return len(params)
+
+
+def rescore_recent(db: Session, hours: Optional[float] = HOT_RESCORE_WINDOW_HOURS) -> int:
+    """
+    Recomputes the hot scores of posts created in the last `hours` hours (of
+    every post when None), commits, and returns the number that changed.
+    """
+    condition = true()
+    if hours is not None:
+        since = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=hours)
+        condition = models.Post.created_at >= since
+    changed = rescore_posts(db, condition)
+    db.commit()
+    return changed
+
+
+def _rescore_recent_once() -> int:
+    db = SessionLocal()
+    try:
+        return rescore_recent(db)
+    finally:
+        db.close()
+
+
+async def rescore_periodically() -> None:
+    """
+    Runs `rescore_recent` every HOT_RESCORE_INTERVAL seconds until cancelled.
+    """
+    while True:
+        await asyncio.sleep(HOT_RESCORE_INTERVAL)
+        try:
+            await run_in_threadpool(_rescore_recent_once)
+        except Exception:
+            logger.exception("Rescoring hot posts failed")
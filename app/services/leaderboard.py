@@ -0,0 +1,240 @@
+# File: app/services/leaderboard.py
+"""
+Service layer for the in-process leaderboards of the trending posts of the
+last hour/day.
+
+The like/unlike handlers feed every change into these structures, so the
+rankings are served from memory in O(K) instead of being recomputed from the
+`likes` table on each request. They are rebuilt from the database on startup,
+and only hold the posts liked within the longest window.
+
+They are a per-worker cache: with several workers each board only reflects
+the likes that worker saw since its last rebuild, so answers can differ by
+worker and drift from the database until the next restart. Rankings over all
+time, like the most-liked posts and authors, are served from
+`posts.like_count` in the database instead.
+"""
+import datetime
+import heapq
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .. import models
+
+# How many entries each leaderboard keeps ranked.
+LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", "100"))
+
+
+class Leaderboard:
+    """
+    Exact top-K ranking over counters that go up and down.
+
+    Every counter is kept in a dict and the current top K in a small side
+    table, so an update costs O(1) (O(K) when it displaces a member) and
+    reading the ranking costs O(K). Only when a member of the top K drops
+    while other keys wait outside it is the top K recomputed, with a heap
+    over all counters.
+    """
+
+    def __init__(self, size: int = LEADERBOARD_SIZE):
+        self.size = size
+        self._counts: Dict[Hashable, int] = {}
+        self._top: Dict[Hashable, int] = {}
+        self._ranked: Optional[List[Tuple[Hashable, int]]] = []
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def update(self, key: Hashable, delta: int) -> None:
+        """
+        Adds `delta` to the counter for `key`.
+        """
+        with self._lock:
+            count = self._counts.get(key, 0) + delta
+            if count > 0:
+                self._counts[key] = count
+            else:
+                self._counts.pop(key, None)
+            self._ranked = None
+
+            if self._dirty:
+                return
+            if key in self._top:
+                if count > 0:
+                    self._top[key] = count
+                else:
+                    del self._top[key]
+                if delta < 0 and len(self._counts) > len(self._top):
+                    # A key outside the top K may now outrank this one.
+                    self._dirty = True
+            elif count > 0:
+                if len(self._top) < self.size:
+                    self._top[key] = count
+                else:
+                    weakest = min(self._top, key=self._top.get)
+                    if count > self._top[weakest]:
+                        del self._top[weakest]
+                        self._top[key] = count
+
+    def remove(self, key: Hashable) -> None:
+        """
+        Drops `key` from the leaderboard entirely.
+        """
+        with self._lock:
+            self._counts.pop(key, None)
+            if key in self._top:
+                self._dirty = True
+            self._ranked = None
+
+    def load(self, counts: Dict[Hashable, int]) -> None:
+        """
+        Replaces every counter, e.g. with totals read from the database.
+        """
+        with self._lock:
+            self._counts = {key: count for key, count in counts.items() if count > 0}
+            self._dirty = True
+            self._ranked = None
+
+    def top(self, limit: Optional[int] = None, offset: int = 0) -> List[Tuple[Hashable, int]]:
+        """
+        Returns `(key, count)` pairs from the top K, highest count first.
+        """
+        with self._lock:
+            if self._dirty:
+                self._top = dict(heapq.nlargest(self.size, self._counts.items(), key=lambda item: item[1]))
+                self._dirty = False
+            if self._ranked is None:
+                # Ties rank the smaller key first.
+                self._ranked = sorted(self._top.items(), key=lambda item: (-item[1], item[0]))
+            ranked = self._ranked
+        end = None if limit is None else offset + limit
+        return ranked[offset:end]
+
+
+class WindowedLeaderboard:
+    """
+    Top-K ranking over the likes received in a rolling time window.
+
+    Changes are grouped into fixed-size time buckets. When a bucket falls out
+    of the window its totals are subtracted from the ranking, so expiring old
+    likes costs time proportional to the keys that bucket touched.
+    """
+
+    def __init__(self, window: float, bucket: float, size: int = LEADERBOARD_SIZE):
+        self.window = window
+        self.bucket = bucket
+        self.board = Leaderboard(size)
+        self._buckets: Dict[float, Counter] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: Hashable, delta: int, at: Optional[float] = None) -> None:
+        """
+        Records a change that happened at Unix time `at` (defaults to now).
+
+        Changes older than the window are ignored, and so are negative changes
+        to a bucket that never saw the matching like.
+        """
+        now = time.time()
+        at = now if at is None else at
+        start = at - at % self.bucket
+        with self._lock:
+            self._expire(now)
+            if start <= now - self.window:
+                return
+            counts = self._buckets.get(start)
+            if counts is None:
+                if delta < 0:
+                    return
+                counts = self._buckets[start] = Counter()
+            counts[key] += delta
+            self.board.update(key, delta)
+
+    def top(self, limit: Optional[int] = None, offset: int = 0) -> List[Tuple[Hashable, int]]:
+        """
+        Returns the top `(key, count)` pairs within the window.
+        """
+        with self._lock:
+            self._expire(time.time())
+        return self.board.top(limit, offset)
+
+    def remove(self, key: Hashable) -> None:
+        """
+        Drops `key` from the window entirely.
+        """
+        with self._lock:
+            for counts in self._buckets.values():
+                counts.pop(key, None)
+            self.board.remove(key)
+
+    def reset(self) -> None:
+        """
+        Forgets every bucket.
+        """
+        with self._lock:
+            self._buckets.clear()
+            self.board.load({})
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.window
+        for start in [start for start in self._buckets if start <= cutoff]:
+            for key, count in self._buckets.pop(start).items():
+                if count:
+                    self.board.update(key, -count)
+
+
+# The process-wide leaderboards.
+trending_posts = {
+    "hour": WindowedLeaderboard(window=3600, bucket=60),
+    "day": WindowedLeaderboard(window=86400, bucket=900),
+}
+
+
+def record_like(post_id: int, delta: int, liked_at: Optional[datetime.datetime] = None) -> None:
+    """
+    Applies a committed like (`delta=1`) or unlike (`delta=-1`) to every board.
+
+    Args:
+        post_id (int): The ID of the liked post.
+        delta (int): +1 for a like, -1 for an unlike.
+        liked_at (Optional[datetime.datetime]): When the like was made; for an
+            unlike this lets the trending windows subtract it from the right bucket.
+    """
+    at = _timestamp(liked_at) if liked_at else None
+    for board in trending_posts.values():
+        board.record(post_id, delta, at)
+
+
+def remove_post(post_id: int) -> None:
+    """
+    Drops a deleted post from the trending leaderboards.
+    """
+    for board in trending_posts.values():
+        board.remove(post_id)
+
+
+def rebuild(db: Session) -> None:
+    """
+    Reloads every leaderboard from the `likes` table.
+    """
+    longest = max(board.window for board in trending_posts.values())
+    since = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=longest)
+    recent = db.execute(
+        select(models.Like.post_id, models.Like.created_at)
+        .where(models.Like.created_at >= since.replace(tzinfo=None))
+    ).all()
+    for board in trending_posts.values():
+        board.reset()
+        for post_id, created_at in recent:
+            board.record(post_id, 1, _timestamp(created_at))
+
+
+def _timestamp(value: datetime.datetime) -> float:
+    # Naive datetimes come back from the database and were stored as UTC.
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.timestamp()
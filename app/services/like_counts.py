@@ -0,0 +1,293 @@
+# File: app/services/like_counts.py
+"""
+Service layer for the denormalized `posts.like_count` column.
+
+The like/unlike handlers adjust the counter with a single atomic
+`UPDATE ... SET like_count = like_count + :delta` in the same transaction as
+the `likes` row change, so concurrent likes never lose updates. The reconcile
+helper recomputes every counter from the `likes` table and is meant for
+backfills and for repairing drift.
+
+Viral posts switch to a sharded mode: once a post receives more than
+`LIKE_SHARD_THRESHOLD` likes per minute on this worker, increments go to one of
+`LIKE_SHARD_COUNT` rows in `post_like_shards` picked at random, so concurrent
+likes contend on different row locks. A post's exact total is then
+`posts.like_count` plus the sum of its shards. Everything else that reads
+likes (the post and feed payloads and their ETags, the rankings, the hot
+score) reads `posts.like_count`, so each worker runs `fold_like_shards` every
+LIKE_SHARD_FOLD_INTERVAL seconds to move the shard totals back into it.
+
+Unsharded increments also update the post's `hot_score`; a fold rescores the
+posts it folds.
+"""
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional, Set
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..cache import TTLCache
+from ..database import SessionLocal
+from . import hot
+from .post_cache import post_cache
+
+# Number of counter slots created for a post once it turns hot.
+LIKE_SHARD_COUNT = int(os.getenv("LIKE_SHARD_COUNT", "16"))
+# Likes per minute (seen by one worker) above which a post is sharded; 0 disables sharding.
+LIKE_SHARD_THRESHOLD = int(os.getenv("LIKE_SHARD_THRESHOLD", "120"))
+# How long a summed like count may be served from cache, in seconds.
+LIKE_COUNT_CACHE_TTL = float(os.getenv("LIKE_COUNT_CACHE_TTL", "2"))
+# Seconds between folds of the like shards in each worker; 0 disables them.
+LIKE_SHARD_FOLD_INTERVAL = float(os.getenv("LIKE_SHARD_FOLD_INTERVAL", "10"))
+
+logger = logging.getLogger(__name__)
+
+_RATE_WINDOW_SECONDS = 60.0
+
+_like_count_cache = TTLCache(maxsize=10_000, ttl=LIKE_COUNT_CACHE_TTL)
+
+
+class _LikeRateTracker:
+    """
+    Counts likes per post in fixed one-minute windows.
+    """
+
+    def __init__(self, window: float = _RATE_WINDOW_SECONDS, max_posts: int = 10_000):
+        self.window = window
+        self.max_posts = max_posts
+        self._windows: Dict[int, list] = {}
+        self._lock = threading.Lock()
+
+    def record(self, post_id: int) -> int:
+        """
+        Records one like and returns the number of likes in the current window.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._windows.get(post_id)
+            if entry is None or now - entry[0] >= self.window:
+                if len(self._windows) >= self.max_posts:
+                    self._drop_expired(now)
+                entry = self._windows[post_id] = [now, 0]
+            entry[1] += 1
+            return entry[1]
+
+    def _drop_expired(self, now: float) -> None:
+        expired = [pid for pid, (start, _) in self._windows.items() if now - start >= self.window]
+        for pid in expired:
+            del self._windows[pid]
+        if len(self._windows) >= self.max_posts:
+            self._windows.clear()
+
+
+_like_rates = _LikeRateTracker()
+# Posts this worker writes to shard rows instead of the posts row.
+_sharded_posts: Set[int] = set()
+
+
+def _enable_sharding(db: Session, post_id: int) -> None:
+    """
+    Creates the shard rows for a post, unless another worker already did.
+    """
+    claimed = db.execute(
+        update(models.Post)
+        .where(models.Post.id == post_id, models.Post.like_shards == 0)
+        .values(like_shards=LIKE_SHARD_COUNT)
+        .execution_options(synchronize_session=False)
+    )
+    if claimed.rowcount:
+        db.execute(
+            insert(models.PostLikeShard),
+            [{"post_id": post_id, "shard": shard, "count": 0} for shard in range(LIKE_SHARD_COUNT)],
+        )
+    _sharded_posts.add(post_id)
+
+
+def increment_like_count(db: Session, post_id: int, delta: int = 1) -> None:
+    """
+    Atomically adds `delta` to a post's like counter.
+
+    The caller is responsible for committing, so the counter change lands in
+    the same transaction as the like itself.
+
+    Args:
+        db (Session): The active database session.
+        post_id (int): The ID of the post whose counter changes.
+        delta (int): The amount to add; use -1 for an unlike.
+    """
+    if LIKE_SHARD_THRESHOLD and delta > 0 and post_id not in _sharded_posts:
+        if _like_rates.record(post_id) > LIKE_SHARD_THRESHOLD:
+            _enable_sharding(db, post_id)
+
+    if post_id in _sharded_posts:
+        result = db.execute(
+            update(models.PostLikeShard)
+            .where(
+                models.PostLikeShard.post_id == post_id,
+                models.PostLikeShard.shard == random.randrange(LIKE_SHARD_COUNT),
+            )
+            .values(count=models.PostLikeShard.count + delta)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            return
+        # The shard rows were folded away; go back to the single counter.
+        _sharded_posts.discard(post_id)
+
+    updated = db.execute(
+        update(models.Post)
+        .where(models.Post.id == post_id)
+        .values(like_count=models.Post.like_count + delta)
+        .returning(models.Post.like_count, models.Post.created_at)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if updated is not None:
+        # The row stays locked until commit, so concurrent likes apply their
+        # scores in the same order as their counts.
+        db.execute(
+            update(models.Post)
+            .where(models.Post.id == post_id)
+            .values(hot_score=models.hot_score(*updated))
+            .execution_options(synchronize_session=False)
+        )
+
+
+def get_like_count(db: Session, post_id: int) -> Optional[int]:
+    """
+    Returns a post's total like count, including any sharded increments.
+
+    Totals are cached for `LIKE_COUNT_CACHE_TTL` seconds, so a hot post is
+    summed at most once per interval per worker.
+
+    Args:
+        db (Session): The active database session.
+        post_id (int): The ID of the post.
+
+    Returns:
+        Optional[int]: The number of likes, or None if the post doesn't exist.
+    """
+    cached = _like_count_cache.get(post_id)
+    if cached is not None:
+        return cached
+
+    shard_total = (
+        select(func.coalesce(func.sum(models.PostLikeShard.count), 0))
+        .where(models.PostLikeShard.post_id == post_id)
+        .scalar_subquery()
+    )
+    total = db.execute(
+        select(models.Post.like_count + shard_total).where(models.Post.id == post_id)
+    ).scalar()
+    if total is not None:
+        _like_count_cache.set(post_id, total)
+    return total
+
+
+def fold_like_shards(db: Session) -> int:
+    """
+    Moves every shard total back into `posts.like_count`, rescores the folded
+    posts, commits, and drops their cached copies.
+
+    Shard rows are deleted with `DELETE ... RETURNING`, so exactly the counts
+    that were removed are added to the post; increments racing with the fold
+    find no shard row and fall back to the posts row. Posts that are still hot
+    get fresh shard rows on their next burst of likes.
+
+    Args:
+        db (Session): The active database session.
+
+    Returns:
+        int: The number of posts whose shards were folded.
+    """
+    # Most runs find nothing to fold; checking first avoids taking the
+    # write lock for them.
+    if db.scalar(select(models.PostLikeShard.post_id).limit(1)) is None:
+        db.rollback()
+        return 0
+
+    removed = db.execute(
+        delete(models.PostLikeShard)
+        .returning(models.PostLikeShard.post_id, models.PostLikeShard.count)
+    ).all()
+
+    totals: Dict[int, int] = {}
+    for post_id, count in removed:
+        totals[post_id] = totals.get(post_id, 0) + count
+
+    for post_id, total in totals.items():
+        db.execute(
+            update(models.Post)
+            .where(models.Post.id == post_id)
+            .values(like_count=models.Post.like_count + total, like_shards=0)
+            .execution_options(synchronize_session=False)
+        )
+    if totals:
+        hot.rescore_posts(db, models.Post.id.in_(list(totals)))
+    db.commit()
+    _sharded_posts.clear()
+    _like_count_cache.clear()
+    for post_id in totals:
+        post_cache.invalidate(post_id)
+    return len(totals)
+
+
+def _fold_like_shards_once() -> int:
+    db = SessionLocal()
+    try:
+        return fold_like_shards(db)
+    finally:
+        db.close()
+
+
+async def fold_periodically() -> None:
+    """
+    Runs `fold_like_shards` every LIKE_SHARD_FOLD_INTERVAL seconds until cancelled.
+    """
+    while True:
+        await asyncio.sleep(LIKE_SHARD_FOLD_INTERVAL)
+        try:
+            await run_in_threadpool(_fold_like_shards_once)
+        except Exception:
+            logger.exception("Folding like shards failed")
+
+
+def reconcile_like_counts(db: Session) -> int:
+    """
+    Recomputes `like_count` for every post from the rows in `likes`, folding
+    away any shard rows, and commits the result.
+
+    Args:
+        db (Session): The active database session.
+
+    Returns:
+        int: The number of posts whose counter was corrected.
+    """
+    db.execute(delete(models.PostLikeShard))
+    db.execute(
+        update(models.Post)
+        .where(models.Post.like_shards != 0)
+        .values(like_shards=0)
+        .execution_options(synchronize_session=False)
+    )
+    actual = (
+        select(func.count(models.Like.id))
+        .where(models.Like.post_id == models.Post.id)
+        .scalar_subquery()
+    )
+    result = db.execute(
+        update(models.Post)
+        .where(models.Post.like_count != actual)
+        .values(like_count=actual)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    _sharded_posts.clear()
+    _like_count_cache.clear()
+    return result.rowcount
@@ -0,0 +1,192 @@
+# File: app/services/post_cache.py
+"""
+Service layer for the read-through cache of single posts.
+
+`GET /posts/{post_id}` stores each post's serialized `PostOut` JSON here, so
+repeat reads of a post skip both the database and serialization. Handlers that
+change what a post renders as (updating or deleting it, liking or unliking it)
+call `invalidate` after committing, through `database.after_db` so a network
+backend is never called from the event loop.
+
+Entries are only filled from the primary, never from a lagging replica. An
+invalidation leaves a tombstone, unique to it, for POST_CACHE_TOMBSTONE_SECONDS.
+A read that misses remembers what it found (nothing, or a tombstone) and its
+fill is a compare-and-set against that. So a read that loaded a post before a
+change and finishes after its invalidation can't cache the old version, while
+a read that starts after the invalidation caches the post right away, even if
+it is liked every few milliseconds.
+
+The backend is picked with POST_CACHE_BACKEND: "memory" (default) keeps a
+per-worker LRU of POST_CACHE_SIZE entries, "redis" shares one cache between
+workers through the server at REDIS_URL, and "none" disables caching.
+"""
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from ..cache import RedisCache, TTLCache
+
+POST_CACHE_BACKEND = os.getenv("POST_CACHE_BACKEND", "memory").lower()
+POST_CACHE_SIZE = int(os.getenv("POST_CACHE_SIZE", "10000"))
+# How long a cached post may be served, in seconds. Bounds staleness if an
+# invalidation is missed, e.g. for changes made by another worker.
+POST_CACHE_TTL = float(os.getenv("POST_CACHE_TTL", "60"))
+# How long an invalidation's tombstone is kept, in seconds. Must exceed the
+# time it takes to load and serialize a post.
+POST_CACHE_TOMBSTONE_SECONDS = float(os.getenv("POST_CACHE_TOMBSTONE_SECONDS", "5"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Starts the tombstone stored in place of an invalidated post; serialized
+# posts are JSON objects, so never start with it.
+_TOMBSTONE_PREFIX = b"\0"
+
+
+def _is_tombstone(payload: Optional[bytes]) -> bool:
+    return payload is not None and payload.startswith(_TOMBSTONE_PREFIX)
+
+
+class PostCache:
+    """
+    Serialized posts keyed by ID, with hit and miss counters.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, post_id: int) -> Tuple[Optional[bytes], Optional[bytes]]:
+        """
+        Returns `(payload, None)` for a cached post, and `(None, seen)` on a
+        miss, where `seen` is the tombstone found, if any. Pass `seen` to
+        `set` when filling the miss.
+        """
+        payload = self.backend.get(post_id) if self.backend is not None else None
+        seen = None
+        if _is_tombstone(payload):
+            payload, seen = None, payload
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return payload, seen
+
+    async def lookup_async(self, post_id: int) -> Tuple[Optional[bytes], Optional[bytes]]:
+        """
+        Same as `lookup`, but keeps network backends off the event loop.
+        """
+        if self.backend is not None and self.backend.blocking:
+            return await run_in_threadpool(self.lookup, post_id)
+        return self.lookup(post_id)
+
+    def get(self, post_id: int) -> Optional[bytes]:
+        """
+        Returns the cached JSON for a post, or None on a miss.
+        """
+        return self.lookup(post_id)[0]
+
+    def lookup_many(self, post_ids: List[int]) -> Tuple[Dict[int, bytes], Dict[int, bytes]]:
+        """
+        Returns the cached JSON for those of `post_ids` that are cached, and
+        the tombstones found for the others, as `lookup` does for one post.
+        """
+        found = self.backend.get_many(post_ids) if self.backend is not None else {}
+        seen = {post_id: payload for post_id, payload in found.items() if _is_tombstone(payload)}
+        found = {post_id: payload for post_id, payload in found.items() if post_id not in seen}
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(post_ids) - len(found)
+        return found, seen
+
+    async def lookup_many_async(self, post_ids: List[int]) -> Tuple[Dict[int, bytes], Dict[int, bytes]]:
+        """
+        Same as `lookup_many`, but keeps network backends off the event loop.
+        """
+        if self.backend is not None and self.backend.blocking:
+            return await run_in_threadpool(self.lookup_many, post_ids)
+        return self.lookup_many(post_ids)
+
+    def get_many(self, post_ids: List[int]) -> Dict[int, bytes]:
+        """
+        Returns the cached JSON for those of `post_ids` that are cached.
+        """
+        return self.lookup_many(post_ids)[0]
+
+    def set(self, post_id: int, payload: bytes, seen: Optional[bytes] = None) -> None:
+        """
+        Caches the JSON for a post, as loaded from the primary after a miss
+        that found `seen`, unless the post was cached or invalidated since.
+        """
+        if self.backend is not None:
+            self.backend.compare_and_set(post_id, seen, payload)
+
+    async def set_async(self, post_id: int, payload: bytes, seen: Optional[bytes] = None) -> None:
+        """
+        Same as `set`, but keeps network backends off the event loop.
+        """
+        if self.backend is not None and self.backend.blocking:
+            await run_in_threadpool(self.set, post_id, payload, seen)
+        else:
+            self.set(post_id, payload, seen)
+
+    def set_many(self, payloads: Dict[int, bytes], seen: Optional[Dict[int, bytes]] = None) -> None:
+        """
+        Caches the JSON for several posts, as `set` does, in one backend call.
+        `seen` holds the tombstones the misses found.
+        """
+        seen = seen or {}
+        if self.backend is not None and payloads:
+            self.backend.compare_and_set_many(
+                {post_id: (seen.get(post_id), payload) for post_id, payload in payloads.items()}
+            )
+
+    async def set_many_async(self, payloads: Dict[int, bytes], seen: Optional[Dict[int, bytes]] = None) -> None:
+        """
+        Same as `set_many`, but keeps network backends off the event loop.
+        """
+        if self.backend is not None and self.backend.blocking:
+            await run_in_threadpool(self.set_many, payloads, seen)
+        else:
+            self.set_many(payloads, seen)
+
+    def invalidate(self, post_id: int) -> None:
+        """
+        Replaces a post in the cache with a new tombstone, so fills that
+        missed before this call are dropped; call after committing a change.
+        """
+        if self.backend is not None:
+            tombstone = _TOMBSTONE_PREFIX + os.urandom(8)
+            self.backend.set(post_id, tombstone, ttl=POST_CACHE_TOMBSTONE_SECONDS)
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Returns the backend in use and the hit/miss counters of this worker.
+        """
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "backend": POST_CACHE_BACKEND,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / lookups if lookups else None,
+        }
+
+
+# A utility function to create the cache backend selected by POST_CACHE_BACKEND.
+def _create_backend():
+    if POST_CACHE_BACKEND == "none":
+        return None
+    if POST_CACHE_BACKEND == "redis":
+        return RedisCache.from_url(REDIS_URL, ttl=POST_CACHE_TTL, prefix="post:")
+    if POST_CACHE_BACKEND == "memory":
+        return TTLCache(maxsize=POST_CACHE_SIZE, ttl=POST_CACHE_TTL)
+    raise ValueError(f"Unknown POST_CACHE_BACKEND: {POST_CACHE_BACKEND}")
+
+
+# The process-wide post cache.
+post_cache = PostCache(_create_backend())
@@ -0,0 +1,200 @@
+# File: app/services/search.py
+"""
+Service layer for full-text search over post titles and content.
+
+Queries go to the inverted index the database keeps for posts (see
+`models.SEARCH_DDL`): an FTS5 table ranked with BM25 on SQLite, a tsvector
+column ranked with ts_rank on PostgreSQL. A title match counts for more than
+a content match on both.
+
+A search query is a list of words, all of which must match; a word ending in
+`*` matches any word it is a prefix of. Results are ordered best match first.
+Ranking has to score every match, so a word found in much of the corpus is
+ranked among the newest SEARCH_MAX_RANKED matches only, which caps the cost of
+any query. Snippets are built in a second query for the page's posts only,
+since building one is far more expensive than ranking a match.
+
+Scores depend on corpus statistics, so they can't serve as a keyset. The first
+page fixes the range of post IDs ranked, and the cursor carries that range
+and an offset into it: posts added later never enter a search being paged.
+Ordering across pages is still best-effort, since edits and deletes within
+the range, and BM25's corpus statistics on SQLite, can move a post between
+pages.
+"""
+import html
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import column, func, literal_column, select, table
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..pagination import encode_search_cursor
+from .feed import CARD_COLUMNS
+
+# Words beyond this many are ignored.
+SEARCH_MAX_TERMS = int(os.getenv("SEARCH_MAX_TERMS", "16"))
+# Matches ranked per query, newest first; 0 ranks every match.
+SEARCH_MAX_RANKED = int(os.getenv("SEARCH_MAX_RANKED", "10000"))
+# Approximate number of words in a snippet.
+SEARCH_SNIPPET_WORDS = int(os.getenv("SEARCH_SNIPPET_WORDS", "16"))
+# BM25 weights of the title and content columns (SQLite).
+_BM25_WEIGHTS = (10.0, 1.0)
+_TS_CONFIG = "english"
+
+_TERM = re.compile(r"(\w+)(\*?)")
+# Private-use characters mark matches inside snippets until the text is escaped.
+_MATCH_START, _MATCH_END = "\ue000", "\ue001"
+
+_fts_table = table("posts_fts", column("rowid"))
+# The FTS5 table's hidden column of the same name, for MATCH and bm25().
+_fts = literal_column("posts_fts")
+_search_vector = literal_column("posts.search_vector")
+
+
+def parse_query(q: str) -> List[Tuple[str, bool]]:
+    """
+    Splits a search query into `(word, is_prefix)` terms. Anything but letters,
+    digits and a trailing `*` is treated as a separator, so user input can
+    never inject index query syntax.
+    """
+    terms = [(word.lower(), bool(star)) for word, star in _TERM.findall(q)]
+    return terms[:SEARCH_MAX_TERMS]
+
+
+def fts5_query(terms: List[Tuple[str, bool]]) -> str:
+    """
+    Builds an FTS5 MATCH expression requiring every term.
+    """
+    return " ".join(f'"{word}"' + ("*" if prefix else "") for word, prefix in terms)
+
+
+def tsquery(terms: List[Tuple[str, bool]]) -> str:
+    """
+    Builds a PostgreSQL tsquery expression requiring every term.
+    """
+    return " & ".join(word + (":*" if prefix else "") for word, prefix in terms)
+
+
+def _highlight(snippet: Optional[str]) -> Optional[str]:
+    # Escapes the post text, then turns the match markers into <b> tags.
+    if snippet is None:
+        return None
+    escaped = html.escape(snippet)
+    return escaped.replace(_MATCH_START, "<b>").replace(_MATCH_END, "</b>")
+
+
+def _match_sqlite(terms):
+    match = _fts.op("MATCH")(fts5_query(terms))
+    # bm25() is lower for better matches; negated so higher is better everywhere.
+    score = -func.bm25(_fts, *_BM25_WEIGHTS)
+    return match, score
+
+
+def _match_postgresql(terms):
+    query = func.to_tsquery(_TS_CONFIG, tsquery(terms))
+    return _search_vector.op("@@")(query), func.ts_rank(_search_vector, query), query
+
+
+def _oldest_ranked_id(db: Session, match, post_id, newest: int) -> Optional[int]:
+    # The ID of the SEARCH_MAX_RANKED-th newest match up to `newest`, or None
+    # when there are fewer matches. Walks the index in ID order without
+    # scoring anything.
+    if not SEARCH_MAX_RANKED:
+        return None
+    return db.scalar(
+        select(post_id)
+        .where(match, post_id <= newest)
+        .order_by(post_id.desc())
+        .offset(SEARCH_MAX_RANKED - 1)
+        .limit(1)
+    )
+
+
+def _snippets(db: Session, dialect: str, terms, post_ids: List[int]) -> Dict[int, str]:
+    if not post_ids:
+        return {}
+    if dialect == "sqlite":
+        match, _ = _match_sqlite(terms)
+        snippet = func.snippet(_fts, -1, _MATCH_START, _MATCH_END, "…", SEARCH_SNIPPET_WORDS)
+        rows = db.execute(
+            select(_fts_table.c.rowid, snippet)
+            .where(match, _fts_table.c.rowid.in_(post_ids))
+        )
+    else:
+        _, _, query = _match_postgresql(terms)
+        options = (
+            f"StartSel={_MATCH_START}, StopSel={_MATCH_END}, "
+            f"MaxWords={SEARCH_SNIPPET_WORDS}, MinWords={SEARCH_SNIPPET_WORDS // 2}, MaxFragments=1"
+        )
+        rows = db.execute(
+            select(models.Post.id, func.ts_headline(_TS_CONFIG, models.Post.content, query, options))
+            .where(models.Post.id.in_(post_ids))
+        )
+    return {post_id: _highlight(snippet) for post_id, snippet in rows}
+
+
+def search_posts(
+    db: Session, q: str, limit: int, position: Optional[tuple] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Returns one page of posts matching the search query `q` as card dicts with
+    a `snippet`, best match first, and the cursor for the next page.
+    `position` is a decoded search cursor: `(offset, oldest, newest)`.
+    """
+    terms = parse_query(q)
+    if not terms:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The search query has no words"
+        )
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        match, score = _match_sqlite(terms)
+        post_id = _fts_table.c.rowid
+        query = (
+            select(*CARD_COLUMNS, score.label("score"))
+            .select_from(_fts_table)
+            .join(models.Post, models.Post.id == post_id)
+        )
+    elif dialect == "postgresql":
+        match, score, _ = _match_postgresql(terms)
+        post_id = models.Post.id
+        query = select(*CARD_COLUMNS, score.label("score"))
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"Search is not supported on {dialect}"
+        )
+
+    if position:
+        offset, oldest, newest = position
+    else:
+        offset = 0
+        newest = db.scalar(select(func.max(models.Post.id)))
+        oldest = _oldest_ranked_id(db, match, post_id, newest) if newest is not None else None
+    if newest is None:
+        return [], None
+
+    query = query.where(match, post_id <= newest)
+    if oldest is not None:
+        query = query.where(post_id >= oldest)
+    rows = db.execute(
+        query.order_by(score.desc(), models.Post.id.desc()).offset(offset).limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_search_cursor(offset + limit, oldest, newest)
+    snippets = _snippets(db, dialect, terms, [row.id for row in rows])
+    items = []
+    for row in rows:
+        item = dict(row._mapping)
+        del item["score"]
+        item["snippet"] = snippets.get(row.id)
+        items.append(item)
+    return items, next_cursor
@@ -0,0 +1,77 @@
+# File: app/services/tags.py
+"""
+Service layer for hashtags: parsing them from post content and keeping the
+`post_tags` index table in step with the posts.
+
+A hashtag is '#' followed by up to TAG_MAX_LENGTH letters, digits or
+underscores, including at least one letter (so "#1" is not a tag), that
+doesn't follow another word character (so "C#" and "&#39;" are not tags).
+Tags are stored lowercased; a post's tags are indexed once each.
+"""
+import os
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import delete, insert, select, tuple_
+from sqlalchemy.orm import Session
+
+from .. import models
+from .feed import CARD_COLUMNS, page_of
+
+# Tags indexed per post, in order of appearance.
+TAGS_PER_POST = int(os.getenv("TAGS_PER_POST", "30"))
+
+_HASHTAG = re.compile(rf"(?<![\w#&])#(?=\w*[^\W\d_])(\w{{1,{models.TAG_MAX_LENGTH}}})(?!\w)")
+
+
+def extract_hashtags(content: Optional[str]) -> List[str]:
+    """
+    Returns the distinct lowercased hashtags in `content`, in order of appearance.
+    """
+    if not content or "#" not in content:
+        return []
+    tags = dict.fromkeys(tag.lower() for tag in _HASHTAG.findall(content))
+    return list(tags)[:TAGS_PER_POST]
+
+
+def add_post_tags(db: Session, posts: List[Tuple[int, object, List[str]]]) -> None:
+    """
+    Indexes the tags of new posts, given as `(post_id, created_at, tags)`,
+    in one executemany without committing.
+    """
+    rows = [
+        {"post_id": post_id, "tag": tag, "created_at": created_at}
+        for post_id, created_at, tags in posts
+        for tag in tags
+    ]
+    if rows:
+        db.execute(insert(models.PostTag), rows)
+
+
+def remove_post_tags(db: Session, post_id: int) -> List[str]:
+    """
+    Drops a post's tags from the index without committing and returns them.
+    """
+    return list(db.scalars(
+        delete(models.PostTag).where(models.PostTag.post_id == post_id).returning(models.PostTag.tag)
+    ))
+
+
+def load_tag_page(
+    db: Session, tag: str, limit: int, after: Optional[tuple] = None
+) -> Tuple[List, Optional[str]]:
+    """
+    Returns one page of the posts tagged `tag` as card rows, newest first,
+    and the cursor for the next page.
+    """
+    query = (
+        select(*CARD_COLUMNS)
+        .join(models.PostTag, models.PostTag.post_id == models.Post.id)
+        .where(models.PostTag.tag == tag.lower())
+    )
+    if after:
+        query = query.where(tuple_(models.PostTag.created_at, models.PostTag.post_id) < tuple_(*after))
+    rows = db.execute(
+        query.order_by(models.PostTag.created_at.desc(), models.PostTag.post_id.desc()).limit(limit + 1)
+    )
+    return page_of(rows, limit)
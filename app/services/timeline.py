@@ -0,0 +1,388 @@
+# File: app/services/timeline.py
+"""
+Service layer for home timelines: the newest posts by the accounts a user
+follows, plus their own.
+
+Timelines are built in one of two ways:
+
+* Pull: a page is a k-way merge of one stream per author. Each stream is an
+  index range scan of `posts(username, created_at, id)` limited to a page's
+  worth of rows, so the work per page grows with the number of authors
+  followed, not with the size of the posts table. The per-author queries are
+  sent together as UNION ALL statements of at most TIMELINE_AUTHORS_PER_QUERY
+  branches each.
+
+* Fan-out on write (TIMELINE_FANOUT, the default): when a post is created, a
+  background task copies it into `timeline_entries` for the author and each of
+  their followers, keeping each timeline to its newest TIMELINE_MAX_ENTRIES.
+  Reading a page is then one index range scan. Authors with at least
+  CELEBRITY_FOLLOWER_THRESHOLD followers are not fanned out, which would cost
+  a write per follower per post; their posts are pulled at read time and
+  merged into the materialized entries.
+
+Timelines that were never built (users from before fan-out) are served by
+pulling and rebuilt once in the background. When an author drops back below
+the threshold, the posts they made as a celebrity are fanned out.
+"""
+import datetime
+import heapq
+import os
+from operator import attrgetter
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, literal, select, tuple_, union_all, update
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..database import SessionLocal, dialect_insert
+from .feed import CARD_COLUMNS, page_of
+
+# Per-author subqueries per statement; SQLite allows at most 500 compound terms.
+TIMELINE_AUTHORS_PER_QUERY = int(os.getenv("TIMELINE_AUTHORS_PER_QUERY", "100"))
+TIMELINE_FANOUT = os.getenv("TIMELINE_FANOUT", "true").lower() in ("1", "true", "yes")
+# Entries kept per materialized timeline; older pages are pulled.
+TIMELINE_MAX_ENTRIES = int(os.getenv("TIMELINE_MAX_ENTRIES", "500"))
+# Posts delivered per statement by `fan_out_posts`.
+TIMELINE_FANOUT_CHUNK_SIZE = int(os.getenv("TIMELINE_FANOUT_CHUNK_SIZE", "500"))
+# Authors with this many followers are merged at read time instead of fanned out.
+CELEBRITY_FOLLOWER_THRESHOLD = int(os.getenv("CELEBRITY_FOLLOWER_THRESHOLD", "1000"))
+
+_sort_key = attrgetter("created_at", "id")
+_Entry = models.TimelineEntry
+
+
+def followed_usernames(db: Session, username: str) -> List[str]:
+    """
+    Returns the usernames `username` follows.
+    """
+    return list(db.scalars(select(models.Follow.followee).where(models.Follow.follower == username)))
+
+
+def author_streams(
+    db: Session, authors: List[str], per_author: int, after: Optional[tuple] = None
+) -> Dict[str, List]:
+    """
+    Returns up to `per_author` card rows for each author, newest first,
+    starting below the `(created_at, id)` sort key `after` if given.
+    """
+    streams: Dict[str, List] = {author: [] for author in authors}
+    for start in range(0, len(authors), TIMELINE_AUTHORS_PER_QUERY):
+        branches = []
+        for author in authors[start:start + TIMELINE_AUTHORS_PER_QUERY]:
+            branch = select(*CARD_COLUMNS).where(models.Post.username == author)
+            if after:
+                branch = branch.where(tuple_(models.Post.created_at, models.Post.id) < tuple_(*after))
+            branch = branch.order_by(models.Post.created_at.desc(), models.Post.id.desc()).limit(per_author)
+            # Wrapped so each branch keeps its own ORDER BY and LIMIT.
+            branches.append(select(branch.subquery()))
+        for row in db.execute(union_all(*branches)):
+            streams[row.username].append(row)
+    # UNION ALL doesn't promise to keep each branch's order.
+    for rows in streams.values():
+        rows.sort(key=_sort_key, reverse=True)
+    return streams
+
+
+def merge_streams(streams: Dict[str, List], count: int) -> List:
+    """
+    Merges newest-first streams into the newest `count` rows overall, keeping
+    only the first row for a post that appears in several streams.
+    """
+    merged = heapq.merge(*streams.values(), key=_sort_key, reverse=True)
+    seen = set()
+    rows = []
+    for row in merged:
+        if row.id not in seen:
+            seen.add(row.id)
+            rows.append(row)
+            if len(rows) == count:
+                break
+    return rows
+
+
+def load_timeline_page(
+    db: Session, username: str, limit: int, after: Optional[tuple] = None
+) -> Tuple[List, Optional[str]]:
+    """
+    Returns one page of `username`'s home timeline as card rows by pulling
+    every author's posts, and the cursor for the next page.
+    """
+    authors = list(dict.fromkeys(followed_usernames(db, username) + [username]))
+    # Any author can contribute the whole page, plus the row that tells
+    # whether there is a next one.
+    streams = author_streams(db, authors, limit + 1, after)
+    return page_of(merge_streams(streams, limit + 1), limit)
+
+
+def timeline_authors(db: Session, username: str) -> Tuple[List[str], List[str]]:
+    """
+    Splits the authors of `username`'s timeline (the accounts they follow and
+    themselves) into those whose posts are fanned out and the celebrities
+    whose posts are merged at read time.
+    """
+    authors = select(models.Follow.followee.label("author")).where(models.Follow.follower == username)
+    authors = authors.union(select(literal(username).label("author"))).subquery()
+    rows = db.execute(
+        select(models.User.username, models.User.follower_count)
+        .join(authors, authors.c.author == models.User.username)
+    )
+    fanned_out, celebrities = [], []
+    for author, follower_count in rows:
+        (celebrities if follower_count >= CELEBRITY_FOLLOWER_THRESHOLD else fanned_out).append(author)
+    return fanned_out, celebrities
+
+
+def _entry_rows(db: Session, username: str, limit: int, after: Optional[tuple]) -> List:
+    # Up to limit + 1 card rows from the user's materialized timeline.
+    entries = (
+        select(*CARD_COLUMNS)
+        .join(_Entry, _Entry.post_id == models.Post.id)
+        .where(_Entry.username == username)
+    )
+    if after:
+        entries = entries.where(tuple_(_Entry.created_at, _Entry.post_id) < tuple_(*after))
+    entries = entries.order_by(_Entry.created_at.desc(), _Entry.post_id.desc()).limit(limit + 1)
+    return db.execute(entries).all()
+
+
+def load_home_page(
+    db: Session, username: str, limit: int, after: Optional[tuple] = None
+) -> Tuple[Tuple[List, Optional[str]], bool]:
+    """
+    Returns one page of `username`'s home timeline as card rows with the
+    cursor for the next page, and whether the timeline is cold and should be
+    rebuilt.
+
+    With fan-out enabled, a page is read from the materialized entries and
+    merged with the posts of the user's celebrity authors. Once the entries
+    run out (the timeline is short, was trimmed or was never built) the page
+    is pulled instead, which is always complete.
+    """
+    if not TIMELINE_FANOUT:
+        return load_timeline_page(db, username, limit, after), False
+
+    rows = _entry_rows(db, username, limit, after)
+    if len(rows) <= limit:
+        cold = after is None and not rows and _never_built(db, username)
+        return load_timeline_page(db, username, limit, after), cold
+
+    _, celebrities = timeline_authors(db, username)
+    streams = author_streams(db, celebrities, limit + 1, after)
+    streams[None] = rows
+    return page_of(merge_streams(streams, limit + 1), limit), False
+
+
+def fan_out_posts(post_ids: List[int]) -> None:
+    """
+    Delivers new posts to the timelines of their authors and the authors'
+    followers, skipping celebrities' posts. Runs as a background task after
+    the posts are committed, with a session of its own.
+    """
+    if not TIMELINE_FANOUT:
+        return
+    recipients = union_all(
+        select(models.Follow.follower.label("username"), models.Follow.followee.label("author")),
+        select(models.User.username.label("username"), models.User.username.label("author")),
+    ).subquery()
+    db = SessionLocal()
+    try:
+        for start in range(0, len(post_ids), TIMELINE_FANOUT_CHUNK_SIZE):
+            chunk = post_ids[start:start + TIMELINE_FANOUT_CHUNK_SIZE]
+            deliveries = (
+                select(recipients.c.username, models.Post.id, models.Post.created_at)
+                .join(models.User, models.User.username == models.Post.username)
+                .join(recipients, recipients.c.author == models.Post.username)
+                .where(models.Post.id.in_(chunk), models.User.follower_count < CELEBRITY_FOLLOWER_THRESHOLD)
+            )
+            db.execute(
+                dialect_insert(db, _Entry)
+                .from_select(["username", "post_id", "created_at"], deliveries)
+                .on_conflict_do_nothing(index_elements=["username", "post_id"])
+            )
+            _trim(db, select(_Entry.username).where(_Entry.post_id.in_(chunk)))
+            db.commit()
+    finally:
+        db.close()
+
+
+def backfill_author(follower: str, author: str) -> None:
+    """
+    Adds an author's newest posts to a follower's timeline right after they
+    follow them. Celebrities' posts are merged at read time anyway, but are
+    stored too so the timeline is complete if the author drops below the
+    threshold. Runs as a background task.
+    """
+    if not TIMELINE_FANOUT:
+        return
+    db = SessionLocal()
+    try:
+        posts = author_streams(db, [author], TIMELINE_MAX_ENTRIES)[author]
+        _store_entries(db, follower, posts)
+        _trim(db, [follower])
+        db.commit()
+    finally:
+        db.close()
+
+
+def remove_author(db: Session, follower: str, author: str) -> None:
+    """
+    Drops an author's posts from a follower's timeline after an unfollow,
+    without committing.
+    """
+    db.execute(
+        delete(_Entry)
+        .where(
+            _Entry.username == follower,
+            _Entry.post_id.in_(select(models.Post.id).where(models.Post.username == author)),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def remove_post(db: Session, post_id: int) -> None:
+    """
+    Drops a deleted post from every timeline, without committing.
+    """
+    db.execute(delete(_Entry).where(_Entry.post_id == post_id).execution_options(synchronize_session=False))
+
+
+def rebuild_timeline(db: Session, username: str) -> int:
+    """
+    Rebuilds `username`'s materialized timeline from the posts of the authors
+    it fans out from, records when, commits, and returns the number of
+    entries stored.
+    """
+    fanned_out, _ = timeline_authors(db, username)
+    posts = merge_streams(author_streams(db, fanned_out, TIMELINE_MAX_ENTRIES), TIMELINE_MAX_ENTRIES)
+    db.execute(delete(_Entry).where(_Entry.username == username).execution_options(synchronize_session=False))
+    _store_entries(db, username, posts)
+    db.execute(
+        update(models.User.__table__)
+        .where(models.User.username == username)
+        .values(timeline_built_at=datetime.datetime.now(datetime.timezone.utc))
+    )
+    db.commit()
+    return len(posts)
+
+
+def cold_usernames(db: Session) -> List[str]:
+    """
+    Returns the users whose materialized timeline was never built.
+    """
+    return list(db.scalars(
+        select(models.User.username).where(models.User.timeline_built_at.is_(None)).order_by(models.User.username)
+    ))
+
+
+def rebuild_timeline_task(username: str) -> None:
+    """
+    Runs `rebuild_timeline` as a background task, with a session of its own,
+    unless the timeline has been built since the read that scheduled it.
+    """
+    users = models.User.__table__
+    db = SessionLocal()
+    try:
+        # Claiming the rebuild locks the user's row until the rebuild commits,
+        # so concurrent tasks for one user run it once.
+        claimed = db.execute(
+            update(users)
+            .where(users.c.username == username, users.c.timeline_built_at.is_(None))
+            .values(timeline_built_at=datetime.datetime.now(datetime.timezone.utc))
+        ).rowcount
+        if claimed:
+            rebuild_timeline(db, username)
+        else:
+            db.rollback()
+    finally:
+        db.close()
+
+
+def _never_built(db: Session, username: str) -> bool:
+    built_at = db.scalar(select(models.User.timeline_built_at).where(models.User.username == username))
+    return built_at is None
+
+
+def _store_entries(db: Session, username: str, posts: List) -> None:
+    if posts:
+        db.execute(
+            dialect_insert(db, _Entry)
+            .values([{"username": username, "post_id": post.id, "created_at": post.created_at} for post in posts])
+            .on_conflict_do_nothing(index_elements=["username", "post_id"])
+        )
+
+
+def _trim(db: Session, usernames) -> None:
+    # Deletes all but the newest TIMELINE_MAX_ENTRIES entries of each timeline.
+    ranked = (
+        select(
+            _Entry.username,
+            _Entry.post_id,
+            func.row_number()
+            .over(partition_by=_Entry.username, order_by=(_Entry.created_at.desc(), _Entry.post_id.desc()))
+            .label("rank"),
+        )
+        .where(_Entry.username.in_(usernames))
+        .subquery()
+    )
+    db.execute(
+        delete(_Entry)
+        .where(
+            tuple_(_Entry.username, _Entry.post_id).in_(
+                select(ranked.c.username, ranked.c.post_id).where(ranked.c.rank > TIMELINE_MAX_ENTRIES)
+            )
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def adjust_follower_count(db: Session, username: str, delta: int) -> Optional[int]:
+    """
+    Atomically adds `delta` to a user's follower count, without committing,
+    and returns the new count.
+    """
+    users = models.User.__table__
+    return db.execute(
+        update(users)
+        .where(users.c.username == username)
+        .values(follower_count=users.c.follower_count + delta)
+        .returning(users.c.follower_count)
+    ).scalar()
+
+
+def start_celebrity(db: Session, username: str) -> None:
+    """
+    Records that a user has just reached the celebrity threshold, without
+    committing; their posts are no longer fanned out from now on.
+    """
+    db.execute(
+        update(models.User.__table__)
+        .where(models.User.username == username)
+        .values(celebrity_since=datetime.datetime.now(datetime.timezone.utc))
+    )
+
+
+def celebrity_since(db: Session, username: str) -> Optional[datetime.datetime]:
+    """
+    Returns when a user last reached the celebrity threshold, if recorded.
+    """
+    return db.scalar(select(models.User.celebrity_since).where(models.User.username == username))
+
+
+def fan_out_author(author: str, since: Optional[datetime.datetime] = None) -> None:
+    """
+    Fans out the posts an author made as a celebrity, i.e. since `since`
+    (their newest posts when unknown), for an author who has just dropped
+    below the celebrity threshold. Runs as a background task.
+    """
+    db = SessionLocal()
+    try:
+        query = select(models.Post.id).where(models.Post.username == author)
+        if since is not None:
+            query = query.where(models.Post.created_at >= since)
+        post_ids = list(db.scalars(
+            query.order_by(models.Post.created_at.desc(), models.Post.id.desc()).limit(TIMELINE_MAX_ENTRIES)
+        ))
+    finally:
+        db.close()
+    if post_ids:
+        fan_out_posts(post_ids)
@@ -0,0 +1,228 @@
+# File: app/services/trending.py
+"""
+Service layer for trending hashtags: the tags used most over the last hour.
+
+Counting every tag exactly would need memory proportional to the number of
+distinct tags. Instead each minute bucket of the window gets a count-min
+sketch (a fixed grid of counters that can only overestimate a count) plus the
+TRENDING_SIZE tags it estimated highest, and a window sketch holds the sum of
+the bucket sketches. When a bucket leaves the window its sketch is subtracted
+from the window sketch, so memory stays fixed no matter how many posts or
+tags arrive. The trending list ranks the buckets' candidate tags by their
+window estimate with a heap, at most once every TRENDING_REFRESH_SECONDS, so a
+read costs the same at any post volume.
+
+Like the leaderboards, each worker keeps its own copy, rebuilt from
+`post_tags` on startup.
+"""
+import datetime
+import hashlib
+import heapq
+import os
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .. import models
+
+TRENDING_WINDOW_SECONDS = int(os.getenv("TRENDING_WINDOW_SECONDS", "3600"))
+TRENDING_BUCKET_SECONDS = int(os.getenv("TRENDING_BUCKET_SECONDS", "60"))
+# Tags kept ranked, and tracked as candidates per bucket.
+TRENDING_SIZE = int(os.getenv("TRENDING_SIZE", "50"))
+# Counters per sketch row and number of rows: an estimate exceeds the true
+# count by more than e/width of the window's total with probability e**-depth.
+TRENDING_SKETCH_WIDTH = int(os.getenv("TRENDING_SKETCH_WIDTH", "2048"))
+TRENDING_SKETCH_DEPTH = int(os.getenv("TRENDING_SKETCH_DEPTH", "4"))
+# How long the ranked list may be reused after tags have changed.
+TRENDING_REFRESH_SECONDS = float(os.getenv("TRENDING_REFRESH_SECONDS", "1"))
+
+
+class CountMinSketch:
+    """
+    Approximate counters for any number of keys in width * depth integers.
+
+    Each key maps to one counter per row; an estimate is the smallest of its
+    counters, which is never below the true count and only above it by the
+    counts of keys sharing all of its counters.
+    """
+
+    def __init__(self, width: int = TRENDING_SKETCH_WIDTH, depth: int = TRENDING_SKETCH_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.rows = [array("q", bytes(8 * width)) for _ in range(depth)]
+
+    def _indexes(self, key: str) -> List[int]:
+        # Two halves of one stable hash give the depth indexes (double hashing).
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(first + row * second) % self.width for row in range(self.depth)]
+
+    def add(self, key: str, count: int = 1) -> int:
+        """
+        Adds `count` to `key` and returns its new estimate.
+        """
+        estimate = None
+        for row, index in zip(self.rows, self._indexes(key)):
+            row[index] += count
+            estimate = row[index] if estimate is None else min(estimate, row[index])
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        """
+        Returns the estimated count of `key`.
+        """
+        return min(row[index] for row, index in zip(self.rows, self._indexes(key)))
+
+    def subtract(self, other: "CountMinSketch") -> None:
+        """
+        Removes the counts of a sketch of the same shape that were added to this one.
+        """
+        for row, other_row in zip(self.rows, other.rows):
+            for index, count in enumerate(other_row):
+                if count:
+                    row[index] -= count
+
+
+class _Bucket:
+    def __init__(self, width: int, depth: int):
+        self.sketch = CountMinSketch(width, depth)
+        # The bucket's highest estimated tags, at most `size` of them.
+        self.candidates: Dict[str, int] = {}
+
+
+class TrendingTags:
+    """
+    Approximate top-K tags over a sliding window of time buckets, in memory
+    bounded by the window's bucket count times the sketch size and K.
+    """
+
+    def __init__(
+        self,
+        window: int = TRENDING_WINDOW_SECONDS,
+        bucket: int = TRENDING_BUCKET_SECONDS,
+        size: int = TRENDING_SIZE,
+        width: int = TRENDING_SKETCH_WIDTH,
+        depth: int = TRENDING_SKETCH_DEPTH,
+        refresh: float = TRENDING_REFRESH_SECONDS,
+    ):
+        self.window = window
+        self.bucket = bucket
+        self.size = size
+        self.width = width
+        self.depth = depth
+        self.refresh = refresh
+        self._sketch = CountMinSketch(width, depth)
+        self._buckets: Dict[int, _Bucket] = {}
+        self._ranked: List[Tuple[str, int]] = []
+        self._ranked_at = float("-inf")
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def record(self, tags: Iterable[str], delta: int = 1, at: Optional[float] = None) -> None:
+        """
+        Counts one use of each tag at Unix time `at` (defaults to now), or
+        takes one back with `delta=-1`, e.g. when a post is deleted.
+
+        Uses older than the window are ignored, and so are negative changes to
+        a bucket that has already expired.
+        """
+        now = time.time()
+        at = now if at is None else at
+        start = int(at - at % self.bucket)
+        with self._lock:
+            self._expire(now)
+            if start <= now - self.window:
+                return
+            bucket = self._buckets.get(start)
+            if bucket is None:
+                if delta < 0:
+                    return
+                bucket = self._buckets[start] = _Bucket(self.width, self.depth)
+            for tag in tags:
+                self._sketch.add(tag, delta)
+                self._offer(bucket, tag, bucket.sketch.add(tag, delta))
+            self._dirty = True
+
+    def top(self, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        Returns `(tag, estimated uses)` pairs, most used first.
+        """
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            if self._dirty and now - self._ranked_at >= self.refresh:
+                pool = set()
+                for bucket in self._buckets.values():
+                    pool.update(bucket.candidates)
+                ranked = heapq.nlargest(self.size, ((self._sketch.estimate(tag), tag) for tag in pool))
+                # Ties rank the smaller tag first.
+                ranked.sort(key=lambda item: (-item[0], item[1]))
+                self._ranked = [(tag, count) for count, tag in ranked if count > 0]
+                self._ranked_at = now
+                self._dirty = False
+            ranked = self._ranked
+        return ranked[:limit]
+
+    def reset(self) -> None:
+        """
+        Forgets every bucket.
+        """
+        with self._lock:
+            self._sketch = CountMinSketch(self.width, self.depth)
+            self._buckets.clear()
+            self._ranked = []
+            self._dirty = False
+
+    def _offer(self, bucket: _Bucket, tag: str, estimate: int) -> None:
+        candidates = bucket.candidates
+        if tag in candidates or len(candidates) < self.size:
+            candidates[tag] = estimate
+            return
+        weakest = min(candidates, key=candidates.get)
+        if estimate > candidates[weakest]:
+            del candidates[weakest]
+            candidates[tag] = estimate
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.window
+        for start in [start for start in self._buckets if start <= cutoff]:
+            self._sketch.subtract(self._buckets.pop(start).sketch)
+            self._dirty = True
+
+
+# The process-wide trending tags.
+trending_tags = TrendingTags()
+
+
+def record_post(tags: List[str], created_at: Optional[datetime.datetime] = None, delta: int = 1) -> None:
+    """
+    Counts the tags of a committed post created at `created_at` (defaults to
+    now), or takes them back with `delta=-1` when it is deleted or edited.
+    """
+    if tags:
+        trending_tags.record(tags, delta, _timestamp(created_at) if created_at else None)
+
+
+def rebuild(db: Session) -> None:
+    """
+    Reloads the trending tags from the posts created within the window.
+    """
+    since = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=trending_tags.window)
+    rows = db.execute(
+        select(models.PostTag.tag, models.PostTag.created_at)
+        .where(models.PostTag.created_at >= since.replace(tzinfo=None))
+    )
+    trending_tags.reset()
+    for tag, created_at in rows:
+        trending_tags.record([tag], at=_timestamp(created_at))
+
+
+def _timestamp(value: datetime.datetime) -> float:
+    # Naive datetimes come back from the database and were stored as UTC.
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.timestamp()
@@ -0,0 +1,41 @@
+# File: app/services/viewer_likes.py
+"""
+Service layer for answering "which of these posts has the viewer liked?".
+
+Feed pages need this for every post they render, so it's answered for a whole
+page at once with a single `IN` query served by the unique
+`likes(username, post_id)` index, rather than one lookup per post.
+"""
+from typing import Iterable, Set
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .. import models
+
+# Upper bound on the number of post IDs accepted in one lookup.
+MAX_LOOKUP_IDS = 100
+
+
+def get_liked_post_ids(db: Session, username: str, post_ids: Iterable[int]) -> Set[int]:
+    """
+    Returns the subset of `post_ids` that `username` has liked.
+
+    Args:
+        db (Session): The active database session.
+        username (str): The viewer's username.
+        post_ids (Iterable[int]): The IDs of the posts being rendered.
+
+    Returns:
+        Set[int]: The IDs of the posts the viewer has liked.
+    """
+    post_ids = set(post_ids)
+    if not post_ids:
+        return set()
+    rows = db.execute(
+        select(models.Like.post_id).where(
+            models.Like.username == username,
+            models.Like.post_id.in_(post_ids),
+        )
+    )
+    return set(rows.scalars())
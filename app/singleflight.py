@@ -0,0 +1,87 @@
+# app/singleflight.py
+"""
+Request coalescing for expensive reads.
+
+When many requests ask for the same thing at once, e.g. a viral post that just
+fell out of the cache, `SingleFlight` lets the first one run the query while
+the others await its result, so the database sees one query instead of
+hundreds. Results can also be kept for a short while and served stale while a
+single background refresh runs.
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+# Defaults for the coalesced feed and analytics reads: results are fresh for
+# COALESCED_READ_TTL seconds, then served for up to COALESCED_READ_STALE_TTL
+# more seconds while one request refreshes them in the background.
+COALESCED_READ_TTL = float(os.getenv("COALESCED_READ_TTL", "1"))
+COALESCED_READ_STALE_TTL = float(os.getenv("COALESCED_READ_STALE_TTL", "4"))
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time; concurrent callers share its result.
+
+    With `ttl` set, results are also remembered for `ttl` seconds. After that
+    they are served for up to `stale_ttl` more seconds while the first caller
+    to see them stale refreshes them in the background. Errors are never
+    remembered. At most `maxsize` results are kept, least recently used first
+    out.
+
+    Must only be used from one event loop.
+    """
+
+    def __init__(self, ttl: float = 0.0, stale_ttl: float = 0.0, maxsize: int = 1024):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.maxsize = maxsize
+        self._flights: Dict[Hashable, asyncio.Task] = {}
+        self._results: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Returns the result of `await fn()` for `key`, sharing a remembered or
+        in-flight result when there is one.
+        """
+        entry = self._results.get(key)
+        if entry is not None:
+            stored_at, value = entry
+            age = time.monotonic() - stored_at
+            if age < self.ttl:
+                self._results.move_to_end(key)
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self._start(key, fn)
+                return value
+            del self._results[key]
+        # Shielded so one caller giving up doesn't cancel the call for the rest.
+        return await asyncio.shield(self._start(key, fn))
+
+    def forget(self, key: Hashable) -> None:
+        """
+        Drops the remembered result for `key`, if any.
+        """
+        self._results.pop(key, None)
+
+    def _start(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._flights.get(key)
+        if task is None:
+            task = self._flights[key] = asyncio.ensure_future(self._run(key, fn))
+            # Background refreshes may have nobody awaiting them.
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        return task
+
+    async def _run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await fn()
+        finally:
+            self._flights.pop(key, None)
+        if self.ttl > 0:
+            self._results[key] = (time.monotonic(), value)
+            self._results.move_to_end(key)
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+        return value
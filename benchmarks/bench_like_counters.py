@@ -0,0 +1,105 @@
+# benchmarks/bench_like_counters.py
+"""
+Concurrent-like throughput for a single hot post: one counter row vs. sharded
+counter rows.
+
+Point DATABASE_URL at a scratch Postgres database to see the effect of row
+lock contention; SQLite serializes all writers on the database lock, so it
+only shows the overhead of the sharded path.
+
+    DATABASE_URL=postgresql://postgres@localhost/bench python -m benchmarks.bench_like_counters
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+os.environ.setdefault(
+    "DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_likes.db")
+)
+
+from app import models  # noqa: E402
+from app.database import SessionLocal, engine  # noqa: E402
+from app.services import like_counts  # noqa: E402
+
+
+def setup_post() -> int:
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.username == "bench").first()
+        if not user:
+            db.add(models.User(username="bench", email="bench@example.com", password_hash="x"))
+        post = models.Post(title="hot", content="hot post", username="bench")
+        db.add(post)
+        db.commit()
+        return post.id
+    finally:
+        db.close()
+
+
+def run(post_id: int, threads: int, likes_per_thread: int) -> float:
+    """
+    Runs `threads` workers that each commit `likes_per_thread` increments and
+    returns the achieved likes per second.
+    """
+    barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        db = SessionLocal()
+        try:
+            barrier.wait()
+            for _ in range(likes_per_thread):
+                like_counts.increment_like_count(db, post_id, 1)
+                db.commit()
+        finally:
+            db.close()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for w in workers:
+        w.join()
+    return threads * likes_per_thread / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--likes", type=int, default=200, help="likes per thread")
+    args = parser.parse_args()
+
+    # Single-row mode: never switch to shards.
+    like_counts.LIKE_SHARD_THRESHOLD = 0
+    single_post = setup_post()
+    single = run(single_post, args.threads, args.likes)
+
+    # Sharded mode: shard the post up front.
+    sharded_post = setup_post()
+    db = SessionLocal()
+    try:
+        like_counts._enable_sharding(db, sharded_post)
+        db.commit()
+    finally:
+        db.close()
+    sharded = run(sharded_post, args.threads, args.likes)
+
+    db = SessionLocal()
+    try:
+        expected = args.threads * args.likes
+        assert like_counts.get_like_count(db, single_post) == expected
+        assert like_counts.get_like_count(db, sharded_post) == expected
+    finally:
+        db.close()
+
+    print(f"database:     {engine.url.get_backend_name()}")
+    print(f"threads:      {args.threads}, likes/thread: {args.likes}")
+    print(f"single row:   {single:10.0f} likes/s")
+    print(f"{like_counts.LIKE_SHARD_COUNT:2d} shards:    {sharded:10.0f} likes/s ({sharded / single:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_login.py
+"""
+Password verification throughput vs. number of concurrent login attempts.
+
+Each level fires `--attempts` verifications from that many client threads
+through app.passwords and reports completed logins per second, p95 latency and
+how many attempts were shed with a 503 once the bounded queue was full.
+
+    BCRYPT_ROUNDS=12 PASSWORD_HASH_WORKERS=4 python -m benchmarks.bench_login
+"""
+import argparse
+import statistics
+import threading
+import time
+
+from fastapi import HTTPException
+
+from app import passwords
+
+
+def run(concurrency: int, attempts: int, hashed: str):
+    latencies = []
+    rejected = 0
+    lock = threading.Lock()
+    remaining = iter(range(attempts))
+
+    def client():
+        nonlocal rejected
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            start = time.perf_counter()
+            try:
+                passwords.verify_password("correct horse", hashed)
+            except HTTPException:
+                with lock:
+                    rejected += 1
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else 0.0
+    return len(latencies) / elapsed, p95, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--attempts", type=int, default=64)
+    parser.add_argument("--levels", default="1,2,4,8,16,32,64")
+    args = parser.parse_args()
+
+    hashed = passwords.get_password_hash("correct horse")
+    print(
+        f"bcrypt rounds: {passwords.BCRYPT_ROUNDS}, workers: {passwords.PASSWORD_HASH_WORKERS}, "
+        f"queue limit: {passwords.PASSWORD_HASH_QUEUE_LIMIT}"
+    )
+    print(f"{'concurrency':>11} {'logins/s':>9} {'p95 ms':>8} {'503s':>5}")
+    for level in (int(level) for level in args.levels.split(",")):
+        throughput, p95, rejected = run(level, args.attempts, hashed)
+        print(f"{level:>11} {throughput:>9.1f} {p95 * 1000:>8.1f} {rejected:>5}")
+
+
+if __name__ == "__main__":
+    main()
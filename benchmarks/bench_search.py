@@ -0,0 +1,143 @@
+# benchmarks/bench_search.py
+"""
+Full-text search latency over a synthetic corpus, inverted index vs. scan.
+
+Builds a corpus of generated posts whose words follow a Zipf distribution
+(a few very common words, a long tail of rare ones), then times the first page
+of `services.search.search_posts` (FTS5/BM25 on SQLite, tsvector/ts_rank on
+PostgreSQL) against a `LIKE '%word%'` scan, for a rare word, a common word,
+two words and a prefix. Loading the corpus also shows the cost of keeping the
+index in sync on insert.
+
+    python -m benchmarks.bench_search --posts 1000000
+    DATABASE_URL=postgresql://postgres@localhost/bench python -m benchmarks.bench_search
+
+The corpus is kept in the database, so later runs with the same --posts skip
+loading it.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault(
+    "DATABASE_URL", "sqlite:///" + os.path.join(tempfile.gettempdir(), "bench_search.db")
+)
+
+from sqlalchemy import func, insert, or_, select  # noqa: E402
+
+from app import models  # noqa: E402
+from app.database import SessionLocal, engine  # noqa: E402
+from app.services import search  # noqa: E402
+from app.services.feed import CARD_COLUMNS  # noqa: E402
+
+VOCABULARY_SIZE = 50_000
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "ta", "vo", "shi", "an", "el", "or", "us", "qua", "ze", "bri", "dor"]
+LOAD_BATCH_SIZE = 10_000
+
+
+def make_vocabulary(rng: random.Random) -> list:
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def setup_corpus(count: int, vocabulary: list, rng: random.Random) -> None:
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        existing = db.scalar(select(func.count(models.Post.id)))
+        if existing >= count:
+            return
+        if not db.get(models.User, 1):
+            db.add(models.User(username="bench", email="bench@example.com", password_hash="x"))
+            db.commit()
+
+        # Zipf: the word of rank r appears with probability proportional to 1 / r.
+        cum_weights = []
+        total = 0.0
+        for rank in range(1, len(vocabulary) + 1):
+            total += 1.0 / rank
+            cum_weights.append(total)
+
+        start = time.perf_counter()
+        for offset in range(existing, count, LOAD_BATCH_SIZE):
+            rows = []
+            for _ in range(min(LOAD_BATCH_SIZE, count - offset)):
+                words = rng.choices(vocabulary, cum_weights=cum_weights, k=34)
+                content = " ".join(words[4:])
+                rows.append({
+                    "title": " ".join(words[:4]),
+                    "content": content,
+                    "excerpt": models.make_excerpt(content),
+                    "username": "bench",
+                })
+            db.execute(insert(models.Post), rows)
+            db.commit()
+        elapsed = time.perf_counter() - start
+        print(f"loaded {count - existing} posts in {elapsed:.1f}s ({(count - existing) / elapsed:,.0f} posts/s)")
+    finally:
+        db.close()
+
+
+def fts_search(db, q: str, limit: int):
+    return search.search_posts(db, q, limit)[0]
+
+
+def like_scan(db, q: str, limit: int):
+    # Roughly what searching looks like without an index: every term must be a
+    # substring of the title or content, newest posts first.
+    query = select(*CARD_COLUMNS)
+    for word, _ in search.parse_query(q):
+        pattern = f"%{word}%"
+        query = query.where(or_(models.Post.title.like(pattern), models.Post.content.like(pattern)))
+    return db.execute(query.order_by(models.Post.id.desc()).limit(limit)).all()
+
+
+def run(fn, q: str, limit: int, repeat: int) -> tuple:
+    """
+    Returns the median latency in milliseconds and the number of results.
+    """
+    db = SessionLocal()
+    try:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results = fn(db, q, limit)
+            times.append(time.perf_counter() - start)
+    finally:
+        db.close()
+    return statistics.median(times) * 1e3, len(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(rng)
+    setup_corpus(args.posts, vocabulary, rng)
+
+    rare, common = vocabulary[-1], vocabulary[0]
+    queries = [
+        ("rare word", rare),
+        ("common word", common),
+        ("two words", f"{common} {vocabulary[1]}"),
+        ("prefix", common[:3] + "*"),
+    ]
+    print(f"{'query':>12} {'q':>24} {'index ms':>9} {'scan ms':>9} {'hits':>5}")
+    for name, q in queries:
+        fts_ms, hits = run(fts_search, q, args.limit, args.repeat)
+        scan_ms, _ = run(like_scan, q, args.limit, args.repeat)
+        print(f"{name:>12} {q:>24} {fts_ms:9.2f} {scan_ms:9.2f} {hits:5d}")
+
+
+if __name__ == "__main__":
+    main()
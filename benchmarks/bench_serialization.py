@@ -0,0 +1,127 @@
+# benchmarks/bench_serialization.py
+"""
+Per-row cost of encoding a 1k-post feed response, from query to JSON bytes:
+
+  * orm+pydantic: full ORM objects, validated into PostCard with
+    `from_attributes`, converted by `jsonable_encoder` and encoded with the
+    stdlib json module, as FastAPI does for a `response_model` (the default).
+  * rows+pydantic: the same, but from plain card-column rows.
+  * rows+typeadapter: card-column rows encoded by a prebuilt Pydantic v2
+    `TypeAdapter` serializer for a list of card dicts.
+  * rows+fast: card-column rows turned into dicts and encoded with
+    `app.serialization.dumps` (orjson when installed), the FAST_JSON path.
+
+    python -m benchmarks.bench_serialization --posts 1000 --repeat 20
+"""
+import argparse
+import datetime
+import json
+import os
+import tempfile
+import time
+from typing import Optional
+
+os.environ.setdefault(
+    "DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_serialization.db")
+)
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+from typing_extensions import TypedDict  # noqa: E402
+
+from app import models  # noqa: E402
+from app.database import SessionLocal, engine  # noqa: E402
+from app.schemas.posts import PostCard  # noqa: E402
+from app.services.feed import CARD_COLUMNS  # noqa: E402
+from app.serialization import dumps, orjson, rows_to_dicts  # noqa: E402
+
+def setup_posts(count: int) -> None:
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if db.query(models.Post).count() >= count:
+            return
+        db.add(models.User(username="bench", email="bench@example.com", password_hash="x"))
+        db.add_all(
+            models.Post(title=f"Post {i}", content="lorem ipsum " * 200, username="bench", like_count=i)
+            for i in range(count)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def orm_pydantic(db, limit):
+    posts = db.query(models.Post).limit(limit).all()
+    cards = [PostCard.model_validate(post, from_attributes=True) for post in posts]
+    return json.dumps(jsonable_encoder(cards)).encode()
+
+
+def rows_pydantic(db, limit):
+    rows = db.execute(select(*CARD_COLUMNS).limit(limit)).all()
+    cards = [PostCard.model_validate(row, from_attributes=True) for row in rows]
+    return json.dumps(jsonable_encoder(cards)).encode()
+
+
+class CardRow(TypedDict):
+    id: int
+    username: Optional[str]
+    title: str
+    excerpt: Optional[str]
+    image_path: Optional[str]
+    created_at: datetime.datetime
+    like_count: int
+    liked_by_me: Optional[bool]
+
+
+# Serializing models needs model instances; a TypedDict describes plain dicts.
+_cards_adapter = TypeAdapter(list[CardRow])
+
+
+def rows_typeadapter(db, limit):
+    rows = db.execute(select(*CARD_COLUMNS).limit(limit)).all()
+    return _cards_adapter.dump_json(rows_to_dicts(rows))
+
+
+def rows_fast(db, limit):
+    rows = db.execute(select(*CARD_COLUMNS).limit(limit)).all()
+    return dumps(rows_to_dicts(rows))
+
+
+def run(fn, limit: int, repeat: int) -> float:
+    """
+    Returns the best per-row time in microseconds over `repeat` runs.
+    """
+    best = float("inf")
+    db = SessionLocal()
+    try:
+        for _ in range(repeat):
+            db.expunge_all()
+            start = time.perf_counter()
+            fn(db, limit)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        db.close()
+    return best / limit * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_posts(args.posts)
+    print(f"encoder for the fast path: {'orjson' if orjson is not None else 'pydantic'}")
+    for name, fn in [
+        ("orm+pydantic", orm_pydantic),
+        ("rows+pydantic", rows_pydantic),
+        ("rows+typeadapter", rows_typeadapter),
+        ("rows+fast", rows_fast),
+    ]:
+        print(f"{name:>18}: {run(fn, args.posts, args.repeat):7.2f} us/row")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# benchmarks/load_test.py
+"""
+Closed-loop HTTP load test for comparing the sync and async database modes.
+
+Start the API once per mode, then point this script at it:
+
+    uvicorn app.main:app --port 8000                # sync sessions on the threadpool
+    DB_ASYNC=true uvicorn app.main:app --port 8000  # asyncpg / aiosqlite sessions
+
+    python -m benchmarks.load_test --url http://127.0.0.1:8000/posts/ --concurrency 500
+
+Each of `--concurrency` clients sends requests back to back for `--duration`
+seconds; the script reports requests/sec, error count and latency percentiles.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def client(http: httpx.AsyncClient, url: str, deadline: float, latencies: list, errors: list):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await http.get(url)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+                continue
+        except httpx.HTTPError as exc:
+            errors.append(type(exc).__name__)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://127.0.0.1:8000/posts/")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30.0) as http:
+        deadline = time.perf_counter() + args.duration
+        await asyncio.gather(
+            *(client(http, args.url, deadline, latencies, errors) for _ in range(args.concurrency))
+        )
+
+    print(f"url:          {args.url}")
+    print(f"concurrency:  {args.concurrency}")
+    print(f"requests/s:   {len(latencies) / args.duration:.1f}")
+    print(f"errors:       {len(errors)}")
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100)
+        print(f"p50 / p99 ms: {cuts[49] * 1000:.1f} / {cuts[98] * 1000:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,9 +1,30 @@
+import os
+import shutil
+import tempfile
+import uuid
+
+# Give every test session a database of its own. The app reads DATABASE_URL
+# when it is imported, so this has to happen before the import below.
+_TEST_DB_DIR = tempfile.mkdtemp(prefix="social-media-test-")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_TEST_DB_DIR, "test.db")
+os.environ.pop("REPLICA_DATABASE_URLS", None)
+# The cheapest cost bcrypt allows, so signing up doesn't dominate the suite.
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+# No background rescoring or folding, so tests see the state they set up;
+# tests run those jobs themselves.
+os.environ.setdefault("HOT_RESCORE_INTERVAL", "0")
+os.environ.setdefault("LIKE_SHARD_FOLD_INTERVAL", "0")
+
 import pytest
 from fastapi.testclient import TestClient
 
-# Import the main FastAPI app and the in-memory database objects
+# Import the main FastAPI app
 from app.main import app
-from app.database import users_db, posts_db, post_id_counter
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_TEST_DB_DIR, ignore_errors=True)
+
 
 # Define a fixture to provide a test client for all tests
 # This is more efficient than creating a new client for every test
@@ -13,15 +34,21 @@ def client():
     with TestClient(app) as test_client:
         yield test_client
 
-# This fixture automatically runs before every test to reset the database
-# This ensures each test starts with a clean slate and is independent
-@pytest.fixture(autouse=True)
-def reset_db():
-    """Resets the in-memory database before each test."""
-    users_db.clear()
-    posts_db.clear()
-    global post_id_counter
-    post_id_counter = 0
+
+@pytest.fixture
+def sign_up(client):
+    """
+    Provides a function that registers and logs in a new user whose name
+    starts with the given prefix, returning the username and auth headers.
+    Names are unique, so tests sharing the session database stay independent.
+    """
+    def sign_up(prefix):
+        username = f"{prefix}-{uuid.uuid4().hex[:8]}"
+        client.post("/users/", json={"username": username, "email": f"{username}@example.com", "password": "pw"})
+        token = client.post("/users/login", data={"username": username, "password": "pw"}).json()["access_token"]
+        return username, {"Authorization": f"Bearer {token}"}
+    return sign_up
+
 
 # Example of a test function using the client fixture
 def test_read_root(client):
@@ -0,0 +1,100 @@
+import asyncio
+
+from app.schemas.posts import PostCreate
+from app.services import bulk
+from app.services.bulk import BulkReport, LineTooLong, iter_ndjson, validate_items
+
+
+def test_invalid_items_are_reported_by_index():
+    """
+    Test that each invalid item is reported with its position and the rest kept.
+    """
+    report = BulkReport()
+    items = [{"title": "a", "content": "x"}, {"title": "b"}, "nope", {"title": "c", "content": "y"}]
+
+    valid = validate_items(PostCreate, enumerate(items), report)
+
+    assert [index for index, _ in valid] == [0, 3]
+    assert [error["index"] for error in report.errors] == [1, 2]
+    assert report.error_count == 2
+
+
+def test_ndjson_lines_are_numbered_across_chunks():
+    """
+    Test that NDJSON lines split across network chunks are reassembled and numbered.
+    """
+    async def stream():
+        for chunk in [b'{"a": 1}\n{"a"', b': 2}\n\n', b"oops\n", b'{"a": 3}']:
+            yield chunk
+
+    async def collect():
+        return [item async for item in iter_ndjson(stream())]
+
+    lines = asyncio.run(collect())
+
+    assert [(index, value) for index, value in lines if not isinstance(value, ValueError)] == [
+        (0, {"a": 1}), (1, {"a": 2}), (4, {"a": 3})
+    ]
+    assert isinstance(dict(lines)[3], ValueError)
+
+
+def test_ndjson_lines_over_the_limit_are_reported_and_skipped():
+    """
+    Test that an overlong line, even one split across chunks, is reported by
+    number without stopping the lines after it.
+    """
+    async def stream():
+        for chunk in [b'{"a": 1}\n{"long": "', b"x" * 40, b'"}\n{"a": 2}\n', b"y" * 40]:
+            yield chunk
+
+    async def collect():
+        return [item async for item in iter_ndjson(stream(), max_line_bytes=20)]
+
+    lines = asyncio.run(collect())
+
+    assert [index for index, _ in lines] == [0, 1, 2, 3]
+    assert (lines[0], lines[2]) == ((0, {"a": 1}), (2, {"a": 2}))
+    assert isinstance(lines[1][1], LineTooLong) and isinstance(lines[3][1], LineTooLong)
+
+    report = BulkReport()
+    validate_items(PostCreate, lines, report)
+    assert {"index": 1, "error": "Line longer than 20 bytes"} in report.errors
+
+
+class _CountingSession:
+    # Stands in for a session, counting commits.
+    def __init__(self):
+        self.info = {}
+        self.commits = 0
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_ndjson_uploads_commit_and_forget_each_batch(monkeypatch):
+    """
+    Test that an NDJSON upload is committed every BULK_CHUNK_SIZE lines, that
+    each batch's IDs are handed on after its commit, and that the report then
+    only keeps counts and errors.
+    """
+    monkeypatch.setattr(bulk, "BULK_CHUNK_SIZE", 2)
+    db = _CountingSession()
+    next_id = iter(range(1, 100))
+    batches = []
+
+    def insert_items(session, username, items, report):
+        report.ids.extend(next(next_id) for _ in items)
+        report.created += len(items)
+
+    async def on_commit(report):
+        batches.append((db.commits, list(report.ids)))
+
+    async def stream():
+        yield b"".join(b'{"title": "t", "content": "c"}\n' for _ in range(4)) + b'{"title": 1}\n'
+        yield b'{"title": "t", "content": "c"}\n'
+
+    report = asyncio.run(bulk.ingest_ndjson(stream(), db, PostCreate, insert_items, "user", on_commit))
+
+    assert batches == [(1, [1, 2]), (2, [3, 4]), (3, [5])]
+    assert (report.created, report.ids, report.error_count) == (5, [], 1)
+    assert report.result(include_ids=False)["errors"] == [{"index": 4, "error": "title: Input should be a valid string"}]
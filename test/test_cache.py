@@ -0,0 +1,183 @@
+import time
+
+from app.cache import RedisCache, TTLCache
+from app.services.post_cache import PostCache
+
+
+class FakeRedis:
+    """
+    A stand-in for a redis-py client, holding values in a dict.
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        value = self.data.get(key)
+        if value is None or value[1] <= time.monotonic():
+            return None
+        return value[0]
+
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and self.get(key) is not None:
+            return None
+        self.data[key] = (value, time.monotonic() + (ex if ex is not None else float("inf")))
+        return True
+
+    def eval(self, script, numkeys, *args):
+        # Only runs the caches' compare-and-set script.
+        keys, argv = args[:numkeys], args[numkeys:]
+        stored = 0
+        for i, key in enumerate(keys):
+            expected, value = argv[2 * i + 1], argv[2 * i + 2]
+            if (self.get(key) or b"") == expected:
+                self.set(key, value, ex=argv[0])
+                stored += 1
+        return stored
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """
+    Test that a full cache evicts the entry read least recently.
+    """
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries():
+    """
+    Test that entries are no longer returned once their TTL has passed.
+    """
+    cache = TTLCache(maxsize=2, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+
+
+def test_redis_cache_namespaces_keys():
+    """
+    Test that the Redis backend stores values under its prefix.
+    """
+    client = FakeRedis()
+    cache = RedisCache(client, ttl=60, prefix="post:")
+    cache.set(7, b"{}")
+
+    assert "post:7" in client.data
+    assert cache.get(7) == b"{}"
+    cache.delete(7)
+    assert cache.get(7) is None
+
+
+def test_post_cache_counts_hits_and_misses():
+    """
+    Test that the post cache counts lookups and forgets invalidated posts.
+    """
+    cache = PostCache(RedisCache(FakeRedis()))
+    assert cache.get(1) is None
+    cache.set(1, b'{"id": 1}')
+    assert cache.get(1) == b'{"id": 1}'
+    cache.invalidate(1)
+    assert cache.get(1) is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+
+def test_post_cache_get_many_returns_cached_subset():
+    """
+    Test that a batch lookup returns only cached posts and counts each lookup.
+    """
+    for backend in (TTLCache(maxsize=10, ttl=60), RedisCache(FakeRedis())):
+        cache = PostCache(backend)
+        cache.set_many({1: b"one", 3: b"three"})
+
+        assert cache.get_many([1, 2, 3]) == {1: b"one", 3: b"three"}
+        assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_cache_add_keeps_live_entries():
+    """
+    Test that add only stores a value where no live entry exists, on both backends.
+    """
+    for cache in (TTLCache(maxsize=10, ttl=60), RedisCache(FakeRedis())):
+        assert cache.add("a", b"1")
+        assert not cache.add("a", b"2")
+        assert cache.get("a") == b"1"
+
+
+def test_post_cache_drops_fills_that_started_before_an_invalidation():
+    """
+    Test that a post loaded before a change can't be cached after its invalidation.
+    """
+    for backend in (TTLCache(maxsize=10, ttl=60), RedisCache(FakeRedis())):
+        cache = PostCache(backend)
+        assert cache.get(1) is None
+        # The post changes while the miss is being loaded.
+        cache.invalidate(1)
+        cache.set(1, b'{"title": "old"}')
+        cache.set_many({1: b'{"title": "old"}'})
+
+        assert cache.get(1) is None
+        assert cache.get_many([1]) == {}
+
+
+def test_compare_and_set_only_replaces_the_expected_value():
+    """
+    Test that compare-and-set stores a value only over the expected one, on both backends.
+    """
+    for cache in (TTLCache(maxsize=10, ttl=60), RedisCache(FakeRedis())):
+        assert cache.compare_and_set("a", None, b"1")
+        assert not cache.compare_and_set("a", None, b"2")
+        assert not cache.compare_and_set("a", b"0", b"2")
+        assert cache.compare_and_set("a", b"1", b"3")
+        assert cache.compare_and_set_many({"a": (b"3", b"4"), "b": (b"x", b"5"), "c": (None, b"6")}) == 2
+        assert cache.get_many(["a", "b", "c"]) == {"a": b"4", "c": b"6"}
+
+
+def test_post_cache_fills_after_an_invalidation():
+    """
+    Test that a read that misses after an invalidation caches the post, so a
+    post changed more often than the tombstone lasts still gets cached.
+    """
+    for backend in (TTLCache(maxsize=10, ttl=60), RedisCache(FakeRedis())):
+        cache = PostCache(backend)
+        cache.invalidate(1)
+        cache.invalidate(2)
+
+        payload, seen = cache.lookup(1)
+        assert payload is None
+        cache.set(1, b'{"id": 1}', seen)
+        found, seen_many = cache.lookup_many([2])
+        cache.set_many({2: b'{"id": 2}'}, seen_many)
+
+        assert cache.get_many([1, 2]) == {1: b'{"id": 1}', 2: b'{"id": 2}'}
+
+
+def test_post_cache_drops_fills_that_missed_an_earlier_tombstone():
+    """
+    Test that a fill is dropped when another invalidation lands while the
+    post is loaded, even if the miss found a tombstone too.
+    """
+    for backend in (TTLCache(maxsize=10, ttl=60), RedisCache(FakeRedis())):
+        cache = PostCache(backend)
+        cache.invalidate(1)
+        _, seen = cache.lookup(1)
+        cache.invalidate(1)
+        cache.set(1, b'{"title": "old"}', seen)
+
+        assert cache.get(1) is None
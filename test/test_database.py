@@ -0,0 +1,99 @@
+import time
+from types import SimpleNamespace
+
+from app import database
+from app.cache import TTLCache
+from app.database import _run_calls, after_db
+from app.security import create_access_token
+
+
+def test_after_db_runs_right_away_outside_async_sessions():
+    """
+    Test that work handed to after_db runs immediately when nothing defers it.
+    """
+    calls = []
+    after_db(SimpleNamespace(info={}), calls.append, 1)
+
+    assert calls == [1]
+
+
+def test_after_db_queues_work_for_run_db():
+    """
+    Test that work is queued while run_db defers it, and runs in order afterwards.
+    """
+    calls = []
+    db = SimpleNamespace(info={"deferred": []})
+    after_db(db, calls.append, 1)
+    after_db(db, calls.append, 2)
+
+    assert calls == []
+    _run_calls(db.info["deferred"])
+    assert calls == [1, 2]
+
+
+class _FakeSession:
+    def __init__(self, name):
+        self.name = name
+        self.info = {}
+
+    def close(self):
+        pass
+
+
+def _factory(name):
+    return lambda: _FakeSession(name)
+
+
+def _read_session(username=None):
+    # The session get_sync_read_db picks for a request by `username`.
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': username})}"} if username else {}
+    request = SimpleNamespace(state=SimpleNamespace(), headers=headers)
+    return next(database.get_sync_read_db(request))
+
+
+def _use_replicas(monkeypatch, names, sticky_seconds=5.0):
+    monkeypatch.setattr(database, "SessionLocal", _factory("primary"))
+    monkeypatch.setattr(database, "ReplicaSessionLocals", [_factory(name) for name in names])
+    monkeypatch.setattr(database, "READ_YOUR_WRITES_SECONDS", sticky_seconds)
+    monkeypatch.setattr(database, "_recent_writers", TTLCache(maxsize=10, ttl=sticky_seconds))
+    monkeypatch.setattr(database, "_last_write_at", float("-inf"))
+
+
+def test_reads_rotate_over_the_replicas(monkeypatch):
+    """
+    Test that anonymous reads go to each replica in turn and never to the primary.
+    """
+    _use_replicas(monkeypatch, ["a", "b", "c"])
+
+    names = [_read_session().name for _ in range(6)]
+
+    assert sorted(names[:3]) == ["a", "b", "c"]
+    assert names[3:] == names[:3]
+    assert not any(_read_session().info["read_your_writes"] for _ in range(3))
+
+
+def test_reads_use_the_primary_without_replicas(monkeypatch):
+    """
+    Test that reads go to the primary when no replicas are configured.
+    """
+    _use_replicas(monkeypatch, [])
+
+    assert _read_session("zoe").name == "primary"
+
+
+def test_read_your_writes_stickiness_expires(monkeypatch):
+    """
+    Test that a writer's reads go to the primary until READ_YOUR_WRITES_SECONDS
+    pass, while other users keep reading from the replicas.
+    """
+    _use_replicas(monkeypatch, ["a", "b"], sticky_seconds=0.2)
+    database.mark_recent_write("alice")
+
+    pinned = _read_session("alice")
+    assert (pinned.name, pinned.info["read_your_writes"]) == ("primary", True)
+    assert _read_session("bob").name in ("a", "b")
+    assert _read_session().name in ("a", "b")
+
+    time.sleep(0.3)
+    released = _read_session("alice")
+    assert (released.name in ("a", "b"), released.info["read_your_writes"]) == (True, False)
@@ -0,0 +1,90 @@
+import gzip
+import json
+from types import SimpleNamespace
+
+from app.services import export
+
+
+def _export(client, **params):
+    response = client.get("/posts/export", params=params)
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.content.splitlines()]
+
+
+def test_export_filters_by_author_and_creation_time(client, sign_up):
+    """
+    Test that an export only holds the requested author's posts, in ID order,
+    created at or after 'since' and before 'until'.
+    """
+    author, author_auth = sign_up("abby")
+    _, other_auth = sign_up("ben")
+    ids = [
+        client.post("/posts/", json={"title": f"p{i}", "content": "x"}, headers=author_auth).json()["id"]
+        for i in range(3)
+    ]
+    client.post("/posts/", json={"title": "other", "content": "x"}, headers=other_auth)
+    created = [client.get(f"/posts/{post_id}").json()["created_at"] for post_id in ids]
+
+    assert [post["id"] for post in _export(client, username=author)] == ids
+    assert {post["username"] for post in _export(client, username=author)} == {author}
+    assert [post["id"] for post in _export(client, username=author, since=created[1])] == ids[1:]
+    assert [post["id"] for post in _export(client, username=author, until=created[1])] == ids[:1]
+    assert _export(client, username="nobody-at-all") == []
+
+
+def test_gzipped_export_has_the_same_posts(client, sign_up):
+    """
+    Test that gzip=true returns a gzip file holding the same NDJSON.
+    """
+    author, author_auth = sign_up("cara")
+    for i in range(2):
+        client.post("/posts/", json={"title": f"g{i}", "content": "x"}, headers=author_auth)
+    plain = client.get("/posts/export", params={"username": author})
+
+    response = client.get("/posts/export", params={"username": author, "gzip": "true"})
+
+    assert response.headers["content-type"] == "application/gzip"
+    assert gzip.decompress(response.content) == plain.content
+
+
+def test_gzip_chunks_make_one_gzip_stream():
+    """
+    Test that compressing chunk by chunk yields a single valid gzip stream.
+    """
+    chunks = [b'{"id":1}\n' * 100, b"", b'{"id":2}\n' * 100]
+
+    assert gzip.decompress(b"".join(export.gzip_chunks(iter(chunks)))) == b"".join(chunks)
+
+
+class _StreamedResult:
+    # Hands out row batches on demand and counts how many were fetched.
+    def __init__(self, batches):
+        self.batches = batches
+        self.fetched = 0
+
+    def partitions(self):
+        for batch in self.batches:
+            self.fetched += 1
+            yield batch
+
+
+def test_export_streams_each_batch_before_fetching_the_next():
+    """
+    Test that the export fetches rows in EXPORT_BATCH_SIZE batches and yields
+    each batch's NDJSON before the next batch is read.
+    """
+    batches = [[SimpleNamespace(_mapping={"id": 2 * i + j}) for j in range(2)] for i in range(3)]
+    result = _StreamedResult(batches)
+    queries = []
+
+    def execute(query):
+        queries.append(query)
+        return result
+
+    chunks = export.export_posts(SimpleNamespace(execute=execute))
+
+    assert next(chunks) == b'{"id":0}\n{"id":1}\n'
+    assert result.fetched == 1
+    assert queries[0].get_execution_options()["yield_per"] == export.EXPORT_BATCH_SIZE
+    assert list(chunks) == [b'{"id":2}\n{"id":3}\n', b'{"id":4}\n{"id":5}\n']
+    assert result.fetched == 3
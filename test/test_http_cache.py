@@ -0,0 +1,23 @@
+from app.http_cache import etag_matches, make_etag
+
+
+def test_etag_changes_with_version():
+    """
+    Test that the ETag is stable for a version and changes when it does.
+    """
+    assert make_etag(20, None, (3, 6, 1)) == make_etag(20, None, (3, 6, 1))
+    assert make_etag(20, None, (3, 6, 1)) != make_etag(20, None, (3, 6, 2))
+
+
+def test_if_none_match_uses_weak_comparison():
+    """
+    Test that If-None-Match matches weak and strong forms and ETag lists.
+    """
+    etag = make_etag("feed")
+    strong = etag.removeprefix("W/")
+
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", {strong}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
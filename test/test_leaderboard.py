@@ -0,0 +1,62 @@
+import time
+
+from app.services.leaderboard import Leaderboard, WindowedLeaderboard
+
+
+def test_leaderboard_ranks_highest_counts_first():
+    """
+    Test that the leaderboard returns the top K keys in descending order.
+    """
+    board = Leaderboard(size=2)
+    for key, likes in {"a": 3, "b": 5, "c": 1}.items():
+        board.update(key, likes)
+
+    assert board.top() == [("b", 5), ("a", 3)]
+
+
+def test_leaderboard_promotes_key_when_member_drops():
+    """
+    Test that a key outside the top K takes over when a member loses likes.
+    """
+    board = Leaderboard(size=1)
+    board.update("a", 2)
+    board.update("b", 1)
+    board.update("a", -2)
+
+    assert board.top() == [("b", 1)]
+
+
+def test_leaderboard_pages_through_ranking():
+    """
+    Test that limit and offset slice the ranking.
+    """
+    board = Leaderboard(size=10)
+    for key in range(5):
+        board.update(key, key + 1)
+
+    assert board.top(limit=2, offset=1) == [(3, 4), (2, 3)]
+
+
+def test_windowed_leaderboard_ignores_old_likes():
+    """
+    Test that likes older than the window don't count towards trending.
+    """
+    board = WindowedLeaderboard(window=60, bucket=10, size=5)
+    now = time.time()
+    board.record("old", 1, at=now - 120)
+    board.record("new", 1, at=now)
+
+    assert board.top() == [("new", 1)]
+
+
+def test_windowed_leaderboard_unlike_is_subtracted():
+    """
+    Test that an unlike removes the like from the bucket it was recorded in.
+    """
+    board = WindowedLeaderboard(window=60, bucket=10, size=5)
+    liked_at = time.time() - 15
+    board.record("post", 1, at=liked_at)
+    board.record("post", 1)
+    board.record("post", -1, at=liked_at)
+
+    assert board.top() == [("post", 1)]
@@ -0,0 +1,89 @@
+import asyncio
+
+from sqlalchemy import func, select, update
+
+from app import models
+from app.database import SessionLocal
+from app.services import like_counts
+
+
+def _create_post(client, auth):
+    return client.post("/posts/", json={"title": "counted", "content": "x"}, headers=auth).json()["id"]
+
+
+def test_reconcile_corrects_drifted_like_counts(client, sign_up):
+    """
+    Test that reconciling recomputes a drifted like_count from the likes table.
+    """
+    _, author_auth = sign_up("rita")
+    post_id = _create_post(client, author_auth)
+    for _ in range(2):
+        client.post("/likes/", json={"post_id": post_id}, headers=sign_up("sam")[1])
+
+    with SessionLocal() as db:
+        db.execute(update(models.Post).where(models.Post.id == post_id).values(like_count=7))
+        db.commit()
+
+        assert like_counts.reconcile_like_counts(db) >= 1
+        assert db.scalar(select(models.Post.like_count).where(models.Post.id == post_id)) == 2
+        assert like_counts.reconcile_like_counts(db) == 0
+
+
+def _stored_counts(post_id):
+    with SessionLocal() as db:
+        post = db.execute(
+            select(models.Post.like_count, models.Post.hot_score, models.Post.created_at)
+            .where(models.Post.id == post_id)
+        ).one()
+        shards = db.scalar(
+            select(func.coalesce(func.sum(models.PostLikeShard.count), 0))
+            .where(models.PostLikeShard.post_id == post_id)
+        )
+    return post, shards
+
+
+def test_hot_post_likes_go_to_shards_and_fold_back(client, sign_up, monkeypatch):
+    """
+    Test that likes past the threshold go to shard rows, that the like count
+    endpoint includes them, and that a fold moves them into the post, its
+    hot score and its cached payload.
+    """
+    monkeypatch.setattr(like_counts, "LIKE_SHARD_THRESHOLD", 2)
+    _, author_auth = sign_up("tess")
+    post_id = _create_post(client, author_auth)
+    client.get(f"/posts/{post_id}")
+    for _ in range(6):
+        client.post("/likes/", json={"post_id": post_id}, headers=sign_up("uma")[1])
+
+    post, shards = _stored_counts(post_id)
+    assert (post.like_count, shards) == (2, 4)
+    assert client.get(f"/likes/posts/{post_id}/like_count").json()["likes_count"] == 6
+    assert client.get(f"/posts/{post_id}").json()["like_count"] == 2
+
+    with SessionLocal() as db:
+        assert like_counts.fold_like_shards(db) >= 1
+
+    post, shards = _stored_counts(post_id)
+    assert (post.like_count, shards) == (6, 0)
+    assert post.hot_score == models.hot_score(6, post.created_at)
+    assert client.get(f"/posts/{post_id}").json()["like_count"] == 6
+    with SessionLocal() as db:
+        assert like_counts.fold_like_shards(db) == 0
+
+
+def test_shards_are_folded_periodically(monkeypatch):
+    """
+    Test that the background job folds the shards on every interval.
+    """
+    folds = []
+    monkeypatch.setattr(like_counts, "LIKE_SHARD_FOLD_INTERVAL", 0)
+    monkeypatch.setattr(like_counts, "_fold_like_shards_once", lambda: folds.append(1) or 0)
+
+    async def run():
+        task = asyncio.create_task(like_counts.fold_periodically())
+        while len(folds) < 2:
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+    asyncio.run(asyncio.wait_for(run(), 5))
+    assert len(folds) >= 2
@@ -0,0 +1,139 @@
+from app.database import SessionLocal
+from app.pagination import MAX_PAGE_SIZE
+from app.router.likes import _most_liked_users
+
+
+def _create_post(client, auth, title="post"):
+    return client.post("/posts/", json={"title": title, "content": "x"}, headers=auth).json()["id"]
+
+
+def test_post_likes_are_counted_listed_and_reset(client, sign_up):
+    """
+    Test that a post's likes are read from the database, listed under its
+    author, and cleared by a reset.
+    """
+    author, author_auth = sign_up("ivan")
+    _, liker_auth = sign_up("judy")
+    post_id = _create_post(client, author_auth)
+    client.post("/likes/", json={"post_id": post_id}, headers=liker_auth)
+
+    assert client.get(f"/likes/posts/{post_id}/likes").json() == {"post_id": post_id, "likes": 1}
+    assert client.get(f"/likes/users/{author}/likes").json()["liked_posts"] == [{"post_id": post_id, "likes": 1}]
+
+    assert client.delete(f"/likes/posts/{post_id}/likes").status_code == 204
+    assert client.get(f"/posts/{post_id}").json()["like_count"] == 0
+    assert client.get(f"/likes/users/{author}/liked_posts").json()["liked_posts"] == []
+    assert client.delete(f"/likes/posts/{post_id}/likes").status_code == 204
+    assert client.get("/likes/posts/0/likes").status_code == 404
+    assert client.delete("/likes/users/nobody-at-all/likes").status_code == 404
+
+
+def test_repeated_like_is_rejected_without_counting_twice(client, sign_up):
+    """
+    Test that liking a post twice returns 409 and leaves one like counted.
+    """
+    _, author_auth = sign_up("kim")
+    _, liker_auth = sign_up("leo")
+    post_id = _create_post(client, author_auth)
+
+    assert client.post("/likes/", json={"post_id": post_id}, headers=liker_auth).status_code == 201
+    response = client.post("/likes/", json={"post_id": post_id}, headers=liker_auth)
+
+    assert response.status_code == 409
+    assert response.json()["detail"] == "User has already liked this post"
+    assert client.get(f"/posts/{post_id}").json()["like_count"] == 1
+    assert client.get(f"/likes/posts/{post_id}/like_count").json()["likes_count"] == 1
+
+
+def test_liking_a_missing_post_is_not_found(client, sign_up):
+    """
+    Test that liking a post that doesn't exist returns 404.
+    """
+    _, auth = sign_up("mia")
+
+    response = client.post("/likes/", json={"post_id": 0}, headers=auth)
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Post not found"
+
+
+def test_unliking_without_a_like_is_not_found(client, sign_up):
+    """
+    Test that removing a like that doesn't exist returns 404 and leaves the
+    counter alone, for an existing post and a missing one.
+    """
+    _, author_auth = sign_up("ned")
+    _, liker_auth = sign_up("olga")
+    post_id = _create_post(client, author_auth)
+    client.post("/likes/", json={"post_id": post_id}, headers=author_auth)
+
+    for missing in (post_id, 0):
+        response = client.request("DELETE", "/likes/", json={"post_id": missing}, headers=liker_auth)
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Like not found"
+    assert client.get(f"/posts/{post_id}").json()["like_count"] == 1
+
+
+def test_like_count_follows_likes_and_unlikes(client, sign_up):
+    """
+    Test that like_count matches the likes table through likes, unlikes and
+    a like made again.
+    """
+    _, author_auth = sign_up("pam")
+    likers = [sign_up("quinn")[1] for _ in range(3)]
+    post_id = _create_post(client, author_auth)
+
+    for auth in likers:
+        client.post("/likes/", json={"post_id": post_id}, headers=auth)
+    client.request("DELETE", "/likes/", json={"post_id": post_id}, headers=likers[0])
+    assert client.request("DELETE", "/likes/", json={"post_id": post_id}, headers=likers[0]).status_code == 404
+    client.post("/likes/", json={"post_id": post_id}, headers=likers[1])
+    client.post("/likes/", json={"post_id": post_id}, headers=likers[0])
+
+    assert client.get(f"/posts/{post_id}").json()["like_count"] == 3
+    assert client.get(f"/likes/posts/{post_id}/likes").json()["likes"] == 3
+
+
+def test_post_is_cached_again_right_after_an_unlike(client, sign_up):
+    """
+    Test that reads of a post just invalidated by an unlike are served from
+    the cache after the first one.
+    """
+    _, author_auth = sign_up("rob")
+    post_id = _create_post(client, author_auth)
+    client.post("/likes/", json={"post_id": post_id}, headers=author_auth)
+    client.request("DELETE", "/likes/", json={"post_id": post_id}, headers=author_auth)
+
+    before = client.get("/health/cache").json()["posts"]
+    for _ in range(4):
+        assert client.get(f"/posts/{post_id}").json()["like_count"] == 0
+    after = client.get("/health/cache").json()["posts"]
+
+    assert (after["hits"] - before["hits"], after["misses"] - before["misses"]) == (3, 1)
+
+
+def test_most_liked_users_sum_likes_across_posts(client, sign_up):
+    """
+    Test that authors are ranked by the likes summed over all their posts,
+    and that an author whose likes were all taken back drops out.
+    """
+    first, first_auth = sign_up("sam")
+    second, second_auth = sign_up("tess")
+    third, third_auth = sign_up("uma")
+    likers = [sign_up("vic")[1] for _ in range(3)]
+    first_posts = [_create_post(client, first_auth, title) for title in ("a", "b")]
+    second_post = _create_post(client, second_auth)
+    third_post = _create_post(client, third_auth)
+
+    for auth in likers[:2]:
+        for post_id in first_posts:
+            client.post("/likes/", json={"post_id": post_id}, headers=auth)
+    for auth in likers:
+        client.post("/likes/", json={"post_id": second_post}, headers=auth)
+    client.post("/likes/", json={"post_id": third_post}, headers=likers[0])
+    client.request("DELETE", "/likes/", json={"post_id": third_post}, headers=likers[0])
+
+    with SessionLocal() as db:
+        ranked = _most_liked_users(db, MAX_PAGE_SIZE, 0)
+    ours = [entry for entry in ranked if entry["username"] in (first, second, third)]
+    assert ours == [{"username": first, "likes": 4}, {"username": second, "likes": 3}]
@@ -0,0 +1,43 @@
+import datetime
+
+from app.models import EXCERPT_LENGTH, HOT_DECAY_SECONDS, Post, hot_score, make_excerpt
+
+
+def test_short_content_is_its_own_excerpt():
+    """
+    Test that content within the excerpt length is kept as is.
+    """
+    assert make_excerpt("Hello world") == "Hello world"
+
+
+def test_long_content_is_cut_with_ellipsis():
+    """
+    Test that long content is cut to the excerpt length, ending in an ellipsis.
+    """
+    excerpt = make_excerpt("x" * (EXCERPT_LENGTH * 2))
+
+    assert len(excerpt) == EXCERPT_LENGTH
+    assert excerpt.endswith("…")
+
+
+def test_post_excerpt_follows_content():
+    """
+    Test that setting or editing a post's content updates its excerpt.
+    """
+    post = Post(title="t", content="first")
+    assert post.excerpt == "first"
+
+    post.content = "second"
+    assert post.excerpt == "second"
+
+
+def test_hot_score_trades_likes_for_recency():
+    """
+    Test that ten times the likes are worth HOT_DECAY_SECONDS of recency.
+    """
+    created_at = datetime.datetime(2026, 3, 1, 9, 0)
+    later = created_at + datetime.timedelta(seconds=HOT_DECAY_SECONDS)
+
+    assert hot_score(10, created_at) == hot_score(1, later)
+    assert hot_score(0, created_at) == hot_score(1, created_at)
+    assert hot_score(11, created_at) > hot_score(1, later)
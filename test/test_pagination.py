@@ -0,0 +1,65 @@
+import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.pagination import (
+    decode_cursor, decode_score_cursor, decode_search_cursor, encode_cursor, encode_score_cursor,
+    encode_search_cursor,
+)
+
+
+def test_cursor_round_trip():
+    """
+    Test that a cursor decodes back to the exact sort key it was built from.
+    """
+    created_at = datetime.datetime(2025, 8, 30, 12, 30, 45, 123456)
+    cursor = encode_cursor(created_at, 42)
+
+    assert decode_cursor(cursor) == (created_at, 42)
+
+
+def test_score_cursor_round_trip():
+    """
+    Test that a score cursor keeps the float score exactly.
+    """
+    cursor = encode_score_cursor(1231.0304728123457, 9)
+
+    assert decode_score_cursor(cursor) == (1231.0304728123457, 9)
+
+
+def test_search_cursor_round_trip():
+    """
+    Test that a search cursor keeps its offset and ranked ID range, open or not.
+    """
+    assert decode_search_cursor(encode_search_cursor(40, 1200, 9000)) == (40, 1200, 9000)
+    assert decode_search_cursor(encode_search_cursor(20, None, 9000)) == (20, None, 9000)
+
+
+def test_search_cursor_with_negative_offset_is_rejected():
+    """
+    Test that a search cursor with a negative offset is rejected with a 400 error.
+    """
+    with pytest.raises(HTTPException) as exc_info:
+        decode_search_cursor(encode_search_cursor(-20, None, 9000))
+
+    assert exc_info.value.status_code == 400
+
+
+def test_cursor_is_url_safe():
+    """
+    Test that cursors can be passed as query parameters without escaping.
+    """
+    cursor = encode_cursor(datetime.datetime(2025, 1, 1), 7)
+
+    assert all(ch.isalnum() or ch in "-_" for ch in cursor)
+
+
+def test_invalid_cursor_is_rejected():
+    """
+    Test that a tampered cursor is rejected with a 400 error.
+    """
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor("not-a-cursor")
+
+    assert exc_info.value.status_code == 400
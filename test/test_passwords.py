@@ -0,0 +1,52 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app import passwords
+
+
+def test_cancelled_caller_keeps_its_slot_until_the_job_ends(monkeypatch):
+    """
+    Test that cancelling a request waiting on a password job doesn't free its
+    slot while the job still runs on the pool.
+    """
+    monkeypatch.setattr(passwords, "_slots", threading.BoundedSemaphore(1))
+    started, release = threading.Event(), threading.Event()
+
+    def slow_hash():
+        started.set()
+        release.wait(5)
+        return "hash"
+
+    async def cancel_while_hashing():
+        task = asyncio.create_task(passwords._run_async(slow_hash))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_while_hashing())
+
+    with pytest.raises(HTTPException) as exc_info:
+        passwords._run(str, "x")
+    assert exc_info.value.status_code == 503
+
+    release.set()
+    for _ in range(100):
+        if passwords._slots.acquire(timeout=0.05):
+            passwords._slots.release()
+            break
+    assert passwords._run(str, "x") == "x"
+
+
+def test_hashes_verify_only_the_right_password():
+    """
+    Test that a hash made here verifies, and a wrong password doesn't.
+    """
+    hashed = passwords.get_password_hash("correct horse")
+
+    assert passwords.verify_password("correct horse", hashed)
+    assert asyncio.run(passwords.verify_and_update_async("wrong", hashed)) == (False, None)
+    assert asyncio.run(passwords.verify_and_update_async("correct horse", hashed)) == (True, None)
@@ -0,0 +1,91 @@
+import uuid
+
+from app.services import bulk
+
+
+def test_feed_etag_changes_when_likes_move_between_posts(client, sign_up):
+    """
+    Test that liking one post and unliking another on the same page changes
+    the ETags of the feed and of the author's posts, and the counts served.
+    """
+    author, author_auth = sign_up("alice")
+    _, liker_auth = sign_up("bob")
+    first = client.post("/posts/", json={"title": "one", "content": "x"}, headers=author_auth).json()["id"]
+    second = client.post("/posts/", json={"title": "two", "content": "x"}, headers=author_auth).json()["id"]
+    client.post("/likes/", json={"post_id": second}, headers=liker_auth)
+
+    feed = client.get("/posts/?limit=2")
+    user_posts = client.get(f"/posts/user/{author}")
+    assert [(item["id"], item["like_count"]) for item in feed.json()["items"]] == [(second, 1), (first, 0)]
+
+    client.post("/likes/", json={"post_id": first}, headers=liker_auth)
+    client.request("DELETE", "/likes/", json={"post_id": second}, headers=liker_auth)
+
+    revalidated = client.get("/posts/?limit=2", headers={"If-None-Match": feed.headers["ETag"]})
+    assert revalidated.status_code == 200
+    assert revalidated.headers["ETag"] != feed.headers["ETag"]
+    assert [(item["id"], item["like_count"]) for item in client.get("/posts/?limit=2").json()["items"]] == [
+        (second, 0), (first, 1)
+    ]
+    assert client.get(
+        f"/posts/user/{author}", headers={"If-None-Match": user_posts.headers["ETag"]}
+    ).status_code == 200
+
+
+def test_unchanged_feed_is_not_modified(client, sign_up):
+    """
+    Test that revalidating an unchanged feed page returns an empty 304.
+    """
+    _, author_auth = sign_up("carol")
+    client.post("/posts/", json={"title": "three", "content": "x"}, headers=author_auth)
+
+    feed = client.get("/posts/?limit=2")
+    revalidated = client.get("/posts/?limit=2", headers={"If-None-Match": feed.headers["ETag"]})
+
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+
+
+def test_search_pages_ignore_posts_created_while_paging(client, sign_up):
+    """
+    Test that paging through search results neither repeats nor skips posts
+    when matching posts are created between pages.
+    """
+    word = f"zq{uuid.uuid4().hex[:8]}"
+    _, author_auth = sign_up("heidi")
+    created = {
+        client.post("/posts/", json={"title": word, "content": "x"}, headers=author_auth).json()["id"]
+        for _ in range(5)
+    }
+
+    first = client.get(f"/posts/search?q={word}&limit=2").json()
+    # A content-only match ranks below every title match, i.e. on a later page.
+    client.post("/posts/", json={"title": "x", "content": f"{word} and more"}, headers=author_auth)
+    seen = [item["id"] for item in first["items"]]
+    cursor = first["next_cursor"]
+    while cursor:
+        page = client.get(f"/posts/search?q={word}&limit=2&cursor={cursor}").json()
+        seen += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+
+    assert sorted(seen) == sorted(created)
+
+
+def test_ndjson_upload_commits_in_batches(client, sign_up, monkeypatch):
+    """
+    Test that an NDJSON upload spanning several batches stores every valid
+    line and reports the invalid ones by line number.
+    """
+    monkeypatch.setattr(bulk, "BULK_CHUNK_SIZE", 2)
+    author, auth = sign_up("ivy")
+    lines = [b'{"title": "n%d", "content": "x"}' % i for i in range(5)] + [b"oops"]
+
+    response = client.post(
+        "/posts/bulk/ndjson", content=b"\n".join(lines), headers={**auth, "Content-Type": "application/x-ndjson"}
+    )
+
+    assert response.status_code == 201
+    assert response.json() == {
+        "created": 5, "ids": None, "errors": [{"index": 5, "error": "Invalid JSON"}], "error_count": 1
+    }
+    assert sorted(post["title"] for post in client.get(f"/posts/user/{author}").json()) == [f"n{i}" for i in range(5)]
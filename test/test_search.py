@@ -0,0 +1,35 @@
+from app.services.search import _highlight, fts5_query, parse_query, tsquery
+
+
+def test_query_is_split_into_words_and_prefixes():
+    """
+    Test that a search query becomes lowercase words, with a trailing '*' marking a prefix.
+    """
+    assert parse_query("Python pyth* TIPS") == [("python", False), ("pyth", True), ("tips", False)]
+
+
+def test_query_syntax_cannot_be_injected():
+    """
+    Test that operators and quotes in user input are treated as separators.
+    """
+    terms = parse_query('a" OR title:x NEAR(b c) -d & e | !f')
+
+    assert fts5_query(terms) == '"a" "or" "title" "x" "near" "b" "c" "d" "e" "f"'
+    assert tsquery(terms) == "a & or & title & x & near & b & c & d & e & f"
+
+
+def test_prefix_terms_use_each_dialects_syntax():
+    """
+    Test that prefix terms become FTS5 '*' and tsquery ':*' prefixes.
+    """
+    terms = parse_query("gard* tips")
+
+    assert fts5_query(terms) == '"gard"* "tips"'
+    assert tsquery(terms) == "gard:* & tips"
+
+
+def test_snippets_escape_post_text():
+    """
+    Test that snippet text is HTML-escaped while matches are marked with <b>.
+    """
+    assert _highlight("<i>\ue000python\ue001</i>") == "&lt;i&gt;<b>python</b>&lt;/i&gt;"
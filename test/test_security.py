@@ -0,0 +1,76 @@
+import datetime
+
+from app import security
+
+
+def _create_post(client, headers):
+    return client.post("/posts/", json={"title": "auth", "content": "x"}, headers=headers)
+
+
+def _bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_expired_token_is_rejected(client, sign_up):
+    """
+    Test that a correctly signed token past its expiry is rejected with 401.
+    """
+    username, _ = sign_up("vera")
+    token = security.create_access_token({"sub": username}, expires_delta=datetime.timedelta(seconds=-1))
+
+    response = _create_post(client, _bearer(token))
+
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+
+
+def test_tampered_token_is_rejected(client, sign_up):
+    """
+    Test that a token whose payload or signature was altered is rejected with 401.
+    """
+    username, auth = sign_up("walt")
+    token = auth["Authorization"].split(" ", 1)[1]
+    header, payload, signature = token.split(".")
+    forged = security.create_access_token({"sub": f"{username}-admin"}).split(".")[1]
+    flipped = signature[:-2] + ("AA" if signature[-2:] != "AA" else "BB")
+
+    assert _create_post(client, auth).status_code == 201
+    assert _create_post(client, _bearer(f"{header}.{forged}.{signature}")).status_code == 401
+    assert _create_post(client, _bearer(f"{header}.{payload}.{flipped}")).status_code == 401
+    other_key = security.jwt.encode({"sub": username}, "not-the-secret", algorithm=security.ALGORITHM)
+    assert _create_post(client, _bearer(other_key)).status_code == 401
+
+
+def test_deleted_user_is_rejected_once_cached(client, sign_up):
+    """
+    Test that a user cached by an earlier request can't authenticate after
+    being deleted.
+    """
+    username, auth = sign_up("xena")
+    assert _create_post(client, auth).status_code == 201
+    user_id = next(user["id"] for user in client.get("/users/").json() if user["username"] == username)
+
+    assert client.delete(f"/users/{user_id}").status_code == 204
+
+    assert _create_post(client, auth).status_code == 401
+
+
+def test_updated_user_is_not_served_from_the_cache(client, sign_up):
+    """
+    Test that after a user is renamed, the cached user for the old name is
+    dropped: old tokens stop working and posts are written under the new name.
+    """
+    username, auth = sign_up("yuri")
+    assert _create_post(client, auth).status_code == 201
+    user_id = next(user["id"] for user in client.get("/users/").json() if user["username"] == username)
+    renamed = f"{username}-new"
+
+    response = client.put(
+        f"/users/{user_id}", json={"username": renamed, "email": f"{renamed}@example.com", "password": "pw"}
+    )
+    assert response.status_code == 200
+
+    assert _create_post(client, auth).status_code == 401
+    post = _create_post(client, _bearer(security.create_access_token({"sub": renamed})))
+    assert post.status_code == 201
+    assert post.json()["id"] in [item["id"] for item in client.get(f"/posts/user/{renamed}").json()]
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from app.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    """
+    Test that concurrent callers with the same key run the function once.
+    """
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "post"
+
+    async def main():
+        flight = SingleFlight()
+        return await asyncio.gather(*(flight.do("post:1", load) for _ in range(50)))
+
+    assert asyncio.run(main()) == ["post"] * 50
+    assert len(calls) == 1
+
+
+def test_errors_reach_every_caller_and_are_not_remembered():
+    """
+    Test that a failure is raised to all waiting callers and the next call retries.
+    """
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        if len(calls) == 1:
+            raise RuntimeError("database unavailable")
+        return "post"
+
+    async def main():
+        flight = SingleFlight(ttl=60)
+        results = await asyncio.gather(*(flight.do("post:1", load) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        return await flight.do("post:1", load)
+
+    assert asyncio.run(main()) == "post"
+    assert len(calls) == 2
+
+
+def test_stale_result_is_served_while_refreshing():
+    """
+    Test that an expired result is returned immediately while one refresh runs.
+    """
+    versions = iter(["v1", "v2"])
+
+    async def load():
+        await asyncio.sleep(0.01)
+        return next(versions)
+
+    async def main():
+        flight = SingleFlight(ttl=0.01, stale_ttl=60)
+        assert await flight.do("feed", load) == "v1"
+        await asyncio.sleep(0.02)
+        assert await flight.do("feed", load) == "v1"
+        await asyncio.sleep(0.05)
+        assert await flight.do("feed", load) == "v2"
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("ttl", [0, 60])
+def test_forget_drops_remembered_result(ttl):
+    """
+    Test that a forgotten key is loaded again on the next call.
+    """
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return len(calls)
+
+    async def main():
+        flight = SingleFlight(ttl=ttl)
+        await flight.do("key", load)
+        flight.forget("key")
+        return await flight.do("key", load)
+
+    assert asyncio.run(main()) == 2
@@ -0,0 +1,62 @@
+import time
+
+from app.services.tags import extract_hashtags
+from app.services.trending import CountMinSketch, TrendingTags
+
+
+def test_hashtags_are_extracted_once_each_in_lowercase():
+    """
+    Test that hashtags are lowercased, deduplicated and kept in order of appearance.
+    """
+    assert extract_hashtags("#Python tips, #fastapi and more #python_3!") == ["python", "fastapi", "python_3"]
+    assert extract_hashtags("Again: #PYTHON #python") == ["python"]
+
+
+def test_things_that_look_like_hashtags_are_not_extracted():
+    """
+    Test that C#, numbers, HTML entities, URL fragments and '##' are not tags.
+    """
+    assert extract_hashtags("I write C# and F#, ranked #1, it&#39;s ##double") == []
+    assert extract_hashtags("see https://example.com/page#section") == []
+    assert extract_hashtags(None) == []
+
+
+def test_count_min_sketch_never_underestimates():
+    """
+    Test that a narrow sketch overestimates colliding keys but never underestimates.
+    """
+    sketch = CountMinSketch(width=16, depth=2)
+    counts = {f"tag{i}": i % 7 + 1 for i in range(100)}
+    for key, count in counts.items():
+        sketch.add(key, count)
+
+    assert all(sketch.estimate(key) >= count for key, count in counts.items())
+
+
+def test_trending_tags_rank_the_most_used_within_the_window():
+    """
+    Test that trending tags are ranked by uses, ties by name, and that deletions count.
+    """
+    trending = TrendingTags(window=3600, bucket=60, size=3, refresh=0)
+    trending.record(["python", "rust"])
+    trending.record(["python", "go"])
+    trending.record(["python", "go", "zig"])
+    trending.record(["zig"], delta=-1)
+
+    assert trending.top() == [("python", 3), ("go", 2), ("rust", 1)]
+    assert trending.top(1) == [("python", 3)]
+
+
+def test_trending_tags_forget_expired_buckets():
+    """
+    Test that uses older than the window are dropped from the counts.
+    """
+    now = time.time()
+    trending = TrendingTags(window=600, bucket=60, size=5, refresh=0)
+    trending.record(["old"], at=now - 500)
+    trending.record(["old", "new"], at=now - 30)
+    trending.record(["ancient"], at=now - 700)
+
+    assert trending.top() == [("old", 2), ("new", 1)]
+    trending.window = 300
+    assert trending.top() == [("new", 1), ("old", 1)]
@@ -0,0 +1,43 @@
+import datetime
+from collections import namedtuple
+
+from app.services.timeline import merge_streams
+
+Row = namedtuple("Row", ["id", "username", "created_at"])
+
+
+def _row(post_id, username, minute):
+    return Row(post_id, username, datetime.datetime(2025, 1, 1, 12, minute))
+
+
+def test_merge_streams_interleaves_authors_newest_first():
+    """
+    Test that per-author streams merge into one newest-first page.
+    """
+    streams = {
+        "alice": [_row(5, "alice", 50), _row(2, "alice", 20)],
+        "bob": [_row(4, "bob", 40), _row(3, "bob", 30), _row(1, "bob", 10)],
+    }
+
+    assert [row.id for row in merge_streams(streams, 4)] == [5, 4, 3, 2]
+
+
+def test_merge_streams_breaks_ties_by_id():
+    """
+    Test that posts created at the same moment are ordered by descending ID.
+    """
+    streams = {"alice": [_row(7, "alice", 0)], "bob": [_row(9, "bob", 0)], "carol": []}
+
+    assert [row.id for row in merge_streams(streams, 10)] == [9, 7]
+
+
+def test_merge_streams_keeps_one_row_per_post():
+    """
+    Test that a post both materialized and pulled at read time appears once.
+    """
+    streams = {
+        None: [_row(8, "bob", 30), _row(6, "alice", 20)],
+        "bob": [_row(8, "bob", 30), _row(5, "bob", 10)],
+    }
+
+    assert [row.id for row in merge_streams(streams, 10)] == [8, 6, 5]
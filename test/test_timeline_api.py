@@ -0,0 +1,42 @@
+from app.services import timeline
+
+
+def test_empty_timeline_of_new_user_is_not_rebuilt(client, sign_up, monkeypatch):
+    """
+    Test that reading the empty timeline of a user who follows nobody does
+    not schedule a rebuild.
+    """
+    rebuilt = []
+    monkeypatch.setattr(timeline, "rebuild_timeline_task", rebuilt.append)
+    _, auth = sign_up("dave")
+
+    for _ in range(2):
+        assert client.get("/timeline/", headers=auth).json()["items"] == []
+    assert rebuilt == []
+
+
+def test_unfollow_below_threshold_fans_out_only_celebrity_posts(client, sign_up, monkeypatch):
+    """
+    Test that an author dropping below the celebrity threshold fans out only
+    the posts they made as a celebrity.
+    """
+    monkeypatch.setattr(timeline, "CELEBRITY_FOLLOWER_THRESHOLD", 2)
+    fanned_out = []
+    monkeypatch.setattr(timeline, "fan_out_posts", fanned_out.append)
+    author, author_auth = sign_up("erin")
+    _, first_auth = sign_up("frank")
+    _, second_auth = sign_up("grace")
+    client.post("/posts/", json={"title": "before", "content": "x"}, headers=author_auth)
+    client.post(f"/follows/{author}", headers=first_auth)
+    client.post(f"/follows/{author}", headers=second_auth)
+    fanned_out.clear()
+    during = client.post("/posts/", json={"title": "during", "content": "x"}, headers=author_auth).json()["id"]
+    fanned_out.clear()
+
+    assert client.delete(f"/follows/{author}", headers=second_auth).status_code == 204
+    assert fanned_out == [[during]]
+
+    fanned_out.clear()
+    client.post(f"/follows/{author}", headers=second_auth)
+    client.delete(f"/follows/{author}", headers=second_auth)
+    assert fanned_out == []